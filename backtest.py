@@ -0,0 +1,519 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+import indicators
+import tradingcalendar
+from marketdata import PRICE_COLUMNS
+from tt import RSI_THRESHOLD as TT_RSI_THRESHOLD
+from npm import VIX_THRESHOLD
+from pcr import BUY_THRESHOLD as PCR_BUY_THRESHOLD, CLOSE_THRESHOLD as PCR_CLOSE_THRESHOLD
+from bm import BM_SYMBOLS, MIN_ABOVE_SMA
+from bm_pt import PT_SYMBOLS
+from tom import ETFS, RSI_THRESHOLD as TOM_RSI_THRESHOLD
+from swings import R2_THRESHOLD, RSI_THRESHOLD as SWING_RSI_THRESHOLD, ADX_THRESHOLD
+
+# --- Historischer Backtest der Signalregeln ---
+# Die Einstiegsbedingungen jeder Strategie werden als boolesche Arrays über die gesamte
+# Historie berechnet (statt Tag für Tag die Skripte auszuführen). Nur die Ausstiege werden
+# je Trade ermittelt: das erste Kursziel, das erste Ausstiegssignal oder der Time Stop.
+#
+# Angenommene Ausführung:
+# - "ON CLOSE"-Signale (LTT, LNPM, LBM, TOM, Swings) werden zum Schlusskurs des Signaltags
+#   gekauft, "ON OPEN"-Signale (LPCR) zur Eröffnung des folgenden Handelstags.
+# - Ein Kursziel gilt als erreicht, wenn das Tageshoch es erreicht; verkauft wird zum
+#   Kursziel bzw. zur Eröffnung, wenn der Kurs darüber eröffnet.
+# - Je Symbol ist höchstens eine Position offen; Signale während einer Position verfallen.
+#
+# Die Kapitalkurve wird täglich zu Schlusskursen bewertet: Das Kapital verteilt sich
+# gleichmäßig auf alle an einem Tag gehaltenen Positionen (ohne Position liegt es als
+# Bargeld ohne Zins). Überlappende Trades teilen sich so das Kapital, statt nacheinander
+# jeweils mit dem ganzen Kapital verbucht zu werden.
+
+# Ausstiege laut den Nachrichten der Skripte
+TT_PROFIT_TARGET = 0.01
+BM_PROFIT_TARGET = 0.03
+NPM_PROFIT_TARGET = 0.06
+NPM_TIME_STOP = 9
+# tom.py und swings.py nennen keinen Ausstieg. Für den Backtest wird TOM am Schluss des
+# dritten Handelstags des Folgemonats verkauft, Swing-Signale nach 10 Handelstagen.
+TOM_EXIT_TRADING_DAY = 3
+SWING_TIME_STOP = 10
+
+
+def load_data(path):
+    """
+    Liest eine lokale Kursdatei (Parquet oder CSV) im Langformat mit den Spalten
+    Date, Symbol, Open, High, Low, Close, Volume und gibt ein DataFrame mit
+    (Feld, Symbol)-Spalten zurück (wie marketdata.build_panel).
+    """
+    data = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    data["Date"] = pd.to_datetime(data["Date"])
+    if data["Date"].dt.tz is not None:
+        data["Date"] = data["Date"].dt.tz_localize(None)
+    data["Date"] = data["Date"].dt.normalize()
+    panel = data.set_index(["Date", "Symbol"])[PRICE_COLUMNS].unstack("Symbol")
+    return panel.sort_index()
+
+
+def load_pcr(path):
+    """Liest eine lokale Kopie von PCR_Index.TXT als Serie Datum -> PCR-Wert."""
+    from pcr import read_pcr_index
+
+    with open(path, encoding="utf-8") as f:
+        pcr_df = read_pcr_index(f.read())
+    pcr = pd.Series(pcr_df['Value'].to_numpy(dtype=np.float64),
+                    index=pd.to_datetime(pcr_df['Date'], format='%Y%m%d')).sort_index()
+    return pcr[~pcr.index.duplicated(keep="last")]
+
+
+# Schwellen der Skripte als Standardparameter; sweep.py variiert sie.
+DEFAULT_PARAMS = {
+    "tt": {"rsi_max": TT_RSI_THRESHOLD, "profit_target": TT_PROFIT_TARGET},
+    "npm": {"vix_min": VIX_THRESHOLD, "profit_target": NPM_PROFIT_TARGET, "time_stop": NPM_TIME_STOP},
+    "pcr": {"buy_above": PCR_BUY_THRESHOLD, "close_below": PCR_CLOSE_THRESHOLD},
+    "bm": {"min_above": MIN_ABOVE_SMA, "profit_target": BM_PROFIT_TARGET},
+    "tom": {"rsi_max": TOM_RSI_THRESHOLD, "top": 3, "exit_day": TOM_EXIT_TRADING_DAY},
+    "swings": {"r2_min": R2_THRESHOLD, "rsi_max": SWING_RSI_THRESHOLD, "adx_min": ADX_THRESHOLD,
+               "time_stop": SWING_TIME_STOP},
+}
+# bm_pt berechnet nur die Kursziele zu den Signalen von bm; die Trades sind dieselben.
+DEFAULT_PARAMS["bm_pt"] = DEFAULT_PARAMS["bm"]
+
+
+def _scatter(aligned, valid):
+    """Kehrt indicators.align_right um: schreibt die Werte zurück auf die Datumsspalten."""
+    n_cols = aligned.shape[1]
+    right = np.arange(n_cols)[None, :] >= n_cols - valid.sum(axis=1)[:, None]
+    result = np.full(aligned.shape, np.nan)
+    result[valid] = aligned[right]
+    return result
+
+
+def _per_symbol(valid, function, *matrices):
+    """Wendet einen Indikator auf die vollständigen Bars jedes Symbols an (wie dropna())."""
+    aligned, _ = indicators.align_right(*matrices)
+    return _scatter(function(*aligned), valid)
+
+
+def _previous(close):
+    previous = np.full_like(close, np.nan)
+    previous[:, 1:] = close[:, :-1]
+    return previous
+
+
+def _prices(panel, symbols):
+    """
+    Gemeinsame Grundlage aller Strategien: Datumsachse und Kursmatrizen (Symbol × Tag).
+    Tage ohne vollständigen Bar eines Symbols sind NaN.
+    """
+    fields = {field: panel[field].reindex(columns=symbols).to_numpy(dtype=np.float64).T
+              for field in PRICE_COLUMNS}
+    valid = np.logical_and.reduce([~np.isnan(matrix) for matrix in fields.values()])
+    features = {"symbols": list(symbols), "dates": panel.index.values.astype("datetime64[ns]"),
+                "weekday": panel.index.weekday.to_numpy()}
+    for field in ("Open", "High", "Low", "Close"):
+        features[field.lower()] = np.where(valid, fields[field], np.nan)
+    return features, valid
+
+
+def simulate(open_, high, close, entries, entry="close", profit_target=None, stop_at=None, exits=None):
+    """
+    Ermittelt die Trades eines Symbols auf seinen vollständigen Bars und gibt sie als Liste
+    von (Einstiegsindex, Ausstiegsindex, Einstiegskurs, Ausstiegskurs, Grund) zurück.
+
+    - entries: boolesches Array der Signaltage
+    - entry: "close" (Kauf zum Schlusskurs des Signaltags) oder "open" (Eröffnung am Folgetag)
+    - profit_target: Kursziel relativ zum Einstiegskurs, z.B. 0.03
+    - stop_at: Array mit dem Index des Bars, an dessen Schluss spätestens verkauft wird
+      (je Einstiegsbar), z.B. np.arange(n) + 9
+    - exits: boolesches Array der Verkaufssignale, ausgeführt zur Eröffnung am Folgetag
+    """
+    n = len(close)
+    trades = []
+    busy_until = -1
+
+    for signal in np.flatnonzero(entries).tolist():
+        entry_index = signal if entry == "close" else signal + 1
+        if entry_index >= n or entry_index <= busy_until:
+            continue
+        entry_price = close[entry_index] if entry == "close" else open_[entry_index]
+        first_bar = entry_index + 1 if entry == "close" else entry_index
+        last_bar = n - 1 if stop_at is None else min(int(stop_at[entry_index]), n - 1)
+
+        # Kandidaten als (Bar, Reihenfolge am Tag, Kurs, Grund): Eröffnung vor Intraday vor Schluss
+        candidates = []
+        if exits is not None:
+            signals = np.flatnonzero(exits[entry_index:last_bar])
+            if len(signals):
+                exit_index = entry_index + signals[0] + 1
+                candidates.append((exit_index, 0, open_[exit_index], "signal"))
+        if profit_target is not None:
+            target = entry_price * (1 + profit_target)
+            hits = np.flatnonzero(high[first_bar:last_bar + 1] >= target)
+            if len(hits):
+                exit_index = first_bar + hits[0]
+                price = target if exit_index == entry_index else max(open_[exit_index], target)
+                candidates.append((exit_index, 1, price, "target"))
+        if stop_at is not None and stop_at[entry_index] <= n - 1:
+            candidates.append((last_bar, 2, close[last_bar], "time"))
+
+        if candidates:
+            exit_index, _, exit_price, reason = min(candidates)
+        else:
+            # Noch offen: Bewertung zum letzten Schlusskurs
+            exit_index, exit_price, reason = n - 1, close[-1], "open"
+
+        trades.append((entry_index, exit_index, entry_price, exit_price, reason))
+        busy_until = exit_index
+
+    return trades
+
+
+TRADE_DTYPES = [object, "datetime64[ns]", np.float64, "datetime64[ns]", np.float64, object, np.int64]
+
+
+def trades_from_signals(features, entries, exits=None, entry="close", profit_target=None,
+                        time_stop=None, exit_day=None):
+    """
+    Simuliert die Signalmatrix `entries` (Symbol × Tag) für jedes Symbol auf dessen
+    vollständigen Bars. Der Time Stop ist entweder `time_stop` Handelstage nach dem Einstieg
+    oder der Schluss des `exit_day`-ten Handelstags im Folgemonat.
+    """
+    columns = {key: [] for key in ("symbol", "entry_date", "entry_price", "exit_date", "exit_price", "reason", "bars")}
+    entries = np.broadcast_to(entries, features["close"].shape)
+    if exits is not None:
+        exits = np.broadcast_to(exits, features["close"].shape)
+
+    for i, symbol in enumerate(features["symbols"]):
+        if not entries[i].any():
+            continue
+        rows = np.flatnonzero(~np.isnan(features["close"][i]))
+        dates = features["dates"][rows]
+        stop_at = None
+        if time_stop is not None:
+            stop_at = np.arange(len(rows)) + time_stop
+        elif exit_day is not None:
+            months = dates.astype("datetime64[M]")
+            stop_at = np.searchsorted(months, months + 1, side="left") + exit_day - 1
+
+        trades = simulate(
+            features["open"][i, rows], features["high"][i, rows], features["close"][i, rows],
+            entries[i, rows], entry=entry, profit_target=profit_target, stop_at=stop_at,
+            exits=None if exits is None else exits[i, rows])
+        if not trades:
+            continue
+        entry_index, exit_index, entry_price, exit_price, reason = (np.array(values) for values in zip(*trades))
+        columns["symbol"].append(np.full(len(trades), symbol, dtype=object))
+        columns["entry_date"].append(dates[entry_index])
+        columns["exit_date"].append(dates[exit_index])
+        columns["entry_price"].append(entry_price)
+        columns["exit_price"].append(exit_price)
+        columns["reason"].append(reason.astype(object))
+        columns["bars"].append(exit_index - entry_index)
+
+    trades = pd.DataFrame({key: np.concatenate(values) if values else np.array([], dtype=dtype)
+                           for (key, values), dtype in zip(columns.items(), TRADE_DTYPES)})
+    trades["return"] = trades["exit_price"] / trades["entry_price"] - 1
+    return trades
+
+
+def _loosest(grid, name, default, pick):
+    """Lockerste Schwelle eines Parametergitters, z.B. max() für 'kleiner als'-Bedingungen."""
+    return pick((grid or {}).get(name, [default]))
+
+
+# --- Strategien: prepare_* berechnet die parameterunabhängigen Arrays, signals_* die Signale ---
+
+def prepare_tt(panel, pcr=None, grid=None):
+    features, valid = _prices(panel, ["SPY"])
+    features["rsi"] = _per_symbol(valid, lambda close: indicators.rsi(close, 2), features["close"])
+    features["previous_close"] = _per_symbol(valid, _previous, features["close"])
+    return features
+
+
+def signals_tt(features, params):
+    """LTT: Montagsschluss < Freitagsschluss und RSI(2) < 35, BUY SPY ON CLOSE, PT 1%."""
+    entries = (features["weekday"] == 0) & (features["close"] < features["previous_close"]) & \
+        (features["rsi"] < params["rsi_max"])
+    return {"entries": entries, "profit_target": params["profit_target"]}
+
+
+def prepare_npm(panel, pcr=None, grid=None):
+    features, _ = _prices(panel, ["QQQ"])
+    features["vix"] = panel["Close"]["^VIX"].to_numpy(dtype=np.float64)
+    return features
+
+
+def signals_npm(features, params):
+    """LNPM: VIX-Schluss > 30, BUY QQQ ON CLOSE, PT 6%, Time Stop +9 Tage."""
+    entries = (features["weekday"] < 5) & (features["vix"] > params["vix_min"])
+    return {"entries": entries, "profit_target": params["profit_target"], "time_stop": params["time_stop"]}
+
+
+def prepare_pcr(panel, pcr=None, grid=None):
+    if pcr is None:
+        raise ValueError("Für 'pcr' wird eine lokale PCR_Index.TXT benötigt (--pcr).")
+    features, valid = _prices(panel, ["QQQ"])
+    percentage_diff = (pcr.rolling(2).mean() / pcr.rolling(200).mean() - 1) * 100
+    # Stand der PCR-Datei am jeweiligen Handelstag
+    features["pcr_diff"] = percentage_diff.reindex(panel.index, method="ffill").to_numpy()
+    features["roc"] = _per_symbol(valid, lambda close: indicators.roc(close, 60), features["close"])
+    return features
+
+
+def signals_pcr(features, params):
+    """
+    LPCR: SMA2/SMA200 des Put/Call-Ratios > +7 % und QQQ ROC(60) > 0 -> BUY ON OPEN,
+    < -4 % -> CLOSE LONG POSITION ON OPEN.
+    """
+    entries = (features["pcr_diff"] > params["buy_above"]) & (features["roc"] > 0)
+    exits = features["pcr_diff"] < params["close_below"]
+    return {"entries": entries, "exits": exits, "entry": "open"}
+
+
+def _last_session_of_week(dates):
+    """
+    tradingcalendar.is_last_session_of_week() je Tag (wie bm.is_due); außerhalb des
+    Handelskalenders gilt der Freitag.
+    """
+    last = np.zeros(len(dates), dtype=bool)
+    for i, day in enumerate(dates):
+        try:
+            last[i] = tradingcalendar.is_last_session_of_week(day)
+        except ValueError:
+            last[i] = day.weekday() == 4
+    return last
+
+
+def prepare_bm(panel, pcr=None, grid=None):
+    bond_symbols = [symbol for symbol in BM_SYMBOLS if symbol in panel.columns.get_level_values(1)]
+    bonds, valid = _prices(panel, bond_symbols)
+    sma = _per_symbol(valid, lambda close: indicators.sma(close, 100), bonds["close"])
+    features, _ = _prices(panel, PT_SYMBOLS)
+    features["above_count"] = (bonds["close"] > sma).sum(axis=0)
+    features["last_session_of_week"] = _last_session_of_week(panel.index)
+    return features
+
+
+def signals_bm(features, params):
+    """
+    LBM: am letzten Handelstag der Woche >= 7 von 12 Anleihe-ETFs über SMA(100) ->
+    BUY CWB+HYD+BAB, PT 3%.
+    """
+    entries = features["last_session_of_week"] & (features["above_count"] >= params["min_above"])
+    return {"entries": entries, "profit_target": params["profit_target"]}
+
+
+def prepare_tom(panel, pcr=None, grid=None):
+    etfs = [etf for etf in ETFS if etf in panel.columns.get_level_values(1)]
+    features, valid = _prices(panel, etfs)
+    close = features["close"]
+    features["rsi"] = _per_symbol(valid, lambda values: indicators.rsi(values, 2), close)
+    sma = _per_symbol(valid, lambda values: indicators.sma(values, 60), close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features["ratio"] = np.where(sma > 0, close / sma, np.nan)
+
+    # Erster Handelstag zwischen dem 24. und 28. eines Monats, außer im September
+    dates = panel.index
+    in_window = (dates.day >= 24) & (dates.day <= 28) & (dates.month != 9) & (dates.weekday < 5)
+    months = pd.Series(dates.year * 12 + dates.month)
+    features["first_day"] = in_window & ~months.where(in_window).duplicated().to_numpy()
+    return features
+
+
+def signals_tom(features, params):
+    """
+    Turn of Month: am ersten Handelstag zwischen dem 24. und 28. (außer September) die
+    Top 3 der ETFs mit RSI(2) < 40 nach Schlusskurs / SMA(60) kaufen.
+    """
+    ratio = np.where(features["rsi"] < params["rsi_max"], features["ratio"], np.nan)
+    # Rang je Tag über die ETFs (0 = höchstes Verhältnis), NaN zuletzt
+    order = np.argsort(np.where(np.isnan(ratio), np.inf, -ratio), axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(ratio.shape[0])[:, None], axis=0)
+    entries = features["first_day"] & (ranks < params["top"]) & ~np.isnan(ratio)
+    return {"entries": entries, "exit_day": params["exit_day"]}
+
+
+def prepare_swings(panel, pcr=None, grid=None, universe=None):
+    """
+    R2 wird nur für Tage berechnet, an denen RSI, ADX und ROC bei den lockersten
+    Schwellen des Gitters ein Signal zulassen.
+    """
+    from swings import calculate_best_r2_matrix
+
+    universe = list(universe or panel.columns.get_level_values(1).unique())
+    features, valid = _prices(panel, universe)
+    high, low, close = features["high"], features["low"], features["close"]
+    features["rsi"] = _per_symbol(valid, lambda values: indicators.rsi(values, 2), close)
+    features["adx"] = _per_symbol(valid, lambda h, l, c: indicators.adx(h, l, c, 14), high, low, close)
+    features["roc"] = _per_symbol(valid, lambda values: indicators.roc(values, 250), close)
+
+    rsi_max = _loosest(grid, "rsi_max", SWING_RSI_THRESHOLD, max)
+    adx_min = _loosest(grid, "adx_min", ADX_THRESHOLD, min)
+    candidates = (features["rsi"] < rsi_max) & (features["adx"] > adx_min) & (features["roc"] > 0)
+    r2 = np.full(close.shape, np.nan)
+    for i in np.flatnonzero(candidates.any(axis=1)):
+        rows = np.flatnonzero(valid[i])
+        dates = features["dates"][rows]
+        closes = close[i, rows]
+        positions = np.flatnonzero(candidates[i, rows])
+        # Je Kandidat die Schlusskurse der letzten 500 Kalendertage (wie period="500d")
+        starts = np.searchsorted(dates, dates[positions] - np.timedelta64(500, "D"))
+        width = int((positions - starts).max()) + 1
+        windows = np.full((len(positions), width), np.nan)
+        for row, (start, end) in enumerate(zip(starts, positions)):
+            windows[row, width - (end - start + 1):] = closes[start:end + 1]
+        best_r2, _ = calculate_best_r2_matrix(windows, min_length=100)
+        r2[i, rows[positions]] = best_r2 * 100
+    features["r2"] = r2
+    return features
+
+
+def signals_swings(features, params):
+    """
+    Swings: R2 > 85 (bestes R2 über die letzten 500 Kalendertage), RSI(2) < 10,
+    ADX(14) > 20 und ROC(250) > 0, Kauf zum Schluss, Time Stop nach 10 Handelstagen.
+    Als Universum dienen alle Symbole der Kursdatei.
+    """
+    entries = (features["r2"] > params["r2_min"]) & (features["rsi"] < params["rsi_max"]) & \
+        (features["adx"] > params["adx_min"]) & (features["roc"] > 0) & (features["weekday"] < 5)
+    return {"entries": entries, "time_stop": params["time_stop"]}
+
+
+BACKTESTS = {
+    "tt": (prepare_tt, signals_tt),
+    "npm": (prepare_npm, signals_npm),
+    "pcr": (prepare_pcr, signals_pcr),
+    "bm": (prepare_bm, signals_bm),
+    "bm_pt": (prepare_bm, signals_bm),
+    "tom": (prepare_tom, signals_tom),
+    "swings": (prepare_swings, signals_swings),
+}
+
+
+def evaluate(name, features, params=None):
+    """Gibt die Trades einer Strategie für vorbereitete Arrays und Parameter zurück."""
+    params = {**DEFAULT_PARAMS[name], **(params or {})}
+    return trades_from_signals(features, **BACKTESTS[name][1](features, params))
+
+
+def backtest(name, panel, pcr=None, params=None):
+    """Führt den Backtest einer Strategie mit den Standardparametern (oder `params`) aus."""
+    features = BACKTESTS[name][0](panel, pcr=pcr)
+    return evaluate(name, features, params)
+
+
+def portfolio_returns(trades, features):
+    """
+    Tägliche Rendite des Portfolios auf der Datumsachse von `features`: der Durchschnitt
+    der Tagesrenditen aller an diesem Tag gehaltenen Positionen (0 ohne Position).
+
+    Eine Position wird vom Einstiegskurs über die Schlusskurse bis zum Ausstiegskurs
+    bewertet; Tage ohne Bar des Symbols zählen mit unverändertem Kurs. Noch offene
+    Trades werden zum letzten Schlusskurs bewertet. Ein Kauf zum Schlusskurs ist erst ab
+    dem Folgetag investiert.
+    """
+    dates = features["dates"]
+    daily = np.zeros(len(dates))
+    if trades.empty:
+        return daily
+    index = {symbol: i for i, symbol in enumerate(features["symbols"])}
+    used, rows = np.unique([index[symbol] for symbol in trades["symbol"]], return_inverse=True)
+    # Schlusskurse ohne Lücken (letzter bekannter Kurs)
+    close = features["close"][used]
+    filled = np.where(np.isnan(close), 0, np.arange(len(dates)))
+    np.maximum.accumulate(filled, axis=1, out=filled)
+    close = np.take_along_axis(close, filled, axis=1)
+
+    # Alle Haltetage aller Trades als ein flaches Array (Trade × Tag)
+    entry = np.searchsorted(dates, trades["entry_date"].to_numpy())
+    lengths = np.searchsorted(dates, trades["exit_date"].to_numpy()) - entry + 1
+    starts = np.cumsum(lengths) - lengths
+    trade = np.repeat(np.arange(len(trades)), lengths)
+    days = np.arange(lengths.sum()) - starts[trade] + entry[trade]
+    marks = close[rows[trade], days]
+    marks[starts + lengths - 1] = trades["exit_price"].to_numpy()
+    previous = np.empty_like(marks)
+    previous[1:] = marks[:-1]
+    previous[starts] = trades["entry_price"].to_numpy()
+    returns = marks / previous - 1
+    held = (days != entry[trade]) | (returns != 0)
+
+    count = np.bincount(days[held], minlength=len(dates))
+    total = np.bincount(days[held], weights=returns[held], minlength=len(dates))
+    np.divide(total, count, out=daily, where=count > 0)
+    return daily
+
+
+def equity_curve(trades, features):
+    """Kapitalkurve (Start 1.0) aus portfolio_returns() als Serie über die Datumsachse."""
+    return pd.Series(np.cumprod(1 + portfolio_returns(trades, features)), index=features["dates"])
+
+
+def summarize(trades, equity):
+    """
+    Kennzahlen eines Backtests: Anzahl Trades, Trefferquote und Ø Rendite der
+    abgeschlossenen Trades sowie Gesamtrendite und Drawdown der Kapitalkurve `equity`.
+    """
+    returns = trades["return"].to_numpy()[trades["reason"].to_numpy() != "open"]
+    equity = np.asarray(equity)
+    drawdown = (equity / np.maximum.accumulate(equity) - 1).min() if len(equity) else 0.0
+    return {
+        "trades": len(returns),
+        "open": len(trades) - len(returns),
+        "hit_rate": (returns > 0).mean() * 100 if len(returns) else float("nan"),
+        "avg_return": returns.mean() * 100 if len(returns) else float("nan"),
+        "total_return": (equity[-1] - 1) * 100 if len(equity) else 0.0,
+        "max_drawdown": drawdown * 100,
+    }
+
+
+def run(panel, names=None, pcr=None):
+    """
+    Führt die angegebenen (oder alle) Backtests aus und gibt Name -> (Trades,
+    Kapitalkurve) zurück.
+    """
+    results = {}
+    for name in names or BACKTESTS:
+        try:
+            features = BACKTESTS[name][0](panel, pcr=pcr)
+            trades = evaluate(name, features)
+            results[name] = trades, equity_curve(trades, features)
+        except Exception as e:
+            print(f"Backtest '{name}' fehlgeschlagen: {e}", file=sys.stderr)
+    return results
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest der Signalregeln auf lokalen Kursdaten.")
+    parser.add_argument("data", help="Kursdatei (Parquet/CSV: Date, Symbol, Open, High, Low, Close, Volume)")
+    parser.add_argument("strategies", nargs="*", help=f"Strategien (Standard: alle): {', '.join(BACKTESTS)}")
+    parser.add_argument("--pcr", help="lokale Kopie von PCR_Index.TXT für die LPCR-Strategie")
+    parser.add_argument("--trades", help="CSV-Datei für alle Trades")
+    parser.add_argument("--equity", help="CSV-Datei für die Kapitalkurven")
+    args = parser.parse_args()
+    unknown = [name for name in args.strategies if name not in BACKTESTS]
+    if unknown:
+        parser.error(f"Unbekannte Strategie(n): {', '.join(unknown)}")
+
+    panel = load_data(args.data)
+    pcr = load_pcr(args.pcr) if args.pcr else None
+    names = args.strategies or [name for name in BACKTESTS if name != "pcr" or pcr is not None]
+    results = run(panel, names, pcr=pcr)
+
+    for name, (trades, equity) in results.items():
+        stats = summarize(trades, equity)
+        print(f"{name}: {stats['trades']} Trades ({stats['open']} offen), "
+              f"Trefferquote {stats['hit_rate']:.1f}%, Ø {stats['avg_return']:+.2f}% je Trade, "
+              f"gesamt {stats['total_return']:+.1f}%, max. Drawdown {stats['max_drawdown']:.1f}%")
+
+    if args.trades:
+        pd.concat([trades.assign(strategy=name) for name, (trades, _) in results.items()]).to_csv(
+            args.trades, index=False)
+    if args.equity:
+        pd.DataFrame({name: equity for name, (_, equity) in results.items()}).sort_index().ffill().to_csv(
+            args.equity, index_label="Date")
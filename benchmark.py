@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import time
+import types
+import zlib
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+
+# --- Benchmark der Pipeline-Stufen mit synthetischen Daten ---
+# Erzeugt deterministische OHLCV-Historien, Finviz-Screenerseiten und eine PCR-Datei und
+# misst jede Stufe (Scraping/Parsen, Laden, R2, Indikatoren, Filter, Nachrichten) für
+# mehrere Universumsgrößen. yfinance, Finviz und Telegram werden durch lokale Attrappen
+# ersetzt, der Lauf braucht kein Netzwerk. Kursdaten-Speicher, Indikator-Zustand und
+# HTTP-Cache liegen in einem temporären Verzeichnis.
+#
+#   python benchmark.py --sizes 100,1000 --out benchmark.json
+#   python benchmark.py --baseline benchmark_baseline.json            (Regressionsprüfung)
+#   python benchmark.py --baseline benchmark_baseline.json --save-baseline
+
+SIZES = [100, 1000, 5000, 10000]
+BARS = 500
+# Seitengröße der synthetischen Finviz-Screenerseiten (wie Finviz mit v=411)
+PAGE_SIZE = 20
+PCR_DAYS = 1500
+# Zeitraum, mit dem die Kursdaten geladen werden; deckt alle BARS Handelstage ab.
+LOAD_PERIOD = "3y"
+# Eine Stufe gilt als langsamer, wenn sie die Baseline um mehr als TOLERANCE (relativ)
+# und MIN_DELTA Sekunden (absolut, gegen Messrauschen bei kurzen Stufen) überschreitet.
+TOLERANCE = 0.5
+MIN_DELTA = 0.1
+# Strategien, deren build_message() im Abschnitt "scripts" gemessen wird (swings je Größe)
+SCRIPT_STRATEGIES = ["tt", "npm", "pcr", "bm", "bm_pt", "tom"]
+SCREENER_URL = "https://finviz.com/screener.ashx?v=411&f=benchmark"
+
+
+# --- Synthetische Daten ---
+def synthetic_symbols(n):
+    return [f"T{i:05d}" for i in range(n)]
+
+
+def synthetic_history(symbol, bars=BARS, end=None):
+    """
+    Deterministische Tageshistorie im Speicherformat von marketdata (Open, High, Low,
+    Close, Volume, Dividends, Stock Splits). Der Zufallsgenerator wird aus dem Symbol
+    abgeleitet; ein Teil der Symbole bekommt einen Trend, damit die Filter Treffer liefern.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(zlib.crc32(symbol.encode("utf-8")))
+    index = pd.bdate_range(end=pd.Timestamp(end or datetime.now()).normalize(), periods=bars, name="Date")
+    drift = 0.002 if rng.random() < 0.3 else 0.0
+    close = 50 * np.exp(np.cumsum(rng.normal(drift, 0.015, bars)))
+    open_ = close * (1 + rng.normal(0, 0.004, bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, bars)))
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close,
+                         "Volume": rng.integers(100_000, 5_000_000, bars).astype(float),
+                         "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+
+
+def synthetic_finviz_page(tickers, offset, total):
+    """Screenerseite im Aufbau von Finviz (Ticker-Links plus Trefferzahl) ab Treffer `offset`."""
+    page = tickers[offset - 1:offset - 1 + PAGE_SIZE]
+    rows = "\n".join(
+        f'<tr><td><a href="quote.ashx?t={ticker}&ty=c&p=d&b=1" class="screener-link-primary">{ticker}</a>'
+        f'</td><td><span onclick="window.location=\'quote.ashx?t={ticker}\'">{ticker}</span></td></tr>'
+        for ticker in page)
+    return (f"<html><body><div id='screener-total'>#{offset} / {total} Total</div>"
+            f"<table class='screener_table'>\n{rows}\n</table></body></html>")
+
+
+def synthetic_pcr(days=PCR_DAYS, end=None):
+    """PCR_Index.TXT: Tab-getrennt, Datum JJJJMMTT und Wert mit Dezimalkomma."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range(end=pd.Timestamp(end or datetime.now()).normalize(), periods=days)
+    values = np.clip(0.9 + np.cumsum(rng.normal(0, 0.02, days)) * 0.1, 0.3, 2.0)
+    return "".join(f"{date:%Y%m%d}\t{value:.2f}".replace(".", ",") + "\n"
+                   for date, value in zip(dates, values))
+
+
+# --- Lokale Attrappen für yfinance, Finviz und Telegram ---
+def _fake_yfinance(histories):
+    """Modul mit download() wie yfinance (group_by="ticker"), bedient aus `histories`."""
+    import pandas as pd
+
+    def download(symbols, start=None, **kwargs):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        start = pd.Timestamp(start) if start else None
+        frames = {}
+        for symbol in symbols:
+            data = histories.get(symbol)
+            if data is None:
+                data = histories[symbol] = synthetic_history(symbol)
+            frames[symbol] = data[data.index >= start] if start is not None else data
+        return pd.concat(frames, axis=1)
+
+    module = types.ModuleType("yfinance")
+    module.download = download
+    module.shared = types.SimpleNamespace(_ERRORS={})
+    return module
+
+
+class _FinvizResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _FinvizSession:
+    """Liefert die synthetischen Screenerseiten anhand des r=-Parameters der URL."""
+
+    def __init__(self, tickers):
+        self.tickers = tickers
+
+    def get(self, url, **kwargs):
+        offset = int(url.rpartition("&r=")[2]) if "&r=" in url else 1
+        return _FinvizResponse(synthetic_finviz_page(self.tickers, offset, len(self.tickers)))
+
+
+class _OfflineBot:
+    """Nimmt Nachrichten wie telegram.Bot entgegen, ohne sie zu verschicken."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.messages.append((chat_id, text))
+
+    async def shutdown(self):
+        pass
+
+
+def _offline_notifier():
+    from notifier import Notifier
+
+    class OfflineNotifier(Notifier):
+        async def __aenter__(self):
+            self._bot = _OfflineBot()
+            return self
+
+    # Ohne Drosselung, gemessen wird nur der eigene Aufwand (Aufteilen, Warteschlangen)
+    return OfflineNotifier("offline", coalesce_window=0, per_chat_interval=0, global_interval=0)
+
+
+@contextlib.contextmanager
+def offline(directory, histories):
+    """
+    Leitet Kursdaten-Speicher, Indikator-Zustand, HTTP-Cache und Metriken nach `directory`
+    um und ersetzt yfinance durch die Attrappe.
+    """
+    import marketdata
+    import indicatorstate
+    import httpcache
+    import metrics
+
+    saved = (marketdata.STORE_DIR, indicatorstate.STATE_DIR, httpcache.CACHE_DIR, metrics.METRICS_FILE,
+             sys.modules.get("yfinance"))
+    marketdata.STORE_DIR = directory
+    indicatorstate.STATE_DIR = os.path.join(directory, "indicators")
+    httpcache.CACHE_DIR = os.path.join(directory, "http")
+    metrics.METRICS_FILE = os.path.join(directory, "metrics.jsonl")
+    sys.modules["yfinance"] = _fake_yfinance(histories)
+    try:
+        yield
+    finally:
+        metrics.flush()
+        marketdata.STORE_DIR, indicatorstate.STATE_DIR, httpcache.CACHE_DIR, metrics.METRICS_FILE, yfinance = saved
+        if yfinance is None:
+            sys.modules.pop("yfinance", None)
+        else:
+            sys.modules["yfinance"] = yfinance
+
+
+# --- Messung ---
+def _timed(fn, repeat=1):
+    """Führt `fn` `repeat`-mal aus (Ausgaben unterdrückt), gibt (beste Zeit, Ergebnis) zurück."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        with open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_size(n, repeat=3):
+    """Misst alle Stufen für ein Universum aus `n` Symbolen und gibt {Stufe: Sekunden} zurück."""
+    import indicators
+    import indicatorstate
+    import notifier
+    import swings
+    from finviz import FinvizScraper
+    from marketdata import load_histories
+    from panel import Panel
+
+    symbols = synthetic_symbols(n)
+    histories = {symbol: synthetic_history(symbol) for symbol in symbols}
+    timings = {}
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as directory, offline(directory, histories):
+        scraper = FinvizScraper(request_interval=0, cache_ttl=0, session=_FinvizSession(symbols))
+        timings["scrape_parse"], tickers = _timed(lambda: scraper.scrape([SCREENER_URL]), repeat)
+        if tickers != symbols:
+            raise RuntimeError(f"Scraping lieferte {len(tickers)} statt {n} Ticker.")
+
+        timings["load_cold"], _ = _timed(lambda: load_histories(tickers, LOAD_PERIOD))
+        timings["load_warm"], (loaded, _) = _timed(lambda: load_histories(tickers, LOAD_PERIOD), repeat)
+        timings["build_panel"], panel = _timed(lambda: Panel.from_histories(loaded, tickers), repeat)
+
+        close, high, low = (panel.matrix(field) for field in ("Close", "High", "Low"))
+        timings["r2_scan"], _ = _timed(
+            lambda: swings.calculate_best_r2_matrix(close, min_length=100), repeat)
+        timings["indicators"], _ = _timed(
+            lambda: (indicators.rsi(close, 2), indicators.adx(high, low, close, 14),
+                     indicators.roc(close, 250)), repeat)
+
+        specs = [("rsi", 2), ("adx", 14), ("roc", 250)]
+        timings["indicator_state_cold"], _ = _timed(
+            lambda: indicatorstate.latest(panel, specs, symbols=tickers))
+        timings["indicator_state_warm"], current = _timed(
+            lambda: indicatorstate.latest(panel, specs, symbols=tickers), repeat)
+
+        rsi_values, bar_counts = current[("rsi", 2)]
+        # Filter-Pipeline einschließlich R2 für die verbliebenen Ticker
+        timings["filters"], signals = _timed(lambda: swings.filter_signals(
+            tickers, panel, rsi_values, current[("adx", 14)][0], current[("roc", 250)][0],
+            bar_counts), repeat)
+
+        # Schlimmster Fall für die Nachricht: alle Ticker in einer Liste
+        timings["message"], chunks = _timed(lambda: notifier.split_message(", ".join(tickers)), repeat)
+
+        async def notify():
+            async with _offline_notifier() as offline_notifier:
+                for chunk in chunks:
+                    offline_notifier.send("1", chunk)
+            return offline_notifier.sent
+
+        timings["notify"], sent = _timed(lambda: asyncio.run(notify()), repeat)
+        if sent != len(chunks):
+            raise RuntimeError(f"Nur {sent} von {len(chunks)} Nachrichten zugestellt.")
+
+        timings["swings_analysis"], _ = _timed(lambda: swings.run_analysis(tickers), repeat)
+    print(f"{n} Symbole: {len(signals)} Signale, {len(chunks)} Nachrichtenteile", file=sys.stderr)
+    return timings
+
+
+def bench_scripts(repeat=3):
+    """Misst build_message() der übrigen Strategien mit vorab gefülltem Kursdaten-Speicher."""
+    import httpcache
+    import runner
+    from pcr import PCR_URL, read_pcr_index
+
+    timings = {}
+    content = synthetic_pcr()
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as directory, offline(directory, {}):
+        strategies = runner.load_strategies(SCRIPT_STRATEGIES)
+        requirements = {symbol: LOAD_PERIOD for symbol in runner.collect_data_requirements(strategies)}
+        _timed(lambda: runner.prefetch(requirements))
+        # Die PCR-Datei liegt frisch im HTTP-Cache, pcr.py lädt sie ohne Netzwerkzugriff.
+        httpcache._write(PCR_URL, content.encode("utf-8"),
+                         {"url": PCR_URL, "fetched_at": time.time(), "full_fetched_at": time.time(),
+                          "encoding": "utf-8"})
+
+        timings["pcr_parse"], _ = _timed(lambda: read_pcr_index(content), repeat)
+        for strategy in strategies:
+            timings[strategy.__name__], message = _timed(strategy.build_message, repeat)
+            if not message or "Fehler" in message:
+                raise RuntimeError(f"{strategy.__name__}: unerwartete Nachricht: {message!r}")
+    return timings
+
+
+def run(sizes=SIZES, repeat=3):
+    """Führt alle Messungen aus und gibt das Ergebnis-Dict (wie in der JSON-Datei) zurück."""
+    import numpy as np
+    import pandas as pd
+    # Einmalige Importkosten sollen nicht in die erste gemessene Stufe fallen.
+    import pyarrow  # noqa: F401
+    import requests  # noqa: F401
+    import telegram.error  # noqa: F401
+
+    results = {"created": datetime.now().isoformat(timespec="seconds"),
+               "python": sys.version.split()[0], "numpy": np.__version__, "pandas": pd.__version__,
+               "cpus": os.cpu_count(), "bars": BARS, "timings": {}}
+    results["timings"]["scripts"] = bench_scripts(repeat)
+    for n in sizes:
+        results["timings"][str(n)] = bench_size(n, repeat)
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    """Vergleicht alle Stufen, die in beiden Läufen vorkommen, und gibt eine Liste von Regressionen zurück."""
+    regressions = []
+    for section, timings in results["timings"].items():
+        for stage, elapsed in timings.items():
+            previous = baseline.get("timings", {}).get(section, {}).get(stage)
+            if previous is None:
+                continue
+            if elapsed > previous * (1 + tolerance) and elapsed - previous > min_delta:
+                regressions.append(f"{section}/{stage}: {elapsed:.3f} s statt {previous:.3f} s "
+                                   f"(+{(elapsed / previous - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results, baseline=None):
+    for section, timings in results["timings"].items():
+        print(f"[{section}]")
+        for stage, elapsed in timings.items():
+            previous = (baseline or {}).get("timings", {}).get(section, {}).get(stage)
+            reference = f"  (Baseline {previous:.4f} s)" if previous is not None else ""
+            print(f"  {stage:<22}{elapsed:>10.4f} s{reference}")
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark der Pipeline-Stufen mit synthetischen Daten (offline).")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="Universumsgrößen, kommagetrennt (Standard: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen je Stufe, gewertet wird die schnellste")
+    parser.add_argument("--out", help="JSON-Datei für die Ergebnisse")
+    parser.add_argument("--baseline", help="JSON-Datei eines früheren Laufs; Regressionen beenden mit Exit-Code 1")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Ergebnisse ohne Regression als neue Baseline speichern")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="erlaubte relative Verlangsamung (Standard: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error(f"Ungültige Größen: {args.sizes}")
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline benötigt --baseline")
+
+    results = run(sizes, args.repeat)
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    if args.save_baseline and not regressions:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline gespeichert: {args.baseline}")
+    if regressions:
+        print("Langsamer als die Baseline:\n- " + "\n- ".join(regressions))
+        sys.exit(1)
+    if baseline:
+        print("Keine Regression gegenüber der Baseline.")
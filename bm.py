@@ -1,53 +1,78 @@
 import os
-import yfinance as yf
-import pandas as pd
-from ta.trend import SMAIndicator
 from datetime import datetime
 import asyncio
-from telegram import Bot
+
+import tradingcalendar
+
+# Schwere Module (pandas, numpy, telegram, marketdata) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
 
 # --- Telegram Setup ---
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Mindestanzahl ETFs über SMA(100) für ein Signal (auch Standardwert für backtest.py / sweep.py)
+MIN_ABOVE_SMA = 7
+# SMA(100) braucht 100 Handelstage; Reserve für einen verspäteten Bar
+HISTORY_PERIOD = "105b"
+# Bei einem Signal gekaufte ETFs und ihr Profit Target (siehe positions.py)
+BUY_SYMBOLS = ["CWB", "HYD", "BAB"]
+PROFIT_TARGET = 0.03
+
 
 async def send_telegram_message(text):
     """Sends a message to a Telegram chat."""
     if not TOKEN or not CHAT_ID:
         print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
         return
-    try:
-        bot = Bot(token=TOKEN)
-        await bot.send_message(chat_id=CHAT_ID, text=text)
-        print("Telegram notification sent successfully.")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+    from notifier import send_messages
+    await send_messages([(CHAT_ID, text)], token=TOKEN)
 
 
-def run_bm_strategy(symbols):
+def run_bm_strategy(symbols, provider=None):
     """Führt die Bond-Momentum-Strategie aus und gibt eine Nachricht und Fehler zurück."""
     if not symbols:
         return "FEHLER: Keine Symbole zum Analysieren gefunden.", []
 
     above_sma_count = 0
     total_symbols = len(symbols)
+    import pandas as pd
+    from providers import default_provider
+    import indicatorstate
+    import metrics
+    from panel import Panel
+
+    provider = provider or default_provider()
+
     errors = []
 
-    for symbol in symbols:
+    # Lade Daten für alle Symbole in einer Anfrage (SMA(100) + Puffer)
+    histories, load_errors = provider.load_histories(symbols, period=HISTORY_PERIOD)
+    panel = Panel.from_histories(histories, symbols)
+    del histories
+    sma_values, _ = indicatorstate.latest(
+        panel, [("sma", 100)], symbols=symbols, persist=provider.persistent)[("sma", 100)]
+    bar_counts = panel.counts()
+    last_closes = panel.last()
+
+    for i, symbol in enumerate(symbols):
         try:
-            # Lade Daten. 6 Monate sind ausreichend für SMA(100) + Puffer.
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period="6mo", auto_adjust=True)
+            if symbol in load_errors:
+                errors.append(
+                    f"FEHLER beim Laden der Daten für {symbol}: {load_errors[symbol]}")
+                continue
 
-            if len(data) < 100:
+            row = panel.index[symbol]
+
+            if bar_counts[row] < 100:
+                metrics.count("bm.skipped_short_history")
                 errors.append(
-                    f"Nicht genügend historische Daten für {symbol} (braucht 100, hat {len(data)}).")
+                    f"Nicht genügend historische Daten für {symbol} (braucht 100, hat {bar_counts[row]}).")
                 continue
 
             # Berechne SMA(100)
-            last_close = data['Close'].iloc[-1]
-            sma_100 = SMAIndicator(
-                close=data['Close'], window=100).sma_indicator().iloc[-1]
+            last_close = last_closes[row]
+            sma_100 = sma_values[i]
 
             if pd.isna(sma_100):
                 errors.append(
@@ -67,12 +92,15 @@ def run_bm_strategy(symbols):
 
     message_lines = []
 
-    if above_sma_count >= 7:
-        signal_line = "✅ 'LBM' Signal: BUY CWB+HYD+BAB, PT 3%"
-        condition_line = "Signal-Bedingung (>= 7) erfüllt."
+    if above_sma_count >= MIN_ABOVE_SMA:
+        if provider.persistent:
+            import positions
+            positions.record("LBM", BUY_SYMBOLS, pd.Timestamp(panel.dates[-1]), PROFIT_TARGET)
+        signal_line = f"✅ 'LBM' Signal: BUY {'+'.join(BUY_SYMBOLS)}, PT {PROFIT_TARGET:.0%}"
+        condition_line = f"Signal-Bedingung (>= {MIN_ABOVE_SMA}) erfüllt."
     else:
         signal_line = "❌ Kein 'LBM' Signal:"
-        condition_line = "- Bedingung (>= 7) nicht erfüllt."
+        condition_line = f"- Bedingung (>= {MIN_ABOVE_SMA}) nicht erfüllt."
 
     message_lines.append(signal_line)
     message_lines.append("-" * 20)
@@ -84,34 +112,51 @@ def run_bm_strategy(symbols):
     return "\n".join(message_lines), errors
 
 
+# Hardcoded list of bond ETF symbols as per previous request
+BM_SYMBOLS = [
+    "BAB", "CWB", "EMB", "HYD", "IEF", "JNK",
+    "LQD", "MUB", "PCY", "PICB", "TIP", "TLT"
+]
+
+# --- Runner-Plugin (siehe runner.py) ---
+DATA_REQUIREMENTS = {symbol: HISTORY_PERIOD for symbol in BM_SYMBOLS}
+
+
+def is_due(today):
+    """
+    Die Bond-Momentum-Strategie wird am letzten Handelstag der Woche ausgeführt (meist
+    Freitag, vor einem Feiertag am Freitag der Donnerstag).
+    """
+    return tradingcalendar.is_last_session_of_week(today)
+
+
+def build_message(provider=None):
+    """Führt die Bond-Momentum-Strategie aus und gibt die finale Nachricht zurück."""
+    message, errors = run_bm_strategy(BM_SYMBOLS, provider)
+
+    # Finale Nachricht erstellen
+    final_message = ""
+    if errors:
+        error_header = "Das Skript 'bm.py' wurde mit Fehlern ausgeführt:"
+        error_messages = "\n- ".join(errors)
+        final_message = f"{error_header}\n- {error_messages}"
+        if message:
+            final_message += "\n\nZusätzliche Informationen:\n" + message
+    elif message:
+        final_message = message
+    else:
+        final_message = "Unbekannter Zustand in 'bm.py': Weder Erfolgs- noch Fehlermeldung generiert."
+
+    return final_message
+
+
 # --- Hauptlogik ---
 if __name__ == "__main__":
     today = datetime.now()
-    # weekday() gibt für Freitag 4 zurück (Montag=0, ..., Sonntag=6)
-    if today.weekday() != 4:
+    if not is_due(today):
         print(
-            f"Heute ist kein Freitag ({today.strftime('%A')}). Skript 'bm.py' wird nicht ausgeführt.")
+            f"Heute ({today.strftime('%A')}) ist nicht der letzte Handelstag der Woche. Skript 'bm.py' wird nicht ausgeführt.")
     else:
-        # Hardcoded list of bond ETF symbols as per previous request
-        symbols = [
-            "BAB", "CWB", "EMB", "HYD", "IEF", "JNK",
-            "LQD", "MUB", "PCY", "PICB", "TIP", "TLT"
-        ]
-
-        message, errors = run_bm_strategy(symbols)
-
-        # Finale Nachricht erstellen und senden
-        final_message = ""
-        if errors:
-            error_header = "Das Skript 'bm.py' wurde mit Fehlern ausgeführt:"
-            error_messages = "\n- ".join(errors)
-            final_message = f"{error_header}\n- {error_messages}"
-            if message:
-                final_message += "\n\nZusätzliche Informationen:\n" + message
-        elif message:
-            final_message = message
-        else:
-            final_message = "Unbekannter Zustand in 'bm.py': Weder Erfolgs- noch Fehlermeldung generiert."
-
+        final_message = build_message()
         print(final_message)
         asyncio.run(send_telegram_message(final_message))
@@ -1,16 +1,18 @@
 import os
-import re
-import yfinance as yf
-import pandas as pd
-from ta.trend import SMAIndicator
 from datetime import datetime
 import asyncio
-from telegram import Bot
+
+# Schwere Module (pandas, numpy, telegram, marketdata) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
 
 # --- Telegram Setup ---
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Mindestanzahl ETFs über SMA(100) für ein Signal und Handelstage, wie in bm.py
+MIN_ABOVE_SMA = 7
+HISTORY_PERIOD = "105b"
+
 # Hardcoded list of bond ETF symbols as per bm.py
 BM_SYMBOLS = [
     "BAB", "CWB", "EMB", "HYD", "IEF", "JNK",
@@ -18,30 +20,50 @@ BM_SYMBOLS = [
 ]
 
 
-def run_bm_strategy(symbols):
+def run_bm_strategy(symbols, provider=None):
     """Führt die Bond-Momentum-Strategie aus und gibt die Strategieergebnisse zurück."""
     if not symbols:
         return False, 0, 0, ["FEHLER: Keine Symbole zum Analysieren gefunden."]
 
     above_sma_count = 0
     total_symbols = len(symbols)
+    import pandas as pd
+    from providers import default_provider
+    import indicatorstate
+    import metrics
+    from panel import Panel
+
+    provider = provider or default_provider()
+
     errors = []
 
-    for symbol in symbols:
+    # Lade Daten für alle Symbole in einer Anfrage (SMA(100) + Puffer)
+    histories, load_errors = provider.load_histories(symbols, period=HISTORY_PERIOD)
+    panel = Panel.from_histories(histories, symbols)
+    del histories
+    sma_values, _ = indicatorstate.latest(
+        panel, [("sma", 100)], symbols=symbols, persist=provider.persistent)[("sma", 100)]
+    bar_counts = panel.counts()
+    last_closes = panel.last()
+
+    for i, symbol in enumerate(symbols):
         try:
-            # Lade Daten. 6 Monate sind ausreichend für SMA(100) + Puffer.
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period="6mo", auto_adjust=True)
+            if symbol in load_errors:
+                errors.append(
+                    f"FEHLER beim Laden der Daten für {symbol}: {load_errors[symbol]}")
+                continue
+
+            row = panel.index[symbol]
 
-            if len(data) < 100:
+            if bar_counts[row] < 100:
+                metrics.count("bm_pt.skipped_short_history")
                 errors.append(
-                    f"Nicht genügend historische Daten für {symbol} (braucht 100, hat {len(data)}).")
+                    f"Nicht genügend historische Daten für {symbol} (braucht 100, hat {bar_counts[row]}).")
                 continue
 
             # Berechne SMA(100)
-            last_close = data['Close'].iloc[-1]
-            sma_100 = SMAIndicator(
-                close=data['Close'], window=100).sma_indicator().iloc[-1]
+            last_close = last_closes[row]
+            sma_100 = sma_values[i]
 
             if pd.isna(sma_100):
                 errors.append(
@@ -55,7 +77,7 @@ def run_bm_strategy(symbols):
         except Exception as e:
             errors.append(f"FEHLER bei der Analyse von {symbol}: {e}")
 
-    is_buy_signal = (above_sma_count >= 7)
+    is_buy_signal = (above_sma_count >= MIN_ABOVE_SMA)
     return is_buy_signal, above_sma_count, total_symbols, errors
 
 
@@ -64,22 +86,20 @@ async def send_telegram_message(text):
     if not TOKEN or not CHAT_ID:
         print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
         return
-    try:
-        bot = Bot(token=TOKEN)
-        # Use Markdown for bold text
-        await bot.send_message(chat_id=CHAT_ID, text=text, parse_mode='Markdown')
-        print("Telegram notification sent successfully.")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+    from notifier import send_messages
+    # Use Markdown for bold text
+    await send_messages([(CHAT_ID, text, 'Markdown')], token=TOKEN)
 
 
-def get_closing_price_and_pt(symbol, pt_percentage=0.03):
+def get_closing_price_and_pt(symbol, pt_percentage=0.03, provider=None):
     """Fetches the latest closing price and calculates the profit target."""
+    from providers import default_provider
+
+    provider = provider or default_provider()
     try:
-        ticker = yf.Ticker(symbol)
-        # Fetch data for a slightly longer period to ensure we get a close price,
-        # sometimes "1d" can return empty if there's no trading on the current day or API issues.
-        data = ticker.history(period="5d", auto_adjust=True)
+        # Fetch the last few sessions to ensure we get a close price,
+        # sometimes "1b" can return empty if the latest bar is not available yet or API issues.
+        data = provider.load_history(symbol, period="5b")
 
         if not data.empty:
             last_close = data['Close'].iloc[-1]
@@ -93,10 +113,26 @@ def get_closing_price_and_pt(symbol, pt_percentage=0.03):
         return None, None
 
 
-async def main():
+# --- Runner-Plugin (siehe runner.py) ---
+# As per bm.py's logic, if a buy signal is generated, these are the target symbols
+PT_SYMBOLS = ["CWB", "HYD", "BAB"]
+DATA_REQUIREMENTS = {symbol: HISTORY_PERIOD for symbol in BM_SYMBOLS}
+PARSE_MODE = 'Markdown'
+
+
+def is_due(today):
+    """Die Profit Targets werden samstags nach dem Freitags-Signal berechnet."""
+    return today.weekday() == 5
+
+
+def build_message(provider=None):
+    """Gibt die Profit-Target-Nachricht zurück, oder None wenn kein Kaufsignal vorliegt."""
+    from providers import default_provider
+
+    provider = provider or default_provider()
     # Run the Bond Momentum strategy
     is_buy_signal, above_sma_count, total_symbols, bm_strategy_errors = run_bm_strategy(
-        BM_SYMBOLS)
+        BM_SYMBOLS, provider)
 
     # Only proceed to prepare and send a message if there is a BUY signal
     if is_buy_signal:
@@ -109,14 +145,11 @@ async def main():
             telegram_output_lines.append(
                 f"{error_header}\n- {error_messages}\n")
 
-        # As per bm.py's logic, if a buy signal is generated, these are the target symbols
-        target_symbols_for_pt = ["CWB", "HYD", "BAB"]
-
         telegram_output_lines.append("📈 **'LBM' Profit Target Calculation**")
         telegram_output_lines.append("")
 
-        for symbol in target_symbols_for_pt:
-            close_price, pt_price = get_closing_price_and_pt(symbol)
+        for symbol in PT_SYMBOLS:
+            close_price, pt_price = get_closing_price_and_pt(symbol, provider=provider)
             if close_price is not None and pt_price is not None:
                 telegram_output_lines.append(
                     f"**{symbol}**: Close: {close_price:.2f}, PT 3%: {pt_price:.2f}")
@@ -124,8 +157,17 @@ async def main():
                 telegram_output_lines.append(
                     f"**{symbol}**: Konnte keine Daten abrufen oder PT berechnen.")
 
-        # Send the message since a BUY signal was present
-        final_telegram_message = "\n".join(telegram_output_lines)
+        return "\n".join(telegram_output_lines)
+
+    # No BUY signal, and user requested to be silent
+    return None
+
+
+async def main():
+    final_telegram_message = build_message()
+
+    # Only send a message if there is a BUY signal
+    if final_telegram_message:
         print("\n--- Telegram Message Content ---")
         print(final_telegram_message)
         print("----------------------------\n")
@@ -0,0 +1,66 @@
+import sys
+import subprocess
+
+# Import-Budget je Skript in Millisekunden (kumulativ laut "python -X importtime").
+# Die Skripte dürfen beim Import nur die Standardbibliothek laden, damit die
+# Kalenderprüfung vor pandas, numpy, yfinance und telegram läuft.
+IMPORT_BUDGET_MS = {
+    "tt": 100,
+    "npm": 100,
+    "pcr": 100,
+    "bm": 100,
+    "bm_pt": 100,
+    "tom": 100,
+    "swings": 100,
+    "positions": 100,
+    "runner": 100,
+    "daemon": 100,
+}
+
+# Diese Module dürfen beim Import eines Skripts nicht geladen werden.
+HEAVY_MODULES = ["pandas", "numpy", "yfinance", "ta", "telegram", "requests", "bs4"]
+
+
+def measure_import(module):
+    """
+    Importiert ein Modul in einem frischen Interpreter mit -X importtime und gibt
+    (kumulative Importzeit in ms, Menge der dabei geladenen Top-Level-Module) zurück.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True)
+
+    cumulative_us = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(cumulative.strip())
+    return cumulative_us / 1000, loaded
+
+
+def check_import_budget(budget=None):
+    """Prüft alle Skripte gegen ihr Import-Budget und gibt eine Liste von Verstößen zurück."""
+    violations = []
+    for module, budget_ms in (budget or IMPORT_BUDGET_MS).items():
+        elapsed_ms, loaded = measure_import(module)
+        heavy = sorted(loaded.intersection(HEAVY_MODULES))
+        print(f"{module}: {elapsed_ms:.1f} ms (Budget {budget_ms} ms)")
+        if elapsed_ms > budget_ms:
+            violations.append(f"{module}: Import dauert {elapsed_ms:.1f} ms, Budget {budget_ms} ms")
+        if heavy:
+            violations.append(f"{module}: lädt beim Import {', '.join(heavy)}")
+    return violations
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    violations = check_import_budget()
+    if violations:
+        print("Import-Budget überschritten:\n- " + "\n- ".join(violations))
+        sys.exit(1)
+    print("Alle Skripte innerhalb des Import-Budgets.")
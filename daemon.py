@@ -0,0 +1,255 @@
+import os
+import sys
+import asyncio
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+
+import metrics
+import runner
+from providers import Provider
+
+# pandas und die Strategien werden erst nach dem Start importiert (siehe runner.py).
+
+# --- Daemon-Modus ---
+# Statt eines Cron-Kaltstarts je Strategie hält der Daemon Interpreter, Importe, Kursdaten
+# und die Telegram-Sitzung warm. Die Historien der fälligen Strategien werden einmal
+# geladen; danach fragt der Daemon alle POLL_INTERVAL Sekunden nur die letzten Bars der
+# benötigten Symbole ab (eine Anfrage für alle), ergänzt damit die Historien im Speicher
+# und wertet nur die Strategien neu aus, deren Symbole sich geändert haben.
+#
+# Die erste Auswertung einer Strategie am Tag wird verschickt (wie beim Cron-Lauf),
+# danach nur noch, wenn sich die Signalzeile (erste Zeile der Nachricht) ändert.
+# Strategien mit stream() (swings, ganzes Universum) bleiben Cron-Jobs.
+#
+# Der Daemon schreibt keinen Zustand: Die Bars des laufenden Tages sind vorläufig, daher
+# werden weder der Indikator-Zustand fortgeschrieben noch Kaufsignale (LTT, LNPM, LBM) als
+# offene Positionen eingetragen (siehe positions.py), und der Prüflauf der Positionen
+# läuft nicht im Daemon. Einträge und Exit-Signale kommen aus dem Cron-Lauf nach
+# Handelsschluss (runner.py mit dem dauerhaften Provider), der daher neben dem Daemon
+# weiterlaufen muss.
+#
+# Offline testbar mit ReplayClock und einem ReplayProvider ohne Stichtag (tests/test_daemon.py).
+#
+#   python daemon.py                                   (alle Strategien, Live-Daten)
+#   python daemon.py tt npm --interval 60
+#   python daemon.py --replay DIR --start 2026-09-01 --end 2026-09-30 --interval 3600
+
+POLL_INTERVAL = float(os.getenv("DAEMON_POLL_INTERVAL", "300"))
+# Kalendertage, die jede Abfrage rückwirkend lädt; deckt Wochenenden und Feiertage ab,
+# sodass nach einer Pause auch die endgültigen Bars der Vortage übernommen werden.
+QUOTE_LOOKBACK_DAYS = 7
+
+
+class SystemClock:
+    """Echte Zeit."""
+
+    def now(self):
+        return datetime.now()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class ReplayClock:
+    """Simulierte Zeit für Offline-Läufe: sleep() stellt die Uhr sofort vor."""
+
+    def __init__(self, start):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    async def sleep(self, seconds):
+        self.time += timedelta(seconds=seconds)
+        await asyncio.sleep(0)
+
+
+def _until_today(data, clock):
+    """Bars bis einschließlich zum aktuellen Tag der Uhr (bei Live-Daten ohne Wirkung)."""
+    import pandas as pd
+
+    return data[data.index <= pd.Timestamp(clock.now()).normalize()]
+
+
+class QuoteFeed:
+    """
+    Letzte Bars aller Symbole von `provider` in einer Anfrage. Bars nach dem aktuellen Tag
+    der Uhr werden ignoriert; mit einem ReplayProvider ohne Stichtag und einer ReplayClock
+    entsteht so ein Kursstrom aus lokalen Daten.
+    """
+
+    def __init__(self, provider, clock):
+        self.provider = provider
+        self.clock = clock
+
+    def poll(self, symbols):
+        """Gibt (Symbol -> Bars der letzten QUOTE_LOOKBACK_DAYS Tage, errors) zurück."""
+        import pandas as pd
+
+        start = pd.Timestamp(self.clock.now()).normalize() - pd.Timedelta(days=QUOTE_LOOKBACK_DAYS)
+        histories, errors = self.provider.fetch(symbols, start)
+        return {symbol: _until_today(data, self.clock) for symbol, data in histories.items()}, errors
+
+
+class WarmProvider(Provider):
+    """
+    Hält die Historien im Speicher und bedient die Strategien daraus. Fehlende Symbole
+    (oder ein längerer Zeitraum) werden bei `provider` nachgeladen, update() übernimmt
+    neue Bars aus dem QuoteFeed. Der Indikator-Zustand wird nicht fortgeschrieben, da der
+    Bar des laufenden Tages vorläufig ist.
+    """
+
+    persistent = False
+
+    def __init__(self, provider, clock):
+        self.provider = provider
+        self.clock = clock
+        self.histories = {}
+        self._starts = {}
+
+    def now(self):
+        return self.clock.now()
+
+    def fetch(self, symbols, start):
+        missing = [symbol for symbol in symbols
+                   if symbol not in self._starts or start < self._starts[symbol]]
+        errors = {}
+        if missing:
+            with metrics.stage("daemon.load", symbols=len(missing)):
+                histories, errors = self.provider.fetch(missing, start)
+            for symbol, data in histories.items():
+                self.histories[symbol] = _until_today(data, self.clock)
+                self._starts[symbol] = start
+        histories = {symbol: self.histories[symbol][self.histories[symbol].index >= start]
+                     for symbol in symbols if symbol in self.histories}
+        return histories, errors
+
+    def get_text(self, url, ttl=0, append_only=False):
+        from providers import lines_until
+
+        text = self.provider.get_text(url, ttl=ttl, append_only=append_only)
+        return "".join(lines_until(text.splitlines(keepends=True), self.clock.now()))
+
+    def screener_tickers(self, urls):
+        return self.provider.screener_tickers(urls)
+
+    def update(self, bars):
+        """
+        Übernimmt Bars aus QuoteFeed.poll(): Bars ab dem letzten bekannten Tag ersetzen bzw.
+        ergänzen die Historie. Gibt die Symbole zurück, deren Historie sich geändert hat.
+        """
+        import numpy as np
+        import pandas as pd
+
+        changed = []
+        for symbol, recent in bars.items():
+            data = self.histories.get(symbol)
+            if data is None or data.empty or recent.empty:
+                continue
+            recent = recent[recent.index >= data.index[-1]].reindex(columns=data.columns)
+            if recent.empty:
+                continue
+            tail = data[data.index >= recent.index[0]]
+            if tail.index.equals(recent.index) and np.array_equal(
+                    tail.to_numpy(), recent.to_numpy(), equal_nan=True):
+                continue
+            self.histories[symbol] = pd.concat([data[data.index < recent.index[0]], recent])
+            changed.append(symbol)
+        return changed
+
+
+async def run_daemon(names=None, provider=None, clock=None, interval=None, until=None):
+    """
+    Pollt die Kurse der fälligen Strategien und wertet sie bei Änderungen neu aus, bis
+    die Uhr `until` erreicht (ohne `until` unbegrenzt). Standard ist der Provider des
+    Normalbetriebs mit echter Zeit und POLL_INTERVAL.
+    """
+    from providers import default_provider
+
+    clock = clock or SystemClock()
+    interval = POLL_INTERVAL if interval is None else interval
+    warm = WarmProvider(provider or default_provider(), clock)
+    feed = QuoteFeed(warm.provider, clock)
+    strategies = [strategy for strategy in runner.load_strategies(names)
+                  if strategy.DATA_REQUIREMENTS and not hasattr(strategy, "stream")]
+    print(f"Daemon gestartet: {', '.join(strategy.__name__ for strategy in strategies)}, "
+          f"Abfrage alle {interval:g} s.", file=sys.stderr)
+
+    loop = asyncio.get_running_loop()
+    async with contextlib.AsyncExitStack() as stack:
+        notifier = await runner.open_notifier(stack)
+        day = None
+        signals = {}
+
+        def notify(strategy, message):
+            signal = message.split("\n", 1)[0]
+            if signals.get(strategy.__name__) == signal:
+                print(f"{strategy.__name__}: unverändert ({signal})", file=sys.stderr)
+                return
+            signals[strategy.__name__] = signal
+            runner.deliver(strategy, message, notifier)
+
+        while until is None or clock.now() < until:
+            today = clock.now()
+            if today.date() != day:
+                day = today.date()
+                signals.clear()
+                evaluated = set()
+                due = [strategy for strategy in strategies if strategy.is_due(today)]
+                print(f"{today.strftime('%A, %d.%m.%Y')}: fällig "
+                      f"{', '.join(strategy.__name__ for strategy in due) or 'keine Strategie'}.", file=sys.stderr)
+
+            if due:
+                try:
+                    requirements = runner.collect_data_requirements(due)
+                    with metrics.stage("daemon.poll", symbols=len(requirements)):
+                        for period in set(requirements.values()):
+                            symbols = [symbol for symbol in requirements if requirements[symbol] == period]
+                            await loop.run_in_executor(None, warm.load_histories, symbols, period)
+                        bars, errors = await loop.run_in_executor(None, feed.poll, list(requirements))
+                    for symbol, error in errors.items():
+                        print(f"Keine Kurse für {symbol}: {error}", file=sys.stderr)
+                    changed = set(warm.update(bars))
+                    metrics.count("daemon.polls")
+                except Exception as e:
+                    metrics.count("daemon.poll_failed")
+                    print(f"FEHLER bei der Kursabfrage: {e}", file=sys.stderr)
+                    changed = set()
+
+                for strategy in due:
+                    if strategy.__name__ in evaluated and not changed & set(strategy.DATA_REQUIREMENTS):
+                        continue
+                    evaluated.add(strategy.__name__)
+                    metrics.count("daemon.evaluations")
+                    await runner.run_strategy(strategy, warm, loop,
+                                              lambda text, s=strategy: notify(s, text))
+
+            await clock.sleep(interval)
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pollt die Kurse der fälligen Strategien und meldet Signale sofort.")
+    parser.add_argument("strategies", nargs="*", help="Strategien (Standard: alle außer swings)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                        help="Sekunden zwischen zwei Abfragen (Standard: %(default)s)")
+    parser.add_argument("--replay", help="Offline-Lauf auf lokalen Daten (siehe providers.ReplayProvider)")
+    parser.add_argument("--start", help="Beginn der simulierten Zeit bei --replay (JJJJ-MM-TT)")
+    parser.add_argument("--end", help="Ende der simulierten Zeit bei --replay (JJJJ-MM-TT, einschließlich)")
+    args = parser.parse_args()
+
+    provider = clock = until = None
+    if args.replay:
+        from providers import ReplayProvider
+
+        if not args.start or not args.end:
+            parser.error("--replay benötigt --start und --end")
+        provider = ReplayProvider(args.replay)
+        clock = ReplayClock(datetime.fromisoformat(args.start))
+        until = datetime.fromisoformat(args.end) + timedelta(days=1)
+
+    try:
+        asyncio.run(run_daemon(args.strategies or None, provider, clock, args.interval, until))
+    except KeyboardInterrupt:
+        print("Daemon beendet.", file=sys.stderr)
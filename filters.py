@@ -0,0 +1,104 @@
+import numpy as np
+
+import metrics
+
+# --- Deklarative Filter-Pipeline ---
+# Die Signalbedingungen einer Strategie werden als Liste von Prädikaten beschrieben, die
+# jeweils für alle noch verbliebenen Symbole auf einmal ausgewertet werden. Jedes Prädikat
+# nennt seine geschätzten Kosten je Symbol und den erwarteten Anteil der Symbole, der es
+# besteht. Die Pipeline wertet zuerst die Prüfungen mit Fehlermeldung (fehlende Daten) in
+# der angegebenen Reihenfolge aus, danach die übrigen Filter nach Kosten je eliminiertem
+# Symbol: billige und trennscharfe Bedingungen zuerst, teure (R2) nur für die wenigen
+# verbliebenen Symbole. Prüfungen mit `late=True` laufen erst nach allen Filtern und
+# melden Fehler daher nur für Symbole, die die Filter bestanden haben.
+#
+# Die Signale hängen nicht von der Reihenfolge ab, nur der Aufwand.
+
+
+class Predicate:
+    """
+    Eine Bedingung der Pipeline.
+
+    - test(data, rows): bool-Array für die Symbole an den Positionen `rows`
+    - cost: geschätzter Aufwand je Symbol (relativ, 1 = Vergleich eines Wertes)
+    - selectivity: erwarteter Anteil der Symbole, der die Bedingung erfüllt
+    - error(data, i, symbol): optionale Fehlermeldung für eliminierte Symbole; solche
+      Prüfungen laufen vor allen anderen Filtern
+    - late: Prüfung mit Fehlermeldung erst nach allen Filtern auswerten
+    """
+
+    def __init__(self, name, test, cost=1.0, selectivity=0.5, error=None, late=False):
+        self.name = name
+        self.test = test
+        self.cost = cost
+        self.selectivity = selectivity
+        self.error = error
+        self.late = late
+
+    @property
+    def rank(self):
+        """Erwartete Kosten je eliminiertem Symbol."""
+        return self.cost / max(1.0 - self.selectivity, 1e-9)
+
+
+class Rank:
+    """Sortiert die verbliebenen Symbole nach key(data, rows) und behält die besten `top`."""
+
+    def __init__(self, key, top=None, descending=True):
+        self.key = key
+        self.top = top
+        self.descending = descending
+
+
+class Pipeline:
+    """Prädikate (siehe Predicate) und optional eine abschließende Rangfolge (Rank)."""
+
+    def __init__(self, name, predicates, rank=None):
+        self.name = name
+        self.predicates = list(predicates)
+        self.rank = rank
+
+    def order(self):
+        """Auswertungsreihenfolge: Prüfungen mit Fehlermeldung, Filter nach Rang, späte Prüfungen."""
+        checks = [predicate for predicate in self.predicates if predicate.error and not predicate.late]
+        filters = [predicate for predicate in self.predicates if not predicate.error]
+        late = [predicate for predicate in self.predicates if predicate.error and predicate.late]
+        return checks + sorted(filters, key=lambda predicate: predicate.rank) + late
+
+    def run(self, symbols, data):
+        """
+        Wertet die Pipeline für `symbols` aus; `data` wird unverändert an die Prädikate
+        übergeben (z.B. ein Dict mit Arrays in der Reihenfolge von `symbols`).
+
+        Gibt (survivors, eliminated, errors) zurück: Positionen der verbliebenen Symbole
+        (in Symbolreihenfolge bzw. nach Rank sortiert), die Anzahl eliminierter Symbole
+        je Prädikat in Auswertungsreihenfolge und Fehlermeldungen in Symbolreihenfolge.
+        """
+        alive = np.arange(len(symbols))
+        eliminated = {}
+        errors = {}
+        for predicate in self.order():
+            passed = np.asarray(predicate.test(data, alive), dtype=bool) if len(alive) \
+                else np.zeros(0, dtype=bool)
+            dropped = alive[~passed]
+            if predicate.error:
+                errors.update({i: predicate.error(data, i, symbols[i]) for i in dropped})
+            eliminated[predicate.name] = len(dropped)
+            metrics.count(f"{self.name}.filter.{predicate.name}", len(dropped))
+            alive = alive[passed]
+
+        if self.rank is not None and len(alive):
+            keys = np.asarray(self.rank.key(data, alive), dtype=np.float64)
+            # Stabil, damit gleiche Werte die Symbolreihenfolge behalten (wie list.sort)
+            alive = alive[np.argsort(-keys if self.rank.descending else keys, kind="stable")]
+            alive = alive[:self.rank.top]
+        return alive, eliminated, [errors[i] for i in sorted(errors)]
+
+    def describe(self, total, eliminated):
+        """Zeilen für das Log: wie viele Symbole jede Stufe eliminiert hat."""
+        lines = []
+        remaining = total
+        for name, dropped in eliminated.items():
+            lines.append(f"{self.name}: {name:<12} {remaining:>6} -> {remaining - dropped:>6} (-{dropped})")
+            remaining -= dropped
+        return lines
@@ -0,0 +1,220 @@
+import os
+import re
+import sys
+import time
+import threading
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import resilience
+
+# URL for all-time high scan
+ALL_TIME_HIGH_URL = "https://finviz.com/screener.ashx?v=411&f=cap_midover,ipodate_more5,sh_avgvol_o300,sh_opt_option,ta_alltime_b0to10h&ft=4"
+SCREENER_URLS = {
+    "mid_cap": ALL_TIME_HIGH_URL,
+}
+
+# Finviz requires a User-Agent header
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Höflichkeit gegenüber Finviz: begrenzte Parallelität und Mindestabstand zwischen Anfragen.
+MAX_WORKERS = 4
+REQUEST_INTERVAL = 0.5
+REQUEST_TIMEOUT = 20
+# Screener-Seiten werden so lange (Sekunden) aus dem HTTP-Cache bedient; 0 schaltet den Cache ab.
+CACHE_TTL = int(os.getenv("FINVIZ_CACHE_TTL", "10800"))
+
+TOTAL_COUNT_PATTERN = re.compile(
+    r"Total:?\s*(?:</b>\s*)?(\d[\d,]*)|/\s*(\d[\d,]*)\s*Total", re.IGNORECASE)
+QUOTE_LINK_PATTERN = re.compile(r"quote\.ashx\?t=([^&'\"]+)")
+
+
+class FinvizTickerParser(HTMLParser):
+    """
+    Streaming-Parser, der nur die Ticker-Links ('a.screener-link-primary') auswertet.
+    Für Seiten mit anderer Struktur werden zusätzlich die onclick-Links der
+    'span'-Elemente in 'td.screener_tickers' gesammelt.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tickers = []
+        self.fallback_tickers = []
+        self._in_ticker_link = False
+        self._text = []
+        # Verschachtelungstiefe der td-Elemente innerhalb von 'td.screener_tickers' (0 = außerhalb)
+        self._ticker_cell_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            classes = (dict(attrs).get("class") or "").split()
+            if "screener-link-primary" in classes:
+                self._in_ticker_link = True
+                self._text = []
+        elif tag == "td":
+            if self._ticker_cell_depth:
+                self._ticker_cell_depth += 1
+            elif "screener_tickers" in (dict(attrs).get("class") or "").split():
+                self._ticker_cell_depth = 1
+        elif tag == "span" and self._ticker_cell_depth:
+            match = QUOTE_LINK_PATTERN.search(dict(attrs).get("onclick") or "")
+            if match:
+                self.fallback_tickers.append(match.group(1))
+
+    def handle_data(self, data):
+        if self._in_ticker_link:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self._ticker_cell_depth:
+            self._ticker_cell_depth -= 1
+        elif tag == "a" and self._in_ticker_link:
+            self._in_ticker_link = False
+            ticker = "".join(self._text).strip()
+            if ticker:
+                self.tickers.append(ticker)
+
+
+def parse_tickers(html):
+    """Extrahiert die Ticker einer Screener-Seite in Seitenreihenfolge."""
+    parser = FinvizTickerParser()
+    parser.feed(html)
+    parser.close()
+    return parser.tickers or parser.fallback_tickers
+
+
+def parse_total_count(html):
+    """Liest die Gesamtzahl der Treffer ('Total: 1234' bzw. '#1 / 1234 Total'), sonst None."""
+    match = TOTAL_COUNT_PATTERN.search(html)
+    if not match:
+        return None
+    return int((match.group(1) or match.group(2)).replace(",", ""))
+
+
+def page_url(url, offset):
+    """Gibt die URL der Seite zurück, die bei Treffer Nummer `offset` (1-basiert) beginnt."""
+    url = re.sub(r"&r=\d+", "", url)
+    return url if offset <= 1 else f"{url}&r={offset}"
+
+
+class _Throttle:
+    """Hält einen Mindestabstand zwischen den Anfragen aller Threads ein."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            delay = self._next_slot - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_slot = time.monotonic() + self.interval
+
+
+class _ThrottledSession:
+    """Leitet Anfragen (auch die des HTTP-Caches) über die gedrosselte Session des Scrapers."""
+
+    def __init__(self, scraper):
+        self._scraper = scraper
+
+    def get(self, url, **kwargs):
+        self._scraper._throttle.wait()
+        return self._scraper.session.get(url, **kwargs)
+
+
+class FinvizScraper:
+    """
+    Lädt alle Seiten einer oder mehrerer Screener-URLs. Die erste Seite liefert die
+    Gesamtzahl und die Seitengröße, die restlichen Seiten werden parallel über einen
+    gemeinsamen Verbindungspool geladen.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, request_interval=REQUEST_INTERVAL,
+                 timeout=REQUEST_TIMEOUT, cache_ttl=CACHE_TTL, session=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._throttle = _Throttle(request_interval)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+        self.session = session
+
+    def fetch(self, url):
+        import httpcache
+
+        metrics.count("finviz.pages")
+        if self.cache_ttl > 0:
+            return httpcache.get_text(url, ttl=self.cache_ttl, session=_ThrottledSession(self),
+                                      timeout=self.timeout)
+        response = resilience.get(_ThrottledSession(self), url, self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def iter_screener(self, url, executor):
+        """Gibt die Ticker einer Screener-URL seitenweise zurück, sobald eine Seite geparst ist."""
+        first_page = self.fetch(url)
+        tickers = parse_tickers(first_page)
+        yield tickers
+        total = parse_total_count(first_page)
+        page_size = len(tickers)
+        if not total or not page_size or total <= page_size:
+            return
+
+        offsets = range(1 + page_size, total + 1, page_size)
+        print(
+            f"{total} Treffer, lade {len(offsets)} weitere Seite(n) mit je {page_size} Tickern...", file=sys.stderr)
+        futures = [executor.submit(self.fetch, page_url(url, offset)) for offset in offsets]
+        for offset, future in zip(offsets, futures):
+            try:
+                page = parse_tickers(future.result())
+            except Exception as e:
+                print(f"Fehler beim Abrufen der Finviz-Seite ab Treffer {offset}: {e}", file=sys.stderr)
+                continue
+            yield page
+
+    def scrape_screener(self, url, executor):
+        """Gibt alle Ticker einer Screener-URL über alle Seiten zurück."""
+        return [ticker for page in self.iter_screener(url, executor) for ticker in page]
+
+    def iter_tickers(self, urls):
+        """
+        Wie scrape(), gibt aber die neuen Ticker jeder Seite zurück, sobald sie geparst
+        ist, damit nachfolgende Stufen nicht auf die letzte Seite warten müssen.
+        """
+        import requests
+
+        seen = set()
+        with metrics.stage("finviz.scrape"), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for url in urls:
+                try:
+                    for page in self.iter_screener(url, executor):
+                        new = [ticker for ticker in dict.fromkeys(page) if ticker not in seen]
+                        seen.update(new)
+                        if new:
+                            yield new
+                except (requests.exceptions.RequestException, resilience.SourceUnavailable) as e:
+                    print(f"Fehler beim Abrufen der Finviz-URL: {e}", file=sys.stderr)
+        metrics.count("finviz.tickers", len(seen))
+
+    def scrape(self, urls):
+        """Gibt die eindeutigen Ticker aller Screener-URLs in Fundreihenfolge zurück."""
+        return [ticker for page in self.iter_tickers(urls) for ticker in page]
+
+
+def resolve_screener_urls(screeners):
+    """Akzeptiert einen Namen aus SCREENER_URLS, eine URL oder eine Liste davon."""
+    if isinstance(screeners, str):
+        screeners = [screeners]
+    return [SCREENER_URLS.get(screener, screener) for screener in screeners]
@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import hashlib
+
+import metrics
+import resilience
+
+# --- Lokaler HTTP-Cache für Text-/HTML-Quellen (Finviz, PCR-Datei) ---
+# Liegt standardmäßig im Kursdaten-Verzeichnis, damit er im Workflow mit gesichert wird.
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(
+    os.getenv("MARKET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".market_data")),
+    "http"))
+REQUEST_TIMEOUT = 30
+# So viele Bytes vor dem Ende der gespeicherten Datei werden bei Range-Anfragen erneut
+# geladen, um zu prüfen, dass die Datei tatsächlich nur angehängt und nicht neu geschrieben wurde.
+RANGE_OVERLAP = 64
+# Da nur das Dateiende geprüft werden kann, wird eine nur ergänzte Datei trotzdem
+# in diesem Abstand (Sekunden) vollständig neu geladen.
+FULL_REFRESH_INTERVAL = 7 * 24 * 3600
+
+
+def _paths(url):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".body"), os.path.join(CACHE_DIR, key + ".json")
+
+
+def _read(url):
+    body_path, meta_path = _paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            return f.read(), meta
+    except (OSError, ValueError):
+        return None, None
+
+
+def _write(url, body, meta):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    body_path, meta_path = _paths(url)
+    for path, data, mode in ((body_path, body, "wb"), (meta_path, json.dumps(meta), "w")):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def _meta_from(url, response, previous=None):
+    meta = dict(previous or {})
+    meta["url"] = url
+    meta["fetched_at"] = time.time()
+    for header, key in (("ETag", "etag"), ("Last-Modified", "last_modified")):
+        if response.headers.get(header):
+            meta[key] = response.headers[header]
+    if response.status_code == 200:
+        meta["encoding"] = response.encoding or "utf-8"
+    if response.status_code in (200, 304):
+        # Die gesamte Datei ist jetzt bestätigt
+        meta["full_fetched_at"] = meta["fetched_at"]
+    return meta
+
+
+def _count_response(response):
+    metrics.count("http.requests")
+    metrics.count("http.bytes", len(response.content or b""))
+    if response.status_code == 304:
+        metrics.count("http.not_modified")
+
+
+def _fetch_tail(session, url, body, meta, headers, timeout):
+    """
+    Lädt bei einer nur angehängten Datei nur die neuen Bytes per Range-Anfrage.
+    Gibt (body, meta) zurück, oder None, wenn ein vollständiger Download nötig ist.
+    """
+    overlap = min(RANGE_OVERLAP, len(body))
+    start = len(body) - overlap
+    response = resilience.get(session, url, timeout, headers={**headers, "Range": f"bytes={start}-"})
+    _count_response(response)
+
+    if response.status_code == 416:
+        # Der Bereich beginnt vor dem Ende der gespeicherten Datei (RANGE_OVERLAP); ungültig
+        # ist er nur, wenn die Datei kürzer geworden ist, also neu geschrieben wurde
+        return None
+    if response.status_code != 206:
+        # Server unterstützt keine Range-Anfragen; die Antwort ist bereits die ganze Datei
+        if response.status_code == 200:
+            return response.content, _meta_from(url, response, meta)
+        return None
+    if not response.headers.get("Content-Range", "").startswith(f"bytes {start}-"):
+        return None
+    if response.content[:overlap] != body[start:]:
+        # Datei wurde neu geschrieben statt ergänzt
+        return None
+    return body + response.content[overlap:], _meta_from(url, response, meta)
+
+
+def get_text(url, ttl=0, append_only=False, session=None, headers=None, timeout=REQUEST_TIMEOUT):
+    """
+    Lädt eine Text-/HTML-Ressource über den lokalen Cache.
+
+    - Innerhalb von `ttl` Sekunden seit dem letzten Abruf wird die gespeicherte Antwort
+      ohne Netzwerkzugriff zurückgegeben.
+    - Danach wird mit If-None-Match/If-Modified-Since revalidiert (304 = unverändert).
+    - Mit `append_only=True` (z.B. PCR_Index.TXT) werden per Range-Anfrage nur die neuen
+      Bytes am Dateiende geladen, mit Rückfall auf einen vollständigen Download (und
+      einem vollständigen Download spätestens nach FULL_REFRESH_INTERVAL).
+    - Anfragen laufen über resilience.get() (Timeout je Versuch, Wiederholungen, Hedging,
+      Circuit Breaker je Host).
+    - Schlägt die Anfrage fehl oder ist der Circuit Breaker offen, wird eine vorhandene
+      gespeicherte Antwort verwendet; ohne gespeicherte Antwort wird der Fehler
+      weitergereicht.
+    """
+    import requests
+
+    session = session or requests
+    headers = dict(headers or {})
+    body, meta = _read(url)
+
+    if body is not None and time.time() - meta.get("fetched_at", 0) < ttl:
+        metrics.count("http.cache_hits")
+        return body.decode(meta.get("encoding", "utf-8"))
+
+    try:
+        result = None
+        if append_only and body and \
+                time.time() - meta.get("full_fetched_at", 0) < FULL_REFRESH_INTERVAL:
+            result = _fetch_tail(session, url, body, meta, headers, timeout)
+
+        if result is None:
+            conditional = dict(headers)
+            if body is not None and meta.get("etag"):
+                conditional["If-None-Match"] = meta["etag"]
+            if body is not None and meta.get("last_modified"):
+                conditional["If-Modified-Since"] = meta["last_modified"]
+            response = resilience.get(session, url, timeout, headers=conditional)
+            _count_response(response)
+            if response.status_code == 304 and body is not None:
+                result = body, _meta_from(url, response, meta)
+            else:
+                response.raise_for_status()
+                result = response.content, _meta_from(url, response)
+    except (requests.exceptions.RequestException, resilience.SourceUnavailable) as e:
+        if body is None:
+            raise
+        print(f"Abruf von {url} fehlgeschlagen ({e}), verwende gespeicherte Antwort.", file=sys.stderr)
+        return body.decode(meta.get("encoding", "utf-8"))
+
+    body, meta = result
+    _write(url, body, meta)
+    return body.decode(meta.get("encoding", "utf-8"))
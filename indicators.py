@@ -0,0 +1,137 @@
+import numpy as np
+
+# Vektorisierte Indikatoren für Kursmatrizen (Symbole × Bars), numerisch identisch zu
+# den Indikatoren des 'ta'-Pakets (RSIIndicator, ADXIndicator, ROCIndicator, SMAIndicator).
+#
+# Jede Zeile muss rechtsbündig und ohne Lücken vorliegen: führende NaNs für kürzere
+# Historien sind erlaubt, NaNs zwischen gültigen Werten nicht (siehe align_right).
+# Eindimensionale Eingaben werden als einzelne Zeile behandelt und eindimensional
+# zurückgegeben. Werte innerhalb der Aufwärmphase sind NaN.
+
+
+def align_right(*matrices):
+    """
+    Schiebt die gültigen Werte jeder Zeile stabil nach rechts (entspricht dropna() je
+    Symbol). Ein Bar gilt nur als gültig, wenn er in allen übergebenen Matrizen
+    vorhanden ist. Gibt die ausgerichteten Matrizen und die Anzahl gültiger Bars je
+    Zeile zurück.
+    """
+    matrices = [np.atleast_2d(np.asarray(matrix, dtype=np.float64)) for matrix in matrices]
+    valid = np.logical_and.reduce([~np.isnan(matrix) for matrix in matrices])
+    order = np.argsort(valid, axis=1, kind='stable')
+    aligned = [np.take_along_axis(np.where(valid, matrix, np.nan), order, axis=1)
+               for matrix in matrices]
+    return aligned, valid.sum(axis=1)
+
+
+def _prepare(*arrays):
+    one_dimensional = np.ndim(arrays[0]) == 1
+    matrices = [np.atleast_2d(np.asarray(array, dtype=np.float64)) for array in arrays]
+    n_cols = matrices[0].shape[1]
+    counts = (~np.isnan(matrices[-1])).sum(axis=1)
+    # Position jedes Bars relativ zum ersten gültigen Bar der Zeile
+    relative = np.arange(n_cols)[None, :] - (n_cols - counts)[:, None]
+    return matrices, relative, one_dimensional
+
+
+def _finish(result, one_dimensional):
+    return result[0] if one_dimensional else result
+
+
+def sma(close, window):
+    """Einfacher gleitender Durchschnitt, wie SMAIndicator(close, window).sma_indicator()."""
+    (close,), relative, one_dimensional = _prepare(close)
+    sums = np.cumsum(np.nan_to_num(close), axis=1)
+    window_sums = sums.copy()
+    window_sums[:, window:] -= sums[:, :-window]
+    result = np.where(relative >= window - 1, window_sums / window, np.nan)
+    return _finish(result, one_dimensional)
+
+
+def roc(close, window):
+    """Rate of Change in Prozent, wie ROCIndicator(close, window).roc()."""
+    (close,), relative, one_dimensional = _prepare(close)
+    previous = np.full_like(close, np.nan)
+    previous[:, window:] = close[:, :-window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = (close - previous) / previous * 100
+    result = np.where(relative >= window, result, np.nan)
+    return _finish(result, one_dimensional)
+
+
+def rsi(close, window):
+    """
+    Relative Strength Index mit Wilder-Glättung (EWM, alpha=1/window, adjust=False),
+    wie RSIIndicator(close, window).rsi().
+    """
+    (close,), relative, one_dimensional = _prepare(close)
+    diff = np.full_like(close, np.nan)
+    diff[:, 1:] = close[:, 1:] - close[:, :-1]
+    # Wie in 'ta' zählt der erste Bar (ohne Vortag) als Bewegung 0 und startet die Glättung.
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+
+    alpha = 1 / window
+    ema_up = np.zeros(close.shape[0])
+    ema_down = np.zeros(close.shape[0])
+    result = np.full_like(close, np.nan)
+    for t in range(close.shape[1]):
+        rel = relative[:, t]
+        first = rel == 0
+        ema_up = np.where(first, up[:, t], (1 - alpha) * ema_up + alpha * up[:, t])
+        ema_down = np.where(first, down[:, t], (1 - alpha) * ema_down + alpha * down[:, t])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+        result[:, t] = np.where(rel >= window - 1, value, np.nan)
+    return _finish(result, one_dimensional)
+
+
+def adx(high, low, close, window):
+    """
+    Average Directional Index mit Wilder-Glättung, wie
+    ADXIndicator(high, low, close, window).adx() (inklusive dessen Startwerten:
+    Summe der ersten `window` Werte für TR/+DM/-DM, Mittelwert der ersten `window`
+    DX-Werte für den ersten ADX-Wert). Abweichung: Die ersten 2 * window - 1 Bars
+    (Aufwärmphase) sind NaN, 'ta' liefert dort 0.
+    """
+    (high, low, close), relative, one_dimensional = _prepare(high, low, close)
+    previous_close = np.full_like(close, np.nan)
+    previous_close[:, 1:] = close[:, :-1]
+    true_range = np.fmax(high, previous_close) - np.fmin(low, previous_close)
+
+    up_move = np.full_like(high, np.nan)
+    down_move = np.full_like(low, np.nan)
+    up_move[:, 1:] = high[:, 1:] - high[:, :-1]
+    down_move[:, 1:] = low[:, :-1] - low[:, 1:]
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+    n_rows = close.shape[0]
+    tr_smooth = np.zeros(n_rows)
+    plus_smooth = np.zeros(n_rows)
+    minus_smooth = np.zeros(n_rows)
+    adx_value = np.zeros(n_rows)
+    decay = 1 - 1 / window
+    result = np.full_like(close, np.nan)
+    for t in range(close.shape[1]):
+        rel = relative[:, t]
+        active = rel >= 1
+        seeding = rel <= window
+        tr = np.where(active, true_range[:, t], 0.0)
+        plus = np.where(active, plus_dm[:, t], 0.0)
+        minus = np.where(active, minus_dm[:, t], 0.0)
+        tr_smooth = np.where(seeding, tr_smooth, tr_smooth * decay) + tr
+        plus_smooth = np.where(seeding, plus_smooth, plus_smooth * decay) + plus
+        minus_smooth = np.where(seeding, minus_smooth, minus_smooth * decay) + minus
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = np.where(tr_smooth != 0, 100 * plus_smooth / tr_smooth, 0.0)
+            minus_di = np.where(tr_smooth != 0, 100 * minus_smooth / tr_smooth, 0.0)
+            di_sum = plus_di + minus_di
+            dx = np.where(di_sum != 0, 100 * np.abs((plus_di - minus_di) / di_sum), 0.0)
+        dx = np.where(rel >= window, dx, 0.0)
+
+        adx_value = np.where(rel <= 2 * window - 1, adx_value + dx / window,
+                             (adx_value * (window - 1) + dx) / window)
+        result[:, t] = np.where(rel >= 2 * window - 1, adx_value, np.nan)
+    return _finish(result, one_dimensional)
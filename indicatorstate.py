@@ -0,0 +1,354 @@
+import os
+import math
+import contextlib
+import numpy as np
+
+from panel import Panel
+
+# --- Fortlaufender Indikator-Zustand ---
+# Statt RSI, ADX, SMA und ROC bei jedem Lauf aus hunderten Bars neu zu berechnen, wird
+# je (Indikator, Fenster) der Zustand aller Symbole gespeichert: Wilder-Mittelwerte,
+# Glättungssummen und Ringpuffer der letzten Schlusskurse. Ein Lauf verarbeitet nur die
+# Bars seit dem letzten gespeicherten Bar. Wurde die Historie seitdem angepasst (Split,
+# Dividende), passt der gespeicherte Schlusskurs nicht mehr und das Symbol wird aus der
+# vollständigen Historie neu berechnet.
+#
+# Die Werte entsprechen indicators.py über die gesamte seit dem ersten Lauf verarbeitete
+# Historie. Gegenüber einer Neuberechnung über ein festes Fenster (z.B. 500 Tage)
+# unterscheiden sich RSI und ADX daher nur im Rahmen der abklingenden Startwerte.
+STATE_DIR = os.getenv("INDICATOR_STATE_DIR", os.path.join(
+    os.getenv("MARKET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".market_data")),
+    "indicators"))
+# Symbole, die so viele Tage nicht mehr aktualisiert wurden, werden aus dem Speicher entfernt.
+STALE_DAYS = 30
+
+FIELDS = ["High", "Low", "Close"]
+
+# Zustände während eines session()-Blocks: spec -> (Arrays, geändert)
+_session = None
+# Mit session(states) rechnet ein Worker-Prozess auf den Zuständen, die der Hauptprozess
+# mit export() übergibt, und gibt die fortgeschriebenen Zustände zurück; der Hauptprozess
+# übernimmt sie mit merge() und bleibt so der einzige Schreiber der Dateien.
+
+
+class _SMA:
+    """Einfacher gleitender Durchschnitt über einen Ringpuffer der letzten `window` Schlusskurse."""
+
+    def __init__(self, window):
+        self.window = window
+
+    def empty(self, n):
+        return {"buffer": np.full((n, self.window), np.nan)}
+
+    def step(self, state, high, low, close, rel, mask):
+        rows = np.flatnonzero(mask)
+        state["buffer"][rows, rel[rows] % self.window] = close[rows]
+        return np.where(rel >= self.window - 1, state["buffer"].sum(axis=1) / self.window, np.nan)
+
+
+class _ROC:
+    """Rate of Change in Prozent; der Ringpuffer liefert den Schlusskurs vor `window` Bars."""
+
+    def __init__(self, window):
+        self.window = window
+
+    def empty(self, n):
+        return {"buffer": np.full((n, self.window), np.nan)}
+
+    def step(self, state, high, low, close, rel, mask):
+        rows = np.flatnonzero(mask)
+        positions = rel % self.window
+        previous = state["buffer"][np.arange(len(rel)), positions]
+        state["buffer"][rows, positions[rows]] = close[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = (close - previous) / previous * 100
+        return np.where(rel >= self.window, value, np.nan)
+
+
+class _RSI:
+    """RSI mit Wilder-Glättung (siehe indicators.rsi)."""
+
+    def __init__(self, window):
+        self.window = window
+
+    def empty(self, n):
+        return {"ema_up": np.zeros(n), "ema_down": np.zeros(n), "prev_close": np.full(n, np.nan)}
+
+    def step(self, state, high, low, close, rel, mask):
+        alpha = 1 / self.window
+        diff = close - state["prev_close"]
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+        first = rel == 0
+        ema_up = np.where(first, up, (1 - alpha) * state["ema_up"] + alpha * up)
+        ema_down = np.where(first, down, (1 - alpha) * state["ema_down"] + alpha * down)
+        _update(state, mask, ema_up=ema_up, ema_down=ema_down, prev_close=close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+        return np.where(rel >= self.window - 1, value, np.nan)
+
+
+class _ADX:
+    """ADX mit Wilder-Glättung und den Startwerten von indicators.adx."""
+
+    def __init__(self, window):
+        self.window = window
+
+    def empty(self, n):
+        state = {name: np.zeros(n) for name in ("tr", "plus", "minus", "adx")}
+        state.update({name: np.full(n, np.nan) for name in ("prev_high", "prev_low", "prev_close")})
+        return state
+
+    def step(self, state, high, low, close, rel, mask):
+        window = self.window
+        active = rel >= 1
+        seeding = rel <= window
+        true_range = np.fmax(high, state["prev_close"]) - np.fmin(low, state["prev_close"])
+        up_move = high - state["prev_high"]
+        down_move = state["prev_low"] - low
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+        decay = 1 - 1 / window
+        smoothed = {}
+        for name, raw in (("tr", true_range), ("plus", plus_dm), ("minus", minus_dm)):
+            smoothed[name] = np.where(seeding, state[name], state[name] * decay) + \
+                np.where(active, raw, 0.0)
+
+        tr = smoothed["tr"]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = np.where(tr != 0, 100 * smoothed["plus"] / tr, 0.0)
+            minus_di = np.where(tr != 0, 100 * smoothed["minus"] / tr, 0.0)
+            di_sum = plus_di + minus_di
+            dx = np.where(di_sum != 0, 100 * np.abs((plus_di - minus_di) / di_sum), 0.0)
+        dx = np.where(rel >= window, dx, 0.0)
+        adx = np.where(rel <= 2 * window - 1, state["adx"] + dx / window,
+                       (state["adx"] * (window - 1) + dx) / window)
+
+        _update(state, mask, adx=adx, prev_high=high, prev_low=low, prev_close=close, **smoothed)
+        return np.where(rel >= 2 * window - 1, adx, np.nan)
+
+
+INDICATORS = {"sma": _SMA, "roc": _ROC, "rsi": _RSI, "adx": _ADX}
+
+
+def _update(state, mask, **values):
+    for name, value in values.items():
+        state[name] = np.where(mask, value, state[name])
+
+
+def _state_path(spec):
+    name, window = spec
+    return os.path.join(STATE_DIR, f"{name}_{window}.npz")
+
+
+@contextlib.contextmanager
+def session(states=None):
+    """
+    Hält den gespeicherten Zustand bis zum Ende des Blocks im Speicher: advance() liest
+    jede Datei höchstens einmal, und geänderte Zustände werden am Ende einmal geschrieben.
+    Für blockweise Läufe (swings), die sonst je Block die gemeinsamen Dateien aller
+    Symbole lesen und neu schreiben. Verschachtelte Blöcke schreiben erst am äußersten.
+
+    Mit `states` (siehe export) wird statt der Dateien nur mit diesen Zuständen gerechnet
+    und nichts geschrieben; der Block liefert ein Dict, das am Ende die geänderten
+    Zustände (spec -> Arrays) für merge() enthält.
+    """
+    global _session
+    if _session is not None:
+        yield {}
+        return
+    _session = {spec: (arrays, False) for spec, arrays in (states or {}).items()}
+    updated = {}
+    try:
+        yield updated
+    finally:
+        current, _session = _session, None
+        for spec, (arrays, changed) in list(current.items()):
+            if not changed:
+                continue
+            if states is None:
+                _write_state(spec, arrays)
+            else:
+                updated[spec] = arrays
+
+
+def export(specs, symbols):
+    """
+    Gespeicherter Zustand von `symbols` je Indikator in `specs` (spec -> Teil der Arrays,
+    None ohne Zustand), z.B. für einen Worker-Prozess mit session(states).
+    """
+    states = {}
+    for spec in map(tuple, specs):
+        saved = _load(spec)
+        if saved is None:
+            states[spec] = None
+            continue
+        keep = np.isin(saved["symbols"], list(symbols))
+        states[spec] = {key: array[keep] for key, array in saved.items()}
+    return states
+
+
+def merge(states):
+    """Übernimmt fortgeschriebene Zustände aus einem Worker-Prozess (siehe session)."""
+    for spec, arrays in states.items():
+        _store(spec, _combine(_load(spec), arrays))
+
+
+def _load(spec):
+    """Gespeicherter Zustand aus dem laufenden session()-Block oder aus der Datei."""
+    if _session is None:
+        return _read_state(spec)
+    if spec not in _session:
+        _session[spec] = (_read_state(spec), False)
+    return _session[spec][0]
+
+
+def _store(spec, arrays):
+    if _session is None:
+        _write_state(spec, arrays)
+    else:
+        _session[spec] = (arrays, True)
+
+
+def _read_state(spec):
+    try:
+        with np.load(_state_path(spec), allow_pickle=False) as data:
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(spec, arrays):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp_path = _state_path(spec) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, _state_path(spec))
+
+
+def _bars(data):
+    """Vollständige Bars (wie dropna() in den Skripten) als (Daten, High, Low, Close)."""
+    if data is None or data.empty:
+        return np.array([], dtype="datetime64[ns]"), *(np.array([]) for _ in FIELDS)
+    columns = [column for column in ("Open", "High", "Low", "Close", "Volume") if column in data.columns]
+    values = data.to_numpy(dtype=np.float64)[:, data.columns.get_indexer(columns)]
+    complete = ~np.isnan(values).any(axis=1)
+    return (data.index.values.astype("datetime64[ns]")[complete],
+            *(values[complete, columns.index(field)] for field in FIELDS))
+
+
+def _resume_position(saved, row, dates, close):
+    """
+    Gibt den Index des ersten neuen Bars zurück, wenn der gespeicherte Zustand noch zur
+    Historie passt, sonst None (vollständige Neuberechnung).
+    """
+    last_date = saved["last_date"][row]
+    position = np.searchsorted(dates, last_date)
+    if position >= len(dates) or dates[position] != last_date:
+        return None
+    # Toleranz für float32-Panels; Anpassungen durch Splits/Dividenden sind viel größer
+    if not math.isclose(close[position], saved["last_close"][row], rel_tol=1e-6):
+        return None
+    return position + 1
+
+
+def advance(spec, symbols, bars, persist=True):
+    """
+    Bringt den Zustand eines Indikators (`spec` = (Name, Fenster)) für alle `symbols` auf
+    den letzten Bar und gibt (aktuelle Werte, Anzahl verarbeiteter Bars) als Arrays in der
+    Reihenfolge von `symbols` zurück. `bars` ist ein Dict Symbol -> Ergebnis von _bars.
+    Mit `persist=False` wird ohne gespeicherten Zustand aus der ganzen Historie gerechnet
+    und nichts gespeichert (z.B. für Replay-Läufe). Innerhalb von session() wird erst am
+    Ende des Blocks gespeichert.
+    """
+    name, window = spec
+    indicator = INDICATORS[name](window)
+    n = len(symbols)
+    saved = _load(spec) if persist else None
+    saved_rows = {symbol: i for i, symbol in enumerate(saved["symbols"])} if saved else {}
+
+    state = indicator.empty(n)
+    counts = np.zeros(n, dtype=np.int64)
+    values = np.full(n, np.nan)
+    last_dates = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    last_closes = np.full(n, np.nan)
+    starts = np.zeros(n, dtype=np.int64)
+
+    for i, symbol in enumerate(symbols):
+        dates, _, _, close = bars[symbol]
+        row = saved_rows.get(symbol)
+        start = None if row is None else _resume_position(saved, row, dates, close)
+        if start is None:
+            continue
+        starts[i] = start
+        counts[i] = saved["counts"][row]
+        values[i] = saved["values"][row]
+        last_dates[i] = saved["last_date"][row]
+        last_closes[i] = saved["last_close"][row]
+        for key in state:
+            state[key][i] = saved["state_" + key][row]
+
+    # Neue Bars rechtsbündig in Matrizen, damit alle Symbole gemeinsam Bar für Bar
+    # fortgeschrieben werden (im Tagesbetrieb genau ein Schritt).
+    new_counts = np.array([len(bars[symbol][0]) for symbol in symbols], dtype=np.int64) - starts
+    width = int(new_counts.max()) if n else 0
+    matrices = [np.full((n, width), np.nan) for _ in FIELDS]
+    for i, symbol in enumerate(symbols):
+        if new_counts[i]:
+            for matrix, series in zip(matrices, bars[symbol][1:]):
+                matrix[i, width - new_counts[i]:] = series[starts[i]:]
+    high, low, close = matrices
+
+    first_column = width - new_counts
+    for t in range(width):
+        mask = t >= first_column
+        rel = counts + t - first_column
+        value = indicator.step(state, high[:, t], low[:, t], close[:, t], rel, mask)
+        values = np.where(mask, value, values)
+
+    for i, symbol in enumerate(symbols):
+        if new_counts[i]:
+            last_dates[i] = bars[symbol][0][-1]
+            last_closes[i] = bars[symbol][3][-1]
+    counts += new_counts
+
+    if persist:
+        _save(spec, saved, symbols, state, counts, values, last_dates, last_closes)
+    return values, counts
+
+
+def _save(spec, saved, symbols, state, counts, values, last_dates, last_closes):
+    arrays = {"symbols": np.array(symbols, dtype=str), "counts": counts, "values": values,
+              "last_date": last_dates, "last_close": last_closes,
+              **{"state_" + key: array for key, array in state.items()}}
+    keep = ~np.isnat(last_dates)
+    arrays = {key: array[keep] for key, array in arrays.items()}
+    _store(spec, _combine(saved, arrays))
+
+
+def _combine(saved, arrays):
+    """Ergänzt `arrays` um die nicht veralteten Zustände anderer Symbole aus `saved`."""
+    if saved:
+        cutoff = np.datetime64("now", "D") - np.timedelta64(STALE_DAYS, "D")
+        other = ~np.isin(saved["symbols"], arrays["symbols"]) & (saved["last_date"] >= cutoff)
+        if other.any() and saved.keys() == arrays.keys():
+            arrays = {key: np.concatenate([array, saved[key][other]]) for key, array in arrays.items()}
+    return arrays
+
+
+def latest(histories, specs, symbols=None, persist=True):
+    """
+    Gibt für jeden Indikator in `specs` (z.B. [("rsi", 2), ("adx", 14)]) die aktuellen
+    Werte aller Symbole zurück: {spec: (Werte, Anzahl Bars)}, jeweils als Array in der
+    Reihenfolge von `symbols` (Standard: Reihenfolge von `histories`). `histories` ist
+    ein Dict Symbol -> DataFrame oder ein panel.Panel. Symbole ohne Historie erhalten
+    NaN. Zu `persist` siehe advance.
+    """
+    if isinstance(histories, Panel):
+        symbols = histories.symbols if symbols is None else list(symbols)
+        bars = {symbol: histories.bars(symbol, FIELDS) for symbol in symbols}
+    else:
+        symbols = list(histories) if symbols is None else list(symbols)
+        bars = {symbol: _bars(histories.get(symbol)) for symbol in symbols}
+    return {tuple(spec): advance(tuple(spec), symbols, bars, persist) for spec in specs}
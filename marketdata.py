@@ -0,0 +1,400 @@
+import os
+import json
+import sys
+import time
+import tempfile
+import threading
+import contextlib
+from datetime import datetime, timedelta
+from urllib.parse import quote
+import pandas as pd
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: nur die Sperre innerhalb des Prozesses
+    fcntl = None
+
+# --- Lokaler Kursdaten-Speicher ---
+# Ein Parquet-File pro Symbol plus ein kleiner JSON-Index mit dem abgedeckten Zeitraum.
+# Mehrere Threads und Prozesse (swings: gleichzeitige Batches, Worker-Prozesse) dürfen den
+# Speicher gleichzeitig verwenden: Dateien werden über eindeutige temporäre Dateien ersetzt,
+# und der Index wird unter einer Dateisperre neu gelesen, ergänzt und geschrieben.
+STORE_DIR = os.getenv("MARKET_DATA_DIR", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".market_data"))
+# Innerhalb dieses Zeitraums wird ein Symbol ohne Netzwerkzugriff aus dem Speicher bedient.
+MAX_AGE_SECONDS = int(os.getenv("MARKET_DATA_MAX_AGE", "900"))
+# So viele Kalendertage vor dem letzten gespeicherten Bar werden beim Update erneut geladen,
+# um Anpassungen (Splits, Dividenden) an bereits gespeicherten Bars zu erkennen.
+OVERLAP_DAYS = 7
+# Höchstens so viele Anfragen je Aufruf für Symbole mit unterschiedlichem Startdatum (z.B.
+# ausgesetzte Symbole mit älterem letzten Bar); ältere Startdaten werden zusammengefasst.
+MAX_FETCH_GROUPS = 3
+
+# Timeout je HTTP-Anfrage von yfinance (Sekunden)
+DOWNLOAD_TIMEOUT = float(os.getenv("MARKET_DATA_TIMEOUT", "10"))
+# Fehlermeldungen von yfinance, bei denen sich eine Wiederholung lohnt
+TRANSIENT_ERRORS = ["timeout", "timed out", "connection", "temporarily", "rate limit",
+                    "too many requests", "download fehlgeschlagen"]
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+ACTION_COLUMNS = ["Dividends", "Stock Splits"]
+
+
+def period_start(period, now=None):
+    """
+    Rechnet einen yfinance-Zeitraum ('10d', '6mo', '2y') oder eine Anzahl Handelstage
+    ('65b': die letzten 65 Handelstage bis heute, siehe tradingcalendar.py) in ein
+    Startdatum um.
+    """
+    now = now or datetime.now()
+    today = pd.Timestamp(now).normalize()
+    if period.endswith("b"):
+        import tradingcalendar
+        return pd.Timestamp(tradingcalendar.sessions_back(today, int(period[:-1]) - 1))
+    if period.endswith("mo"):
+        return today - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("d"):
+        return today - pd.DateOffset(days=int(period[:-1]))
+    if period.endswith("y"):
+        return today - pd.DateOffset(years=int(period[:-1]))
+    raise ValueError(f"Unbekannter Zeitraum: {period}")
+
+
+def _symbol_path(symbol, store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, quote(symbol, safe="") + ".parquet")
+
+
+def _index_path(store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, "index.json")
+
+
+def _read_index(store_dir=None):
+    try:
+        with open(_index_path(store_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _replace(path, write):
+    """Schreibt `path` atomar über eine eindeutige temporäre Datei im selben Verzeichnis."""
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_index(index, store_dir=None):
+    os.makedirs(store_dir or STORE_DIR, exist_ok=True)
+
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+
+    _replace(_index_path(store_dir), write)
+
+
+# Sperre innerhalb des Prozesses (ohne fcntl die einzige)
+_index_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _locked_index(store_dir=None):
+    """
+    Sperrt den Index für einen Zyklus aus Lesen, Ändern und Schreiben, auch gegenüber
+    anderen Prozessen (fcntl.flock auf index.json.lock, sofern verfügbar).
+    """
+    os.makedirs(store_dir or STORE_DIR, exist_ok=True)
+    with _index_lock, open(_index_path(store_dir) + ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_symbol(symbol, store_dir=None):
+    try:
+        return pd.read_parquet(_symbol_path(symbol, store_dir))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_symbol(symbol, data, store_dir=None):
+    os.makedirs(store_dir or STORE_DIR, exist_ok=True)
+    _replace(_symbol_path(symbol, store_dir), data.to_parquet)
+
+
+def _normalize(data):
+    """Bringt yfinance-Daten in das Speicherformat (tz-freier Tagesindex, feste Spalten)."""
+    if data is None or data.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS + ACTION_COLUMNS, dtype="float64")
+    data = data.copy()
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    data.index = data.index.normalize()
+    data.index.name = "Date"
+    for column in ACTION_COLUMNS:
+        if column not in data.columns:
+            data[column] = 0.0
+    data = data[PRICE_COLUMNS + ACTION_COLUMNS].astype("float64")
+    return data[~data.index.duplicated(keep="last")].sort_index()
+
+
+def _download_errors():
+    """Liest die Fehlermeldungen je Symbol aus dem letzten yf.download-Aufruf."""
+    try:
+        from yfinance import shared
+        return dict(shared._ERRORS)
+    except (ImportError, AttributeError):
+        return {}
+
+
+def _download(symbols, start):
+    """Ein yf.download-Aufruf; gibt (histories, errors) wie fetch_histories zurück."""
+    # yfinance wird nur für tatsächliche Downloads importiert; Läufe, die vollständig
+    # aus dem Speicher bedient werden, sparen den Import.
+    import yfinance as yf
+
+    histories = {}
+    errors = {}
+    try:
+        with metrics.stage("marketdata.download", symbols=len(symbols)):
+            data = yf.download(symbols, start=start.strftime("%Y-%m-%d"), group_by="ticker",
+                               auto_adjust=True, actions=True, threads=True, progress=False,
+                               timeout=DOWNLOAD_TIMEOUT)
+    except Exception as e:
+        return histories, {symbol: f"Download fehlgeschlagen: {e}" for symbol in symbols}
+
+    failed = _download_errors()
+    multi_level = data is not None and isinstance(data.columns, pd.MultiIndex)
+    for symbol in symbols:
+        if data is None or data.empty:
+            frame = None
+        elif multi_level:
+            frame = data[symbol] if symbol in data.columns.get_level_values(0) else None
+        else:
+            frame = data if len(symbols) == 1 else None
+
+        if frame is not None:
+            frame = frame.dropna(subset=["Close"])
+        if frame is None or frame.empty:
+            errors[symbol] = failed.get(symbol) or "Keine Daten erhalten."
+            continue
+        histories[symbol] = _normalize(frame)
+    return histories, errors
+
+
+def _is_transient(error):
+    """Ob eine Fehlermeldung von yfinance auf ein vorübergehendes Problem hindeutet."""
+    error = str(error).lower()
+    return any(marker in error for marker in TRANSIENT_ERRORS)
+
+
+def fetch_histories(symbols, start):
+    """
+    Lädt die angepassten Tagesdaten mehrerer Symbole ab `start` in einer einzigen,
+    parallelisierten yf.download-Anfrage.
+
+    Symbole mit vorübergehendem Fehler (Timeout, Verbindung, Rate-Limit) werden mit
+    Wartezeit erneut angefragt (siehe resilience.py). Scheitern alle Symbole in allen
+    Versuchen so, zählt das als ein Fehler für den Circuit Breaker von yfinance; ist er
+    offen, wird nichts geladen und load_histories verwendet die gespeicherten Daten.
+
+    Gibt (histories, errors) zurück: ein Dict Symbol -> DataFrame für alle Symbole mit
+    Daten und ein Dict Symbol -> Fehlermeldung für alle anderen.
+    """
+    import resilience
+
+    symbols = list(dict.fromkeys(symbols))
+    histories = {}
+    errors = {}
+    if not symbols:
+        return histories, errors
+
+    circuit = resilience.breaker("yfinance")
+    pending = symbols
+    for attempt in range(resilience.RETRY_ATTEMPTS):
+        if not circuit.allow():
+            metrics.count("resilience.short_circuit")
+            errors.update({symbol: "yfinance nicht verfügbar (Circuit Breaker offen)." for symbol in pending})
+            break
+        if attempt:
+            metrics.count("marketdata.retried", len(pending))
+            time.sleep(resilience.backoff(attempt))
+        fetched, failed = _download(pending, start)
+        histories.update(fetched)
+        for symbol in fetched:
+            errors.pop(symbol, None)
+        errors.update(failed)
+        transient = [symbol for symbol, error in failed.items() if _is_transient(error)]
+        if len(transient) < len(pending):
+            circuit.success()
+        elif attempt == resilience.RETRY_ATTEMPTS - 1 or circuit.half_open:
+            # Wie resilience.call(): ein Fehler je Abruf, nicht je Versuch
+            circuit.failure()
+        pending = transient
+        if not pending:
+            break
+    metrics.count("marketdata.downloaded", len(histories))
+    metrics.count("marketdata.failed", len(errors))
+    return histories, errors
+
+
+def _adjustment_changed(cached, fresh):
+    """
+    Prüft, ob sich bereits gespeicherte Bars durch einen Split oder eine Dividende
+    rückwirkend geändert haben. Der letzte gespeicherte Bar wird nicht verglichen,
+    da er aus einem Lauf während der Handelszeit stammen kann.
+    """
+    def action_dates(data):
+        return data.index[(data[ACTION_COLUMNS].fillna(0) != 0).any(axis=1)]
+
+    if not action_dates(fresh).difference(action_dates(cached)).empty:
+        return True
+
+    comparable = cached.index[:-1].intersection(fresh.index)
+    if comparable.empty:
+        return False
+    old_close = cached.loc[comparable, "Close"]
+    new_close = fresh.loc[comparable, "Close"]
+    return not ((old_close - new_close).abs() <= 1e-6 * old_close.abs() + 1e-9).all()
+
+
+def _fetch_groups(starts):
+    """
+    Gruppiert Symbol -> Startdatum zu [(Start, Symbole)], eine Anfrage je Startdatum. Bei
+    mehr als MAX_FETCH_GROUPS Startdaten behalten die neuesten eine eigene Anfrage, alle
+    älteren werden gemeinsam ab dem ältesten Datum geladen.
+    """
+    groups = {}
+    for symbol, start in starts.items():
+        groups.setdefault(start, []).append(symbol)
+    dates = sorted(groups, reverse=True)
+    if len(dates) > MAX_FETCH_GROUPS:
+        groups[dates[-1]] = [symbol for date in dates[MAX_FETCH_GROUPS - 1:] for symbol in groups.pop(date)]
+    return sorted(groups.items())
+
+
+def load_histories(symbols, period="6mo", fetch=None, store_dir=None, now=None):
+    """
+    Liefert die tägliche, angepasste OHLCV-Historie mehrerer Symbole für den angegebenen
+    yfinance-Zeitraum und gibt (histories, errors) zurück.
+
+    Die Daten werden lokal gespeichert. Bei späteren Aufrufen werden nur die seit dem
+    letzten gespeicherten Bar fehlenden Bars nachgeladen, und zwar für alle Symbole
+    mit demselben letzten Bar gemeinsam in einer Anfrage (siehe _fetch_groups). Symbole
+    mit erkannter Kursanpassung (Split, Dividende) werden über den ganzen gespeicherten
+    Zeitraum neu geladen.
+
+    `fetch(symbols, start)` lädt die fehlenden Bars (Standard: fetch_histories über
+    yfinance, siehe providers.py für andere Quellen); `store_dir` und `now` ersetzen
+    Speicherort und aktuelle Zeit, z.B. für Replay-Läufe.
+    """
+    with metrics.stage("marketdata.load", symbols=len(symbols)):
+        return _load_histories(symbols, period, fetch or fetch_histories, store_dir, now or datetime.now())
+
+
+def _load_histories(symbols, period, fetch, store_dir, now):
+    start = period_start(period, now)
+    symbols = list(dict.fromkeys(symbols))
+    index = _read_index(store_dir)
+
+    stored = {}
+    errors = {}
+    full_refresh = {}
+    incremental = {}
+    for symbol in symbols:
+        meta = index.get(symbol)
+        cached = _read_symbol(symbol, store_dir) if meta else None
+        if cached is None or cached.empty or pd.Timestamp(meta["start"]) > start:
+            full_refresh[symbol] = start
+        elif (now - datetime.fromisoformat(meta["updated"])).total_seconds() < MAX_AGE_SECONDS:
+            stored[symbol] = cached
+        else:
+            incremental[symbol] = cached
+
+    updates = {}
+    # Eine Anfrage je Stand des letzten gespeicherten Bars (im Tagesbetrieb eine für alle):
+    # ein veraltetes Symbol vergrößert so nicht das Download-Fenster aller anderen.
+    update_starts = {symbol: cached.index[-1] - timedelta(days=OVERLAP_DAYS)
+                     for symbol, cached in incremental.items()}
+    for fetch_start, group in _fetch_groups(update_starts):
+        fresh, fetch_errors = fetch(group, fetch_start)
+        for symbol in group:
+            cached = incremental[symbol]
+            new_bars = fresh.get(symbol)
+            if new_bars is None:
+                print(f"Update für {symbol} fehlgeschlagen ({fetch_errors.get(symbol)}), "
+                      f"verwende gespeicherte Daten.", file=sys.stderr)
+                stored[symbol] = cached
+            elif _adjustment_changed(cached, new_bars):
+                print(f"Kursanpassung für {symbol} erkannt, lade Historie neu.", file=sys.stderr)
+                # Den ganzen gespeicherten Zeitraum, nicht nur den dieses Aufrufs (z.B. "10b")
+                full_refresh[symbol] = min(start, pd.Timestamp(index[symbol]["start"]))
+            else:
+                merged = pd.concat([cached[cached.index < new_bars.index[0]], new_bars])
+                updates[symbol] = (merged, pd.Timestamp(index[symbol]["start"]))
+
+    for refresh_start, group in _fetch_groups(full_refresh):
+        fresh, fetch_errors = fetch(group, refresh_start)
+        for symbol in group:
+            if symbol in fresh:
+                updates[symbol] = (fresh[symbol], refresh_start)
+            else:
+                errors[symbol] = fetch_errors.get(symbol, "Keine Daten erhalten.")
+
+    if updates:
+        for symbol, (data, _) in updates.items():
+            _write_symbol(symbol, data, store_dir)
+            stored[symbol] = data
+        # Frisch gelesen, damit Einträge gleichzeitiger Aufrufe erhalten bleiben
+        with _locked_index(store_dir):
+            index = _read_index(store_dir)
+            for symbol, (_, covered_from) in updates.items():
+                index[symbol] = {"start": covered_from.strftime("%Y-%m-%d"),
+                                 "updated": now.isoformat()}
+            _write_index(index, store_dir)
+
+    metrics.count("marketdata.from_store", len(stored) - len(updates))
+    histories = {}
+    for symbol in symbols:
+        if symbol in stored:
+            data = stored[symbol]
+            histories[symbol] = data[data.index >= start]
+    return histories, errors
+
+
+def load_history(symbol, period="6mo", **kwargs):
+    """
+    Liefert die Historie eines einzelnen Symbols (siehe load_histories). Wenn keine
+    Daten verfügbar sind, wird ein leerer DataFrame zurückgegeben.
+    """
+    histories, errors = load_histories([symbol], period, **kwargs)
+    if symbol in errors:
+        print(f"Fehler beim Laden von {symbol}: {errors[symbol]}", file=sys.stderr)
+    return histories.get(symbol, _normalize(None))
+
+
+def build_panel(histories):
+    """
+    Fügt mehrere Historien zu einem DataFrame mit (Feld, Ticker)-Spalten zusammen,
+    im selben Format wie yf.download für mehrere Ticker. Die Analysen verwenden das
+    kompaktere panel.Panel (float32, Sichten statt Kopien je Ticker).
+    """
+    if not histories:
+        return pd.DataFrame()
+    # Erst zusammenfügen, dann die Felder auswählen: eine Spaltenauswahl je Symbol kostet
+    # bei tausenden Symbolen ein Vielfaches.
+    panel = pd.concat(histories, axis=1).swaplevel(axis=1)
+    return panel.loc[:, sorted(PRICE_COLUMNS)]
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import atexit
+import contextlib
+
+# --- Laufzeit-Metriken je Stufe ---
+# Die Skripte messen ihre Stufen mit stage() und zählen Ereignisse mit count(). Jede
+# abgeschlossene Stufe wird sofort als JSON-Zeile an METRICS_FILE angehängt (auch bei
+# einem Absturz bleibt der Verlauf erhalten), die Zähler folgen am Ende des Prozesses.
+# Optional wird zusätzlich eine Prometheus-Textdatei (node_exporter textfile collector)
+# mit den Werten des letzten Laufs geschrieben.
+#
+# Nur Standardbibliothek, damit die Skripte innerhalb ihres Import-Budgets bleiben.
+
+# Liegt im Kursdaten-Verzeichnis, damit der Verlauf im Workflow mit gesichert wird;
+# ein leerer Wert schaltet die JSON-Zeilen ab.
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join(
+    os.getenv("MARKET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".market_data")),
+    "metrics.jsonl"))
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE")
+PROMETHEUS_PREFIX = "signal_notifications"
+
+RUN_ID = os.getenv("GITHUB_RUN_ID") or f"{int(time.time())}-{os.getpid()}"
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0] or "python"
+
+_stages = {}
+_counters = {}
+_state = {"registered": False, "write_failed": False}
+
+
+def _append(record):
+    if not METRICS_FILE or _state["write_failed"]:
+        return
+    record = {"ts": round(time.time(), 3), "run": RUN_ID, "script": SCRIPT, **record}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(METRICS_FILE)), exist_ok=True)
+        with open(METRICS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        # Metriken dürfen einen Lauf nie abbrechen
+        _state["write_failed"] = True
+        print(f"Metriken konnten nicht geschrieben werden: {e}", file=sys.stderr)
+
+
+def _register():
+    if not _state["registered"]:
+        _state["registered"] = True
+        atexit.register(flush)
+
+
+def observe(name, seconds, **fields):
+    """Erfasst eine bereits gemessene Dauer (z.B. Latenz einer Telegram-Anfrage)."""
+    _register()
+    total = _stages.setdefault(name, [0.0, 0])
+    total[0] += seconds
+    total[1] += 1
+    _append({"type": "stage", "name": name, "seconds": round(seconds, 6), **fields})
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """
+    Misst die Wanduhrzeit eines Blocks:
+
+        with metrics.stage("swings.r2"):
+            ...
+
+    Zusätzliche Felder (z.B. symbols=500) werden in die JSON-Zeile übernommen. Die Zeit
+    wird auch erfasst, wenn der Block mit einer Ausnahme endet.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **fields)
+
+
+def count(name, value=1):
+    """Erhöht einen Zähler (z.B. "finviz.tickers", "marketdata.downloaded")."""
+    _register()
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def snapshot():
+    """Gibt die bisher erfassten Stufen und Zähler dieses Prozesses zurück."""
+    return ({name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in _stages.items()},
+            dict(_counters))
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_prometheus(path):
+    lines = [f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Dauer der Stufe im letzten Lauf (Summe aller Aufrufe).",
+             f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds gauge"]
+    for name, (seconds, _) in sorted(_stages.items()):
+        lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds{{script="{_label(SCRIPT)}",stage="{_label(name)}"}} {seconds:.6f}')
+    lines += [f"# HELP {PROMETHEUS_PREFIX}_stage_calls Anzahl Aufrufe der Stufe im letzten Lauf.",
+              f"# TYPE {PROMETHEUS_PREFIX}_stage_calls gauge"]
+    for name, (_, calls) in sorted(_stages.items()):
+        lines.append(f'{PROMETHEUS_PREFIX}_stage_calls{{script="{_label(SCRIPT)}",stage="{_label(name)}"}} {calls}')
+    lines += [f"# HELP {PROMETHEUS_PREFIX}_events Zähler des letzten Laufs.",
+              f"# TYPE {PROMETHEUS_PREFIX}_events gauge"]
+    for name, value in sorted(_counters.items()):
+        lines.append(f'{PROMETHEUS_PREFIX}_events{{script="{_label(SCRIPT)}",name="{_label(name)}"}} {value}')
+    lines += [f"# HELP {PROMETHEUS_PREFIX}_last_run_timestamp_seconds Ende des letzten Laufs.",
+              f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge",
+              f'{PROMETHEUS_PREFIX}_last_run_timestamp_seconds{{script="{_label(SCRIPT)}"}} {time.time():.0f}']
+
+    # Atomar ersetzen, damit der Collector nie eine halbe Datei liest
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def flush():
+    """
+    Schreibt die Zähler als JSON-Zeilen und (falls PROMETHEUS_TEXTFILE gesetzt ist) die
+    Prometheus-Textdatei. Wird beim Prozessende automatisch aufgerufen.
+    """
+    for name, value in sorted(_counters.items()):
+        _append({"type": "counter", "name": name, "value": value})
+    if PROMETHEUS_TEXTFILE and (_stages or _counters):
+        try:
+            _write_prometheus(PROMETHEUS_TEXTFILE)
+        except OSError as e:
+            print(f"Prometheus-Textdatei konnte nicht geschrieben werden: {e}", file=sys.stderr)
+    _stages.clear()
+    _counters.clear()
@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import asyncio
+
+import metrics
+
+# --- Telegram Setup ---
+TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Basis-URL der Bot API; für Tests auf einen lokalen Stub-Server umstellbar.
+API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
+
+MAX_MESSAGE_LENGTH = 4096
+# Telegram erlaubt etwa 1 Nachricht pro Sekunde und Chat und 30 Nachrichten pro Sekunde insgesamt.
+PER_CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1 / 30
+# Nachrichten an denselben Chat innerhalb dieses Fensters werden zusammengefasst.
+COALESCE_WINDOW = 0.3
+MAX_ATTEMPTS = 3
+
+
+def split_chat_ids(chat_ids):
+    """Akzeptiert eine Chat-ID, eine kommagetrennte Liste (z.B. aus einer Umgebungsvariable) oder eine Liste."""
+    if chat_ids is None:
+        return []
+    items = chat_ids if isinstance(chat_ids, (list, tuple, set)) else str(chat_ids).split(",")
+    return [str(chat_id).strip() for chat_id in items if str(chat_id).strip()]
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH, parse_mode=None):
+    """
+    Teilt einen Text in Stücke von höchstens `limit` Zeichen. Getrennt wird bevorzugt an
+    Zeilenumbrüchen, dann an ", " (Tickerlisten von swings.py), dann an Leerzeichen.
+    Mit `parse_mode` (Markdown/HTML) nur an Zeilenumbrüchen, damit keine Formatierung
+    mitten im Element getrennt wird; nur eine einzelne Zeile über `limit` wird weiter
+    zerlegt.
+    """
+    separators = ("\n",) if parse_mode else ("\n", ", ", " ")
+    chunks = []
+    while len(text) > limit:
+        for separator in separators:
+            cut = text.rfind(separator, 0, limit)
+            if cut > 0:
+                chunks.append(text[:cut])
+                text = text[cut + len(separator):]
+                break
+        else:
+            chunks.append(text[:limit])
+            text = text[limit:]
+    chunks.append(text)
+    return chunks
+
+
+def _coalesce(batch):
+    """Fasst aufeinanderfolgende Nachrichten mit gleichem parse_mode zu einem Text zusammen."""
+    merged = []
+    for text, parse_mode in batch:
+        if merged and merged[-1][1] == parse_mode:
+            merged[-1][0].append(text)
+        else:
+            merged.append(([text], parse_mode))
+    return [("\n\n".join(texts), parse_mode) for texts, parse_mode in merged]
+
+
+class _Throttle:
+    """Hält einen Mindestabstand zwischen aufeinanderfolgenden Sendevorgängen ein."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next_slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot = time.monotonic() + self.interval
+
+
+class Notifier:
+    """
+    Gemeinsamer Telegram-Versand für alle Skripte.
+
+    Hält eine Bot-Sitzung mit einem Verbindungspool offen und verschickt Nachrichten über
+    eine Warteschlange pro Chat. Dabei werden die Telegram-Limits pro Chat und global
+    eingehalten, kurz nacheinander eingereihte Nachrichten an denselben Chat
+    zusammengefasst und Texte über 4096 Zeichen aufgeteilt. Chats werden parallel bedient.
+
+        async with Notifier() as notifier:
+            notifier.send("123,456", "Text")
+    """
+
+    def __init__(self, token=None, base_url=None, coalesce_window=COALESCE_WINDOW,
+                 per_chat_interval=PER_CHAT_INTERVAL, global_interval=GLOBAL_INTERVAL,
+                 pool_size=8):
+        self.token = token or TOKEN
+        self.base_url = base_url or API_URL
+        self.coalesce_window = coalesce_window
+        self.per_chat_interval = per_chat_interval
+        self.pool_size = pool_size
+        self.sent = 0
+        self.failed = 0
+        self._global_throttle = _Throttle(global_interval)
+        self._chat_throttles = {}
+        self._queues = {}
+        self._workers = []
+        self._bot = None
+
+    async def __aenter__(self):
+        from telegram import Bot
+        from telegram.request import HTTPXRequest
+
+        self._bot = Bot(token=self.token, base_url=self.base_url,
+                        request=HTTPXRequest(connection_pool_size=self.pool_size))
+        await self._bot.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            if exc_info[0] is None:
+                await self.flush()
+        finally:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            await self._bot.shutdown()
+
+    def send(self, chat_ids, text, parse_mode=None):
+        """Reiht eine Nachricht für eine oder mehrere Chat-IDs ein."""
+        for chat_id in split_chat_ids(chat_ids):
+            queue = self._queues.get(chat_id)
+            if queue is None:
+                queue = self._queues[chat_id] = asyncio.Queue()
+                self._chat_throttles[chat_id] = _Throttle(self.per_chat_interval)
+                self._workers.append(asyncio.create_task(self._worker(chat_id, queue)))
+            queue.put_nowait((text, parse_mode))
+
+    async def flush(self):
+        """Wartet, bis alle eingereihten Nachrichten verschickt (oder verworfen) sind."""
+        await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+
+    async def _worker(self, chat_id, queue):
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.coalesce_window
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                for text, parse_mode in _coalesce(batch):
+                    for chunk in split_message(text, parse_mode=parse_mode):
+                        await self._send_chunk(chat_id, chunk, parse_mode)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _send_chunk(self, chat_id, text, parse_mode):
+        from telegram.error import RetryAfter
+
+        for _ in range(MAX_ATTEMPTS):
+            await self._chat_throttles[chat_id].wait()
+            await self._global_throttle.wait()
+            started = time.perf_counter()
+            try:
+                await self._bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                metrics.observe("telegram.send", time.perf_counter() - started)
+                metrics.count("telegram.sent")
+                self.sent += 1
+                print("Telegram notification sent successfully.")
+                return True
+            except RetryAfter as e:
+                delay = e.retry_after
+                delay = delay.total_seconds() if hasattr(delay, "total_seconds") else delay
+                print(f"Telegram-Limit erreicht, warte {delay} s.", file=sys.stderr)
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"Failed to send Telegram notification: {e}")
+                break
+        self.failed += 1
+        metrics.count("telegram.failed")
+        return False
+
+
+async def send_messages(messages, token=None):
+    """
+    Verschickt mehrere Nachrichten über eine gemeinsame Notifier-Sitzung.
+    `messages` enthält Tupel (chat_ids, text) oder (chat_ids, text, parse_mode).
+    """
+    token = token or TOKEN
+    if not token:
+        print("Telegram environment variable TELEGRAM_BOT_TOKEN not set. Skipping notification.")
+        return
+    try:
+        async with Notifier(token) as notifier:
+            for chat_ids, text, *parse_mode in messages:
+                notifier.send(chat_ids, text, *parse_mode)
+    except Exception as e:
+        print(f"Failed to send Telegram notification: {e}")
@@ -1,55 +1,79 @@
 import os
-import yfinance as yf
 import asyncio
-from telegram import Bot
+
+import tradingcalendar
+
+# Schwere Module (pandas, numpy, telegram, marketdata) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
 
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Signal-Schwelle (auch Standardwert für backtest.py / sweep.py)
+VIX_THRESHOLD = 30
+# Profit Target und Time Stop (Handelstage) der QQQ-Position (siehe positions.py)
+PROFIT_TARGET = 0.06
+TIME_STOP = 9
+
 
 async def send_telegram_message(text):
     """Sends a message to a Telegram chat."""
     if not TOKEN or not CHAT_ID:
         print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
         return
-    try:
-        bot = Bot(token=TOKEN)
-        await bot.send_message(chat_id=CHAT_ID, text=text)
-        print("Telegram notification sent successfully.")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+    from notifier import send_messages
+    await send_messages([(CHAT_ID, text)], token=TOKEN)
 
 
-def check_qqq_vix_strategy():
+# Nur der letzte Schlusskurs wird gebraucht; Reserve für einen verspäteten Bar
+HISTORY_PERIOD = "5b"
+
+# --- Runner-Plugin (siehe runner.py) ---
+DATA_REQUIREMENTS = {"^VIX": HISTORY_PERIOD}
+
+
+def is_due(today):
+    """Das No Panic Model wird an jedem Handelstag geprüft."""
+    return tradingcalendar.is_session(today)
+
+
+def build_message(provider=None):
     """
-    Prüft die "No Panic Model" Strategie für QQQ, sammelt Fehler und sendet
-    eine einzelne, zusammenfassende Benachrichtigung.
+    Prüft die "No Panic Model" Strategie für QQQ, sammelt Fehler und gibt
+    eine einzelne, zusammenfassende Nachricht zurück.
     Bedingungen: VIX > 30$
+    Die Kursdaten kommen von `provider` (Standard: providers.default_provider()).
     """
+    from providers import default_provider
+
+    provider = provider or default_provider()
+
     errors = []
     message = ""
 
     try:
-        vix = yf.Ticker("^VIX")
-        hist = vix.history(period="10d")
+        hist = provider.load_history("^VIX", period=HISTORY_PERIOD)
 
         if hist.empty:
             errors.append(
                 "Keine historischen Daten für ^VIX von yfinance gefunden.")
         else:
             last_vix_close = hist['Close'].iloc[-1]
-            condition = last_vix_close > 30
+            condition = last_vix_close > VIX_THRESHOLD
 
             if condition:
+                if provider.persistent:
+                    import positions
+                    positions.record("LNPM", ["QQQ"], hist.index[-1], PROFIT_TARGET, TIME_STOP)
                 message = (
-                    f"✅ 'LNPM' Signal: BUY QQQ ON CLOSE, PT 6%\n"
-                    f"- VIX ({last_vix_close:.2f}) > 30\n"
-                    f"Time Stop +9days"
+                    f"✅ 'LNPM' Signal: BUY QQQ ON CLOSE, PT {PROFIT_TARGET:.0%}\n"
+                    f"- VIX ({last_vix_close:.2f}) > {VIX_THRESHOLD}\n"
+                    f"Time Stop +{TIME_STOP}days"
                 )
             else:
                 message = (
                     f"❌ Kein 'LNPM' Signal:\n"
-                    f"- VIX ({last_vix_close:.2f}) nicht über 30"
+                    f"- VIX ({last_vix_close:.2f}) nicht über {VIX_THRESHOLD}"
                 )
 
     except Exception as e:
@@ -67,6 +91,15 @@ def check_qqq_vix_strategy():
     else:
         final_message = "Unbekannter Zustand in 'npm.py': Weder Erfolgs- noch Fehlermeldung generiert."
 
+    return final_message
+
+
+def check_qqq_vix_strategy():
+    """
+    Prüft die "No Panic Model" Strategie für QQQ und sendet eine einzelne,
+    zusammenfassende Benachrichtigung.
+    """
+    final_message = build_message()
     print(final_message)
     asyncio.run(send_telegram_message(final_message))
 
@@ -0,0 +1,154 @@
+import numpy as np
+
+# --- Kompaktes Kurs-Panel ---
+# Die Analysen brauchen die Kurse vieler Symbole als Matrizen (Symbole × Bars). Statt
+# eines DataFrames mit (Feld, Ticker)-Spalten in float64 liegen die Felder hier als ein
+# zusammenhängender float32-Block (Felder × Symbole × Bars) mit gemeinsamer Datumsachse
+# vor. Zeilen und Feldmatrizen sind Sichten auf diesen Block, ohne Kopie je Ticker.
+#
+# float32 hat rund 7 signifikante Stellen und reicht damit für Kurse und Volumen; die
+# Indikatoren rechnen weiterhin in float64. pandas wird nur an den Rändern (from_frame,
+# to_frame, history) gebraucht.
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class Panel:
+    """
+    Kursdaten mehrerer Symbole auf gemeinsamer Datumsachse. Fehlende Bars (Symbol ohne
+    Handel an einem Tag, fehlgeschlagener Download) sind NaN.
+
+    - symbols: Symbole in Zeilenreihenfolge, index: Symbol -> Zeile
+    - dates: gemeinsame Datumsachse (datetime64[ns], aufsteigend)
+    - values: Block (Felder × Symbole × Bars)
+    """
+
+    def __init__(self, symbols, dates, values, fields=FIELDS):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.values = values
+        self.fields = list(fields)
+        self._field_index = {field: i for i, field in enumerate(self.fields)}
+
+    @classmethod
+    def from_histories(cls, histories, symbols=None, dtype=np.float32):
+        """
+        Baut ein Panel aus Historien im Speicherformat von marketdata (Symbol ->
+        DataFrame). Symbole aus `symbols` ohne Historie erhalten NaN-Zeilen.
+        """
+        symbols = list(histories) if symbols is None else list(dict.fromkeys(symbols))
+        frames = [histories.get(symbol) for symbol in symbols]
+        indexes = [frame.index.values.astype("datetime64[ns]") for frame in frames
+                   if frame is not None and len(frame)]
+        dates = np.unique(np.concatenate(indexes)) if indexes else np.array([], dtype="datetime64[ns]")
+
+        values = np.full((len(FIELDS), len(symbols), len(dates)), np.nan, dtype=dtype)
+        # Spaltenpositionen je Spaltenlayout (get_indexer je Frame wäre teurer als das Kopieren)
+        layouts = {}
+        for row, frame in enumerate(frames):
+            if frame is None or frame.empty:
+                continue
+            layout = tuple(frame.columns)
+            if layout not in layouts:
+                layouts[layout] = [layout.index(field) if field in layout else -1 for field in FIELDS]
+            positions = np.searchsorted(dates, frame.index.values.astype("datetime64[ns]"))
+            block = frame.to_numpy(dtype=np.float64)
+            for f, column in enumerate(layouts[layout]):
+                if column >= 0:
+                    values[f, row, positions] = block[:, column]
+        return cls(symbols, dates, values)
+
+    @classmethod
+    def concat(cls, panels):
+        """Fügt Panels mit unterschiedlichen Symbolen auf gemeinsamer Datumsachse zusammen."""
+        panels = list(panels)
+        dates = np.unique(np.concatenate([panel.dates for panel in panels])) if panels \
+            else np.array([], dtype="datetime64[ns]")
+        symbols = [symbol for panel in panels for symbol in panel.symbols]
+        dtype = panels[0].values.dtype if panels else np.float32
+        values = np.full((len(FIELDS), len(symbols), len(dates)), np.nan, dtype=dtype)
+        row = 0
+        for panel in panels:
+            positions = np.searchsorted(dates, panel.dates)
+            values[:, row:row + len(panel), positions] = panel.values
+            row += len(panel)
+        return cls(symbols, dates, values)
+
+    @classmethod
+    def from_frame(cls, frame, dtype=np.float32):
+        """Baut ein Panel aus einem DataFrame mit (Feld, Ticker)-Spalten (wie yf.download)."""
+        symbols = list(dict.fromkeys(frame.columns.get_level_values(1)))
+        values = np.full((len(FIELDS), len(symbols), len(frame)), np.nan, dtype=dtype)
+        for f, field in enumerate(FIELDS):
+            if field in frame.columns.get_level_values(0):
+                values[f] = frame[field].reindex(columns=symbols).to_numpy(dtype=np.float64).T
+        return cls(symbols, frame.index.values, values)
+
+    def to_frame(self, dtype=np.float64):
+        """DataFrame mit (Feld, Ticker)-Spalten im Format von marketdata.build_panel."""
+        import pandas as pd
+
+        fields = sorted(self.fields)
+        order = [self._field_index[field] for field in fields]
+        data = self.values[order].transpose(2, 0, 1).reshape(len(self.dates), -1)
+        columns = pd.MultiIndex.from_product([fields, self.symbols])
+        return pd.DataFrame(data.astype(dtype), index=pd.DatetimeIndex(self.dates, name="Date"),
+                            columns=columns)
+
+    def history(self, symbol, dtype=np.float64):
+        """Historie eines Symbols als DataFrame (nur Tage mit Schlusskurs)."""
+        import pandas as pd
+
+        close = self.row(symbol)
+        keep = ~np.isnan(close)
+        data = self.values[:, self.index[symbol], keep].T.astype(dtype)
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self.dates[keep], name="Date"),
+                            columns=self.fields)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.dates.nbytes
+
+    def matrix(self, field="Close"):
+        """Feldmatrix (Symbole × Bars) als Sicht."""
+        return self.values[self._field_index[field]]
+
+    def row(self, symbol, field="Close"):
+        """Zeitreihe eines Symbols als Sicht (ohne Kopie)."""
+        return self.values[self._field_index[field], self.index[symbol]]
+
+    def counts(self, field="Close"):
+        """Anzahl vorhandener Werte je Symbol."""
+        return (~np.isnan(self.matrix(field))).sum(axis=1)
+
+    def last(self, field="Close"):
+        """Letzter vorhandener Wert je Symbol (NaN ohne Werte)."""
+        valid = ~np.isnan(self.matrix(field))
+        if not valid.shape[1]:
+            return np.full(len(self.symbols), np.nan)
+        position = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        values = self.matrix(field)[np.arange(len(self.symbols)), position].astype(np.float64)
+        return np.where(valid.any(axis=1), values, np.nan)
+
+    def bars(self, symbol, fields=("High", "Low", "Close")):
+        """
+        Vollständige Bars eines Symbols (alle Felder vorhanden, wie dropna()) als
+        (Daten, *Felder). Ohne Lücken sind die Felder Sichten auf das Panel.
+        """
+        if symbol not in self.index:
+            return np.array([], dtype="datetime64[ns]"), *(np.array([]) for _ in fields)
+        block = self.values[:, self.index[symbol]]
+        complete = ~np.isnan(block).any(axis=0)
+        first = int(np.argmax(complete)) if complete.any() else len(complete)
+        if complete[first:].all():
+            keep = slice(first, None)
+        else:
+            keep = complete
+        return (self.dates[keep], *(block[self._field_index[field], keep] for field in fields))
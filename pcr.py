@@ -1,17 +1,22 @@
 import io
 import os
 from datetime import datetime
-import requests
-import yfinance as yf
-import pandas as pd
-from ta.momentum import ROCIndicator
 import asyncio
-from telegram import Bot
+
+import tradingcalendar
+
+# Schwere Module (pandas, numpy, telegram, marketdata, requests) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
 
 # --- Telegram Setup ---
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 PCR_URL = "http://styxgate.info/data/PCR_Index.TXT"
+# Die PCR-Datei wird nur ergänzt; nach Ablauf der TTL (Sekunden) werden nur die neuen Zeilen geladen.
+PCR_CACHE_TTL = int(os.getenv("PCR_CACHE_TTL", "3600"))
+# Signal-Schwellen für SMA2/SMA200 in Prozent (auch Standardwerte für backtest.py / sweep.py)
+BUY_THRESHOLD = 7
+CLOSE_THRESHOLD = -4
 
 
 async def send_telegram_message(text):
@@ -19,19 +24,45 @@ async def send_telegram_message(text):
     if not TOKEN or not CHAT_ID:
         print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
         return
-    try:
-        bot = Bot(token=TOKEN)
-        await bot.send_message(chat_id=CHAT_ID, text=text)
-        print("Telegram notification sent successfully.")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+    from notifier import send_messages
+    await send_messages([(CHAT_ID, text)], token=TOKEN)
 
 
-def perform_strategy_check():
+def read_pcr_index(content):
+    """Liest den Inhalt von PCR_Index.TXT (Tab-getrennt: Datum JJJJMMTT, Wert mit Dezimalkomma)."""
+    import pandas as pd
+
+    pcr_df = pd.read_csv(io.StringIO(content), sep='\t', header=None, names=[
+                         'Date', 'Value'], decimal=',')
+    pcr_df['Date'] = pcr_df['Date'].astype(str)
+    return pcr_df
+
+
+# ROC(60) braucht 61 Handelstage; Reserve für einen verspäteten Bar
+HISTORY_PERIOD = "65b"
+
+# --- Runner-Plugin (siehe runner.py) ---
+DATA_REQUIREMENTS = {"QQQ": HISTORY_PERIOD}
+
+
+def is_due(today):
+    """Die PCR-Strategie wird an jedem Handelstag geprüft."""
+    return tradingcalendar.is_session(today)
+
+
+def build_message(provider=None):
     """
     Führt die Hauptstrategieprüfung durch, sammelt alle Fehler oder eine Erfolgsnachricht
-    und sendet am Ende eine einzige, zusammenfassende Benachrichtigung an Telegram.
+    und gibt am Ende eine einzige, zusammenfassende Nachricht zurück. PCR-Datei und
+    Kursdaten kommen von `provider` (Standard: providers.default_provider()).
     """
+    import requests
+    from providers import default_provider
+    import indicators
+    import resilience
+
+    provider = provider or default_provider()
+
     errors = []
     message_lines = []
     percentage_diff = None
@@ -43,12 +74,8 @@ def perform_strategy_check():
 
     # Schritt 1: PCR-Analyse durchführen
     try:
-        response = requests.get(PCR_URL)
-        response.raise_for_status()
-        pcr_content = response.text
-        pcr_df = pd.read_csv(io.StringIO(pcr_content), sep='\t', header=None, names=[
-                             'Date', 'Value'], decimal=',')
-        pcr_df['Date'] = pcr_df['Date'].astype(str)
+        pcr_content = provider.get_text(PCR_URL, ttl=PCR_CACHE_TTL, append_only=True)
+        pcr_df = read_pcr_index(pcr_content)
 
         if len(pcr_df) < 200:
             errors.append(
@@ -76,21 +103,19 @@ def perform_strategy_check():
                 prev_pcr_date = datetime.strptime(
                     prev_pcr_date_str, '%Y%m%d').strftime('%d.%m.%Y')
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, resilience.SourceUnavailable) as e:
         errors.append(f"FEHLER beim Abrufen der PCR-Daten von der URL: {e}")
     except Exception as e:
         errors.append(f"FEHLER bei der PCR-Analyse: {e}")
 
     # Schritt 2: QQQ Momentum prüfen
     try:
-        qqq = yf.Ticker("QQQ")
-        hist = qqq.history(period="6mo", auto_adjust=True)
+        hist = provider.load_history("QQQ", period=HISTORY_PERIOD)
         if hist.empty:
             errors.append(
                 "Keine historischen Daten für QQQ von yfinance gefunden.")
         else:
-            roc_60 = ROCIndicator(close=hist['Close'], window=60).roc()
-            last_roc = roc_60.iloc[-1]
+            last_roc = indicators.roc(hist['Close'].to_numpy(), 60)[-1]
 
     except Exception as e:
         errors.append(f"FEHLER bei der QQQ-Momentum-Prüfung (yfinance): {e}")
@@ -104,10 +129,10 @@ def perform_strategy_check():
         final_message = f"{error_header}\n- {error_messages}"
     elif percentage_diff is not None and last_roc is not None:
         # Erfolgsmodus: Signale generieren
-        if percentage_diff < -4:
+        if percentage_diff < CLOSE_THRESHOLD:
             message_lines.append(
                 "❌ 'LPCR' Signal: CLOSE LONG POSITION ON OPEN")
-        elif percentage_diff > 7 and last_roc > 0:
+        elif percentage_diff > BUY_THRESHOLD and last_roc > 0:
             message_lines.append("✅ 'LPCR' Signal: BUY ON OPEN")
         else:
             message_lines.append("❌ 'LPCR' Signal: HOLD / FLAT")
@@ -123,7 +148,15 @@ def perform_strategy_check():
         # Dieser Fall sollte nicht eintreten, wenn die Logik korrekt ist
         final_message = "Unbekannter Zustand: Weder Erfolgsdaten noch Fehler wurden aufgezeichnet. Das Skript wurde ausgeführt."
 
-    # Schritt 4: Finale Nachricht senden
+    return final_message
+
+
+def perform_strategy_check():
+    """
+    Führt die Hauptstrategieprüfung durch und sendet eine einzige, zusammenfassende
+    Benachrichtigung an Telegram.
+    """
+    final_message = build_message()
     print(final_message)
     asyncio.run(send_telegram_message(final_message))
 
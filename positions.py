@@ -0,0 +1,232 @@
+import os
+import sys
+import asyncio
+from datetime import date
+
+import tradingcalendar
+
+# Schwere Module (pandas, numpy, telegram, panel) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
+
+# --- Offene Positionen: Profit Targets und Time Stops ---
+# Die Strategien tragen bei einem Kaufsignal ihre Positionen ein (record()): Strategie,
+# Symbol, Einstiegstag, Profit Target und optional einen Time Stop in Handelstagen. Der
+# Einstiegskurs ist der Schlusskurs am Einstiegstag ("BUY ON CLOSE") und wird beim
+# ersten Prüflauf aus den Kursdaten übernommen.
+#
+# Der Prüflauf (Runner-Plugin, an jedem Handelstag) lädt die Kurse aller offenen
+# Positionen in einer Anfrage und prüft alle Positionen in einem vektorisierten Durchlauf
+# (Positionen × Bars): Profit Target erreicht, sobald ein Hoch nach dem Einstiegstag das
+# Ziel erreicht (Ausstieg zum Ziel bzw. zur Eröffnung, falls diese darüber liegt), Time
+# Stop am Schluss des N-ten Handelstags nach dem Einstieg. Ausgestiegene Positionen werden
+# geschlossen und als Exit-Signal gemeldet.
+#
+# Der Speicher ist eine SQLite-Datenbank. Sie wird nur mit einem dauerhaften Provider
+# (wie beim Indikator-Zustand) angelegt, gelesen und fortgeschrieben; Replay-Läufe und
+# der Daemon sehen keine offenen Positionen und legen keine Datenbank an.
+# Im Workflow läuft der Prüflauf nach tt, npm und bm, damit die Einträge desselben Tages
+# ihren Einstiegskurs bekommen.
+
+TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+POSITIONS_DB = os.getenv("POSITIONS_DB", os.path.join(
+    os.getenv("MARKET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".market_data")),
+    "positions.sqlite"))
+# Zusätzliche Handelstage beim Laden vor dem ältesten Einstiegstag
+LOAD_RESERVE_BARS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    entry_date TEXT NOT NULL,
+    entry_price REAL,
+    target REAL NOT NULL,
+    time_stop INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    exit_date TEXT,
+    exit_price REAL,
+    exit_reason TEXT,
+    UNIQUE (strategy, symbol, entry_date)
+);
+CREATE INDEX IF NOT EXISTS open_positions ON positions (status);
+"""
+
+
+async def send_telegram_message(text):
+    """Sends a message to a Telegram chat."""
+    if not TOKEN or not CHAT_ID:
+        print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
+        return
+    from notifier import send_messages
+    await send_messages([(CHAT_ID, text)], token=TOKEN)
+
+
+def _connect(path=None):
+    import sqlite3
+
+    path = path or POSITIONS_DB
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record(strategy, symbols, entry_date, target, time_stop=None, path=None):
+    """
+    Trägt offene Positionen ein: `target` als Anteil (0.03 = PT 3%), `time_stop` in
+    Handelstagen nach dem Einstieg. Wiederholte Signale für denselben Einstiegstag
+    (erneuter Lauf, Daemon) werden ignoriert.
+    """
+    day = entry_date.strftime("%Y-%m-%d")
+    with _connect(path) as connection:
+        connection.executemany(
+            "INSERT OR IGNORE INTO positions (strategy, symbol, entry_date, target, time_stop) "
+            "VALUES (?, ?, ?, ?, ?)", [(strategy, symbol, day, target, time_stop) for symbol in symbols])
+    connection.close()
+
+
+def open_positions(path=None):
+    """Alle offenen Positionen als Liste von Dicts (leer, solange es keine Datenbank gibt)."""
+    path = path or POSITIONS_DB
+    if not os.path.exists(path):
+        return []
+    connection = _connect(path)
+    connection.row_factory = lambda cursor, row: {column[0]: value for column, value in zip(cursor.description, row)}
+    rows = connection.execute("SELECT * FROM positions WHERE status = 'open' ORDER BY id").fetchall()
+    connection.close()
+    return rows
+
+
+def check_exits(positions, panel):
+    """
+    Prüft alle Positionen auf einmal gegen die Kurse in `panel` (panel.Panel). Gibt je
+    Position (entry_price, exit_index, exit_price, reason) als Arrays zurück; exit_index
+    ist -1 ohne Ausstieg, entry_price NaN ohne Kurs am Einstiegstag.
+    """
+    import numpy as np
+
+    count, bars = len(positions), len(panel.dates)
+    if not bars:
+        return np.full(count, np.nan), np.full(count, -1), np.full(count, np.nan), np.full(count, "")
+    rows = np.array([panel.index[position["symbol"]] for position in positions], dtype=np.int64)
+    entry_dates = np.array([position["entry_date"] for position in positions], dtype="datetime64[ns]")
+    entry_index = np.searchsorted(panel.dates, entry_dates)
+    positions_range = np.arange(count)
+
+    close = panel.matrix("Close")[rows].astype(np.float64)
+    high = panel.matrix("High")[rows].astype(np.float64)
+    open_ = panel.matrix("Open")[rows].astype(np.float64)
+    known = entry_index < bars
+    known[known] &= panel.dates[entry_index[known]] == entry_dates[known]
+
+    stored = np.array([np.nan if position["entry_price"] is None else position["entry_price"]
+                       for position in positions], dtype=np.float64)
+    entry_close = np.where(known, close[positions_range, np.minimum(entry_index, bars - 1)], np.nan)
+    entry_price = np.where(np.isnan(stored), entry_close, stored)
+    known &= ~np.isnan(entry_price)
+    target = entry_price * (1 + np.array([position["target"] for position in positions], dtype=np.float64))
+
+    # Profit Target: erstes Hoch nach dem Einstiegstag auf oder über dem Ziel
+    after = np.arange(bars)[None, :] > entry_index[:, None]
+    with np.errstate(invalid="ignore"):
+        hit = after & (high >= target[:, None]) & known[:, None]
+    first_hit = np.where(hit.any(axis=1), hit.argmax(axis=1), bars)
+
+    # Time Stop: Schluss des N-ten Bars nach dem Einstiegstag
+    stops = np.array([bars if position["time_stop"] is None else position["time_stop"]
+                      for position in positions], dtype=np.int64)
+    stop_index = np.where(known, entry_index + stops, bars)
+
+    exit_index = np.minimum(first_hit, stop_index)
+    exited = known & (exit_index < bars)
+    at = np.minimum(exit_index, bars - 1)
+    target_reached = first_hit <= stop_index
+    exit_price = np.where(target_reached, np.fmax(target, open_[positions_range, at]),
+                          close[positions_range, at])
+    reason = np.where(target_reached, "PT", "Time Stop")
+    return (entry_price, np.where(exited, exit_index, -1), np.where(exited, exit_price, np.nan),
+            np.where(exited, reason, ""))
+
+
+# --- Runner-Plugin (siehe runner.py) ---
+# Die Symbole stehen erst mit den offenen Positionen fest und werden in build_message geladen.
+DATA_REQUIREMENTS = {}
+
+
+def is_due(today):
+    """Die offenen Positionen werden an jedem Handelstag geprüft."""
+    return tradingcalendar.is_session(today)
+
+
+def build_message(provider=None):
+    """
+    Prüft alle offenen Positionen und gibt die Exit-Signale als Nachricht zurück, oder
+    None ohne Ausstieg. Die Kurse kommen von `provider` (Standard:
+    providers.default_provider()).
+    """
+    import numpy as np
+    import metrics
+    from panel import Panel
+    from providers import default_provider
+
+    provider = provider or default_provider()
+    positions = open_positions() if provider.persistent else []
+    if not positions:
+        print("Keine offenen Positionen.", file=sys.stderr)
+        return None
+
+    symbols = list(dict.fromkeys(position["symbol"] for position in positions))
+    first_entry = date.fromisoformat(min(position["entry_date"] for position in positions))
+    sessions = tradingcalendar.sessions_between(first_entry, provider.now())
+    histories, load_errors = provider.load_histories(symbols, period=f"{sessions + LOAD_RESERVE_BARS}b")
+    for symbol, error in load_errors.items():
+        print(f"Keine Kurse für {symbol}: {error}", file=sys.stderr)
+    panel = Panel.from_histories(histories, symbols)
+    del histories
+
+    with metrics.stage("positions.check", positions=len(positions)):
+        entry_prices, exit_index, exit_prices, reasons = check_exits(positions, panel)
+
+    lines = []
+    updates = []
+    for i, position in enumerate(positions):
+        if exit_index[i] < 0:
+            if position["entry_price"] is None and not np.isnan(entry_prices[i]):
+                updates.append(("open", float(entry_prices[i]), None, None, None, position["id"]))
+            continue
+        exit_date = panel.dates[exit_index[i]].astype("datetime64[D]").item()
+        entry_date = date.fromisoformat(position["entry_date"])
+        change = (exit_prices[i] / entry_prices[i] - 1) * 100
+        if reasons[i] == "PT":
+            reason = f"PT {position['target'] * 100:g}% erreicht"
+        else:
+            reason = f"Time Stop nach {position['time_stop']} Handelstagen"
+        lines.append(f"- {position['strategy']} {position['symbol']}: {reason} am {exit_date:%d.%m.%Y}, "
+                     f"Ausstieg {exit_prices[i]:.2f} ({change:+.2f}%, Einstieg {entry_prices[i]:.2f} "
+                     f"am {entry_date:%d.%m.%Y})")
+        updates.append(("closed", float(entry_prices[i]), exit_date.isoformat(), float(exit_prices[i]),
+                        reasons[i], position["id"]))
+
+    metrics.count("positions.open", len(positions) - len(lines))
+    metrics.count("positions.exits", len(lines))
+    print(f"{len(positions) - len(lines)} Position(en) weiter offen.", file=sys.stderr)
+    if updates:
+        with _connect() as connection:
+            connection.executemany(
+                "UPDATE positions SET status = ?, entry_price = ?, exit_date = ?, exit_price = ?, "
+                "exit_reason = ? WHERE id = ?", updates)
+        connection.close()
+
+    if not lines:
+        return None
+    return "🔔 Exit-Signale:\n" + "\n".join(lines)
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    final_message = build_message()
+    if final_message:
+        print(final_message)
+        asyncio.run(send_telegram_message(final_message))
@@ -0,0 +1,274 @@
+import os
+import sys
+from datetime import datetime
+from urllib.parse import quote, unquote, urlparse
+
+# --- Datenquellen der Strategien ---
+# Die Strategien laden Kurse, Textdateien (PCR-Index) und die Ticker der Screener über
+# einen Provider, der als Parameter übergeben wird:
+#
+# - YFinanceProvider: yfinance, HTTP (über httpcache) und Finviz
+# - ReplayProvider: lokale CSV/Parquet-Dateien, z.B. für Offline-Läufe und Benchmarks
+# - CachingProvider: legt einen beliebigen Provider hinter den lokalen Kursdaten-Speicher
+#   (marketdata.py), sodass nur fehlende Bars nachgeladen werden
+#
+# default_provider() liefert im Normalbetrieb CachingProvider(YFinanceProvider()). Ist
+# MARKET_DATA_REPLAY gesetzt (Verzeichnis oder Kursdatei), laufen alle Strategien
+# stattdessen auf dem ReplayProvider, optional mit Stichtag MARKET_DATA_REPLAY_AS_OF.
+
+
+def lines_until(lines, day):
+    """Entfernt Zeilen, die mit einem Datum JJJJMMTT nach `day` beginnen (PCR-Index)."""
+    cutoff = day.strftime("%Y%m%d")
+    return [line for line in lines if not (line[:8].isdigit() and line[:8] > cutoff)]
+
+
+class Provider:
+    """
+    Schnittstelle aller Provider. Unterklassen implementieren fetch(), get_text() und
+    screener_tickers(); load_histories() und load_history() bauen darauf auf.
+    """
+
+    # Ob Strategien mit diesem Provider gespeicherten Zustand (Indikatoren) verwenden dürfen
+    persistent = False
+
+    def now(self):
+        """Aktuelle Zeit aus Sicht der Daten (bei Replay der Stichtag)."""
+        return datetime.now()
+
+    def fetch(self, symbols, start):
+        """Tagesdaten ab `start` im Format von marketdata; gibt (histories, errors) zurück."""
+        raise NotImplementedError
+
+    def get_text(self, url, ttl=0, append_only=False):
+        """Inhalt einer Text-Ressource (siehe httpcache.get_text)."""
+        raise NotImplementedError
+
+    def screener_tickers(self, urls):
+        """Eindeutige Ticker aller Screener-URLs in Fundreihenfolge."""
+        raise NotImplementedError
+
+    def iter_screener_pages(self, urls):
+        """Wie screener_tickers(), aber seitenweise (neue Ticker je Seite), sobald verfügbar."""
+        yield self.screener_tickers(urls)
+
+    def load_histories(self, symbols, period="6mo"):
+        """Historien für einen yfinance-Zeitraum ('10d', '6mo'); gibt (histories, errors) zurück."""
+        from marketdata import period_start
+
+        start = period_start(period, self.now())
+        histories, errors = self.fetch(list(dict.fromkeys(symbols)), start)
+        return {symbol: data[data.index >= start] for symbol, data in histories.items()}, errors
+
+    def load_history(self, symbol, period="6mo"):
+        """Historie eines Symbols; ohne Daten ein leerer DataFrame (wie marketdata.load_history)."""
+        from marketdata import _normalize
+
+        histories, errors = self.load_histories([symbol], period)
+        if symbol in errors:
+            print(f"Fehler beim Laden von {symbol}: {errors[symbol]}", file=sys.stderr)
+        return histories.get(symbol, _normalize(None))
+
+
+class YFinanceProvider(Provider):
+    """Live-Daten: Kurse von yfinance, Textdateien per HTTP, Ticker von Finviz."""
+
+    def fetch(self, symbols, start):
+        from marketdata import fetch_histories
+
+        return fetch_histories(symbols, start)
+
+    def get_text(self, url, ttl=0, append_only=False):
+        import httpcache
+
+        return httpcache.get_text(url, ttl=ttl, append_only=append_only)
+
+    def screener_tickers(self, urls):
+        from finviz import FinvizScraper
+
+        return FinvizScraper().scrape(urls)
+
+    def iter_screener_pages(self, urls):
+        from finviz import FinvizScraper
+
+        return FinvizScraper().iter_tickers(urls)
+
+
+# Kursdateien im Langformat, die ein Replay-Verzeichnis enthalten kann
+PRICE_FILES = ["prices.parquet", "prices.csv"]
+# Seitengröße der Replay-Screener (wie die Ticker-Ansicht von Finviz)
+REPLAY_PAGE_SIZE = 1000
+
+
+class ReplayProvider(Provider):
+    """
+    Spielt lokale Daten ab. `path` ist entweder
+    - ein Verzeichnis mit den Kursen als prices.parquet/prices.csv im Langformat (Date,
+      Symbol, OHLCV) oder als Datei je Symbol (SYMBOL.parquet oder SYMBOL.csv mit Spalte
+      Date und den OHLCV-Spalten; Sonderzeichen wie in marketdata URL-kodiert, z.B.
+      %5EVIX.csv), sowie optional Textdateien, die nach dem letzten Pfadteil der URL benannt
+      sind (PCR_Index.TXT), und tickers.txt mit den Screener-Tickern (eine Zeile je Ticker),
+    - oder eine Kursdatei im Langformat wie für backtest.py.
+    Das Langformat ist bei großen Universen deutlich schneller als Dateien je Symbol.
+
+    Mit `as_of` endet die Historie an diesem Tag und der Stichtag gilt als aktuelle Zeit;
+    in Textdateien entfallen Zeilen, die mit einem späteren Datum (JJJJMMTT) beginnen.
+    Ohne tickers.txt liefert der Screener alle vorhandenen Symbole; iter_screener_pages()
+    gibt sie in Seiten zu `page_size` Tickern zurück.
+    """
+
+    def __init__(self, path, as_of=None, page_size=REPLAY_PAGE_SIZE):
+        import pandas as pd
+
+        self.path = path
+        self.page_size = page_size
+        self.as_of = pd.Timestamp(as_of).normalize() if as_of else None
+        self._histories = {}
+        prices = path
+        if os.path.isdir(path):
+            prices = next((os.path.join(path, name) for name in PRICE_FILES
+                           if os.path.exists(os.path.join(path, name))), None)
+        if prices:
+            data = pd.read_parquet(prices) if prices.endswith(".parquet") else pd.read_csv(prices)
+            self._histories.update(self._split(data))
+
+    def now(self):
+        if self.as_of is None:
+            return datetime.now()
+        return self.as_of.to_pydatetime().replace(hour=23, minute=59)
+
+    def _split(self, data, symbol=None):
+        """
+        Zerlegt eine Tabelle mit Spalte Date (und Symbol, falls `symbol` fehlt) in
+        Historien im Speicherformat von marketdata. Die Frames werden direkt aus den
+        NumPy-Blöcken gebaut, da eine Aufbereitung je Symbol mit pandas den Replay
+        großer Universen dominieren würde.
+        """
+        import numpy as np
+        import pandas as pd
+        from marketdata import PRICE_COLUMNS, ACTION_COLUMNS
+
+        columns = PRICE_COLUMNS + ACTION_COLUMNS
+        dates = pd.to_datetime(data["Date"])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        keys = np.full(len(data), symbol, dtype=object) if symbol else data["Symbol"].to_numpy(dtype=object)
+        dates = dates.dt.normalize().to_numpy()
+        values = data.reindex(columns=columns).to_numpy(dtype=np.float64, copy=True)
+        values[:, len(PRICE_COLUMNS):] = np.nan_to_num(values[:, len(PRICE_COLUMNS):])
+
+        codes, names = pd.factorize(keys)
+        keep = np.ones(len(data), dtype=bool) if self.as_of is None else dates <= self.as_of.to_datetime64()
+        order = np.lexsort((dates[keep], codes[keep]))
+        codes, dates, values = codes[keep][order], dates[keep][order], values[keep][order]
+        # Doppelte Tage: der letzte Eintrag gilt (wie marketdata._normalize)
+        last = np.ones(len(codes), dtype=bool)
+        last[:-1] = (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])
+        codes, dates, values = codes[last], dates[last], values[last]
+
+        bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        histories = {}
+        for first, end in zip(np.r_[0, bounds], np.r_[bounds, len(codes)]):
+            index = pd.DatetimeIndex(dates[first:end], name="Date")
+            histories[names[codes[first]]] = pd.DataFrame(values[first:end], index=index, columns=columns)
+        return histories
+
+    def _history(self, symbol):
+        import pandas as pd
+
+        if symbol not in self._histories and os.path.isdir(self.path):
+            data = None
+            for name in dict.fromkeys((quote(symbol, safe=""), symbol)):
+                base = os.path.join(self.path, name)
+                if os.path.exists(base + ".parquet"):
+                    data = pd.read_parquet(base + ".parquet")
+                elif os.path.exists(base + ".csv"):
+                    data = pd.read_csv(base + ".csv")
+                if data is not None:
+                    if "Date" not in data.columns:
+                        data = data.reset_index()
+                    break
+            self._histories[symbol] = None if data is None else self._split(data, symbol).get(symbol)
+        return self._histories.get(symbol)
+
+    def fetch(self, symbols, start):
+        histories = {}
+        errors = {}
+        for symbol in symbols:
+            data = self._history(symbol)
+            data = None if data is None else data[data.index >= start]
+            if data is None or data.empty:
+                errors[symbol] = "Keine Replay-Daten."
+            else:
+                histories[symbol] = data
+        return histories, errors
+
+    def get_text(self, url, ttl=0, append_only=False):
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(f"Keine Replay-Datei für {url} (kein Verzeichnis: {self.path})")
+        name = os.path.basename(urlparse(url).path)
+        with open(os.path.join(self.path, name), encoding="utf-8") as f:
+            lines = f.readlines()
+        if self.as_of is not None:
+            lines = lines_until(lines, self.as_of)
+        return "".join(lines)
+
+    def screener_tickers(self, urls):
+        tickers_path = os.path.join(self.path, "tickers.txt")
+        if os.path.isdir(self.path) and os.path.exists(tickers_path):
+            with open(tickers_path, encoding="utf-8") as f:
+                return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        if os.path.isdir(self.path):
+            names = sorted(os.path.splitext(name) for name in os.listdir(self.path)
+                           if name not in PRICE_FILES)
+            symbols = [unquote(stem) for stem, extension in names if extension in (".parquet", ".csv")]
+            return list(dict.fromkeys(list(self._histories) + symbols))
+        return list(self._histories)
+
+    def iter_screener_pages(self, urls):
+        tickers = self.screener_tickers(urls)
+        for start in range(0, len(tickers), self.page_size):
+            yield tickers[start:start + self.page_size]
+
+
+class CachingProvider(Provider):
+    """
+    Legt `provider` hinter den lokalen Kursdaten-Speicher (marketdata.load_histories):
+    Historien werden gespeichert und bei späteren Aufrufen nur um fehlende Bars ergänzt.
+    Textdateien und Screener reicht er an `provider` durch.
+    """
+
+    persistent = True
+
+    def __init__(self, provider, store_dir=None):
+        self.provider = provider
+        self.store_dir = store_dir
+
+    def now(self):
+        return self.provider.now()
+
+    def fetch(self, symbols, start):
+        return self.provider.fetch(symbols, start)
+
+    def get_text(self, url, ttl=0, append_only=False):
+        return self.provider.get_text(url, ttl=ttl, append_only=append_only)
+
+    def screener_tickers(self, urls):
+        return self.provider.screener_tickers(urls)
+
+    def iter_screener_pages(self, urls):
+        return self.provider.iter_screener_pages(urls)
+
+    def load_histories(self, symbols, period="6mo"):
+        from marketdata import load_histories
+
+        return load_histories(symbols, period, fetch=self.provider.fetch, store_dir=self.store_dir,
+                              now=self.provider.now())
+
+
+def default_provider():
+    """Provider für den Normalbetrieb bzw. den Replay-Modus (MARKET_DATA_REPLAY)."""
+    replay = os.getenv("MARKET_DATA_REPLAY")
+    if replay:
+        return ReplayProvider(replay, as_of=os.getenv("MARKET_DATA_REPLAY_AS_OF") or None)
+    return CachingProvider(YFinanceProvider())
@@ -0,0 +1,247 @@
+import os
+import sys
+import time
+import random
+import threading
+from collections import deque
+
+import metrics
+
+# --- Robuste Abrufe: Timeout, Wiederholung, Hedging, Circuit Breaker ---
+# call() führt eine idempotente Anfrage aus und begrenzt dabei die Wartezeit:
+#
+# - Jeder Versuch läuft in einem Thread-Pool und wird nach `timeout` Sekunden
+#   aufgegeben (auch wenn der Server die Antwort nur tröpfchenweise schickt).
+# - Fehlgeschlagene Versuche werden bis zu RETRY_ATTEMPTS-mal mit exponentiell
+#   wachsender, zufälliger Wartezeit (Full Jitter) wiederholt.
+# - Dauert ein Versuch länger als das p95 der bisherigen Antwortzeiten des Hosts, wird
+#   eine zweite, gleiche Anfrage gestartet (Hedging); die erste Antwort gilt.
+# - Nach BREAKER_FAILURES fehlgeschlagenen Aufrufen in Folge (jeweils alle Versuche
+#   gescheitert) öffnet der Circuit Breaker des Hosts: für BREAKER_COOLDOWN Sekunden
+#   schlagen Anfragen sofort mit SourceUnavailable fehl, damit die Aufrufer auf ihre
+#   gespeicherten Daten zurückfallen. Danach wird ein Versuch durchgelassen, dessen
+#   Erfolg den Breaker wieder schließt; scheitert er, öffnet der Breaker sofort wieder.
+#
+# Die schlechteste Wartezeit je Aufruf ist damit etwa
+# RETRY_ATTEMPTS × timeout + Summe der Wartezeiten (höchstens RETRY_MAX_DELAY je Pause).
+# Antwortzeiten und Breaker gelten je Prozess (im Daemon über den ganzen Lauf).
+
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+# Hedging nach diesem Quantil der Antwortzeiten, sobald genug Messwerte vorliegen;
+# bis dahin nach HEDGE_DEFAULT_DELAY Sekunden
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = 2.0
+HEDGE_MIN_DELAY = 0.05
+LATENCY_WINDOW = 200
+# Fehlgeschlagene Aufrufe (nicht Versuche), also bis zu BREAKER_FAILURES × RETRY_ATTEMPTS Anfragen
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))
+# Threads für Versuche und Hedges aller Hosts
+POOL_SIZE = 16
+
+
+class SourceUnavailable(Exception):
+    """Die Quelle ist nicht erreichbar (Circuit Breaker offen oder alle Versuche ohne Antwort)."""
+
+
+class CircuitBreaker:
+    """
+    Zählt fehlgeschlagene Aufrufe in Folge und sperrt den Host nach `failures` Fehlern für
+    `cooldown` Sekunden. failure() meldet einen Aufruf, dessen Versuche alle gescheitert
+    sind, bzw. einen gescheiterten Probeversuch (half_open).
+    """
+
+    def __init__(self, host, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.host = host
+        self.failures = failures
+        self.cooldown = cooldown
+        self._errors = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Ob eine Anfrage durchgelassen wird; nach der Sperrzeit genau ein Probeversuch."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    @property
+    def half_open(self):
+        """Ob gerade der Probeversuch nach der Sperrzeit läuft."""
+        with self._lock:
+            return self._trial
+
+    def success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"Circuit Breaker für {self.host} wieder geschlossen.", file=sys.stderr)
+            self._errors = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._errors += 1
+            if self._trial or (self._opened_at is None and self._errors >= self.failures):
+                if self._opened_at is None:
+                    metrics.count("resilience.breaker_opened")
+                    print(f"Circuit Breaker für {self.host} geöffnet ({self._errors} Fehler in Folge), "
+                          f"Pause {self.cooldown:g} s.", file=sys.stderr)
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class LatencyTracker:
+    """Die letzten LATENCY_WINDOW Antwortzeiten eines Hosts."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self):
+        """Wartezeit bis zum Hedge: p95 der Antwortzeiten (HEDGE_DEFAULT_DELAY ohne Messwerte)."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY
+            samples = sorted(self._samples)
+        return max(HEDGE_MIN_DELAY, samples[min(len(samples) - 1, int(HEDGE_QUANTILE * len(samples)))])
+
+
+_breakers = {}
+_latencies = {}
+_registry_lock = threading.Lock()
+_pool = None
+
+
+def breaker(host):
+    """Circuit Breaker eines Hosts (ein gemeinsamer je Prozess)."""
+    with _registry_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def latency(host):
+    """Antwortzeiten eines Hosts (siehe LatencyTracker)."""
+    with _registry_lock:
+        if host not in _latencies:
+            _latencies[host] = LatencyTracker()
+        return _latencies[host]
+
+
+def backoff(attempt):
+    """Wartezeit vor Wiederholung `attempt` (1, 2, ...): Full Jitter bis RETRY_MAX_DELAY."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _executor():
+    global _pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _registry_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="resilience")
+        return _pool
+
+
+def _attempt(request, timeout, hedge_delay):
+    """
+    Ein Versuch mit optionalem Hedge. Gibt das erste erfolgreiche Ergebnis zurück bzw.
+    wirft den letzten Fehler oder TimeoutError nach `timeout` Sekunden.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    futures = {_executor().submit(request)}
+    hedged = hedge_delay is None
+    error = None
+    while futures:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        wait_for = remaining if hedged else min(hedge_delay, remaining if remaining is not None else hedge_delay)
+        done, futures = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        if not done and not hedged and (deadline is None or time.monotonic() < deadline):
+            # Langsamer als üblich: gleiche Anfrage noch einmal stellen
+            metrics.count("resilience.hedged")
+            futures.add(_executor().submit(request))
+            hedged = True
+        elif not done:
+            raise TimeoutError(f"keine Antwort innerhalb von {timeout:g} s")
+    raise error
+
+
+def call(host, request, timeout=None, retry_on=(Exception,), retry_if=None,
+         attempts=None, hedge=True):
+    """
+    Führt die idempotente Anfrage request() für `host` aus (siehe oben).
+
+    - timeout: Sekunden je Versuch (None = unbegrenzt)
+    - retry_on: Ausnahmen, die wiederholt werden; andere werden sofort weitergereicht
+    - retry_if(result): ob ein Ergebnis als Fehler gilt (z.B. HTTP 5xx); nach dem letzten
+      Versuch wird es trotzdem zurückgegeben
+    - hedge: ob nach dem p95 der Antwortzeiten eine zweite Anfrage gestartet wird
+
+    Wirft SourceUnavailable bei offenem Circuit Breaker oder wenn kein Versuch eine
+    Antwort lieferte, sonst den Fehler des letzten Versuchs.
+    """
+    attempts = attempts or RETRY_ATTEMPTS
+    circuit = breaker(host)
+    times = latency(host)
+    error = None
+    for attempt in range(attempts):
+        if not circuit.allow():
+            metrics.count("resilience.short_circuit")
+            raise SourceUnavailable(f"{host}: Circuit Breaker offen")
+        if attempt:
+            metrics.count("resilience.retries")
+            time.sleep(backoff(attempt))
+
+        started = time.monotonic()
+        try:
+            result = _attempt(request, timeout, times.hedge_delay() if hedge else None)
+        except TimeoutError as e:
+            metrics.count("resilience.timeouts")
+            error = SourceUnavailable(f"{host}: {e}")
+        except retry_on as e:
+            error = e
+        else:
+            if retry_if is None or not retry_if(result):
+                times.add(time.monotonic() - started)
+                circuit.success()
+                return result
+            if attempt == attempts - 1:
+                circuit.failure()
+                return result
+            error = None
+        # Ein Fehler je Aufruf, nicht je Versuch; ein gescheiterter Probeversuch sperrt sofort
+        if attempt == attempts - 1 or circuit.half_open:
+            circuit.failure()
+    raise error
+
+
+def get(session, url, timeout, **kwargs):
+    """
+    HTTP-GET über call() mit dem Host der URL; wiederholt Verbindungsfehler, Timeouts,
+    HTTP 429 und 5xx. `session` ist eine requests-Session oder das Modul requests.
+    """
+    import requests
+    from urllib.parse import urlparse
+
+    return call(urlparse(url).netloc, lambda: session.get(url, timeout=timeout, **kwargs),
+                timeout=timeout, retry_on=(requests.exceptions.RequestException,),
+                retry_if=lambda response: response.status_code == 429 or response.status_code >= 500)
@@ -0,0 +1,174 @@
+import os
+import sys
+import asyncio
+import importlib
+
+import metrics
+
+# notifier (telegram) und marketdata (pandas, yfinance) werden erst importiert, wenn eine
+# Strategie fällig ist, damit Läufe ohne fällige Strategie sofort enden.
+
+TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Zeitbudget des ganzen Laufs in Sekunden (0 = unbegrenzt). Danach werden die übrigen
+# Strategien abgebrochen und bereits eingereihte Nachrichten noch zugestellt; run() wartet
+# nicht auf die abgebrochene Strategie. Das Budget ist eine Obergrenze nach bestem Bemühen:
+# Ein Thread, der gerade build_message ausführt, lässt sich nicht unterbrechen und läuft
+# bis zum Ende seines aktuellen Schritts weiter (Downloads enden mit ihrem eigenen Timeout);
+# erst danach endet der Prozess.
+RUN_TIME_BUDGET = float(os.getenv("RUN_TIME_BUDGET", "0"))
+
+# Die Strategie-Skripte, die als Plugins geladen werden. Jedes Modul stellt bereit:
+# - DATA_REQUIREMENTS: Dict Symbol -> yfinance-Zeitraum, der vorab geladen wird
+# - is_due(today): Kalenderbedingung, ob die Strategie heute ausgeführt wird
+# - build_message(provider): führt die Strategie mit den Daten von `provider` (siehe
+#   providers.py) aus und gibt die Nachricht zurück (oder None)
+# - CHAT_ID und optional PARSE_MODE für die Telegram-Nachricht
+# - optional stream(send, provider): Coroutine statt build_message, die ihre Nachrichten
+#   über send(text) verschickt, sobald sie feststehen (siehe swings.stream)
+STRATEGY_MODULES = ["tt", "npm", "pcr", "bm", "bm_pt", "tom", "swings", "positions"]
+
+
+def load_strategies(names=None):
+    """Importiert die angegebenen (oder alle) Strategie-Module."""
+    return [importlib.import_module(name) for name in (names or STRATEGY_MODULES)]
+
+
+def collect_data_requirements(strategies):
+    """Vereinigt die Datenanforderungen aller Strategien zu Symbol -> längstem Zeitraum."""
+    from marketdata import period_start
+
+    requirements = {}
+    for strategy in strategies:
+        for symbol, period in strategy.DATA_REQUIREMENTS.items():
+            current = requirements.get(symbol)
+            if current is None or period_start(period) < period_start(current):
+                requirements[symbol] = period
+    return requirements
+
+
+def prefetch(requirements, provider=None):
+    """
+    Lädt alle benötigten Symbole in einer Anfrage in den lokalen Kursdaten-Speicher.
+    Die Strategien lesen ihre Daten danach ohne weiteren Download aus dem Speicher.
+    """
+    from marketdata import period_start
+    from providers import default_provider
+
+    provider = provider or default_provider()
+
+    if not requirements:
+        return {}
+    longest_period = min(requirements.values(), key=period_start)
+    print(
+        f"Lade {len(requirements)} Symbole ({longest_period}) für alle Strategien...", file=sys.stderr)
+    with metrics.stage("runner.prefetch", symbols=len(requirements)):
+        _, errors = provider.load_histories(list(requirements), period=longest_period)
+    for symbol, error in errors.items():
+        print(f"Keine Daten für {symbol}: {error}", file=sys.stderr)
+    return errors
+
+
+def run(names=None, today=None, provider=None, budget=None):
+    """
+    Führt alle heute fälligen Strategien mit einem gemeinsamen Datenstand aus. Ohne
+    `today` gilt die aktuelle Zeit des Providers (bei Replay der Stichtag), ohne
+    `budget` RUN_TIME_BUDGET.
+    """
+    from providers import default_provider
+
+    provider = provider or default_provider()
+    today = today or provider.now()
+    strategies = load_strategies(names)
+    due = [strategy for strategy in strategies if strategy.is_due(today)]
+    if not due:
+        print(f"Heute ({today.strftime('%A, %d.%m.%Y')}) ist keine Strategie fällig.")
+        return
+
+    print(
+        f"Fällige Strategien: {', '.join(strategy.__name__ for strategy in due)}", file=sys.stderr)
+    # Nur ein dauerhafter Speicher profitiert vom gemeinsamen Vorladen
+    if provider.persistent:
+        prefetch(collect_data_requirements(due), provider)
+
+    asyncio.run(run_strategies(due, provider, RUN_TIME_BUDGET if budget is None else budget))
+
+
+async def run_strategies(due, provider, budget=0):
+    """
+    Führt die Strategien nacheinander aus und verschickt jede Nachricht sofort über eine
+    gemeinsame Notifier-Sitzung, während die nächste Strategie bereits rechnet.
+    """
+    import contextlib
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    # Eigener Pool statt des Standard-Executors, auf dessen Threads asyncio.run() wartet
+    executor = ThreadPoolExecutor(1)
+    async with contextlib.AsyncExitStack() as stack:
+        notifier = await open_notifier(stack)
+
+        try:
+            async with asyncio.timeout(budget or None):
+                for strategy in due:
+                    await run_strategy(strategy, provider, loop,
+                                        lambda text, s=strategy: deliver(s, text, notifier), executor)
+        except TimeoutError:
+            metrics.count("runner.timeout")
+            print(f"Zeitbudget von {budget:g} s überschritten, Lauf abgebrochen.", file=sys.stderr)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if notifier is not None:
+            # Restliche Nachrichten zustellen
+            with metrics.stage("runner.notify"):
+                await notifier.flush()
+
+
+async def open_notifier(stack):
+    """Öffnet die Telegram-Sitzung in `stack` (None ohne TELEGRAM_BOT_TOKEN oder bei Fehlern)."""
+    if not TOKEN:
+        return None
+    from notifier import Notifier
+    try:
+        return await stack.enter_async_context(Notifier(TOKEN))
+    except Exception as e:
+        print(f"Failed to send Telegram notification: {e}")
+        return None
+
+
+def deliver(strategy, message, notifier):
+    """Gibt die Nachricht einer Strategie aus und reiht sie beim Notifier ein."""
+    print(message)
+    if not strategy.CHAT_ID:
+        print(f"Keine Chat-ID für '{strategy.__name__}' gesetzt. Skipping notification.")
+    elif notifier is not None:
+        notifier.send(strategy.CHAT_ID, message, getattr(strategy, "PARSE_MODE", None))
+    else:
+        print("Telegram environment variable TELEGRAM_BOT_TOKEN not set. Skipping notification.")
+
+
+async def run_strategy(strategy, provider, loop, send, executor=None):
+    """
+    Führt eine Strategie aus und übergibt ihre Nachricht (oder die Absturzmeldung) an send.
+    build_message läuft in `executor` (Standard: Executor der Event-Loop).
+    """
+    try:
+        with metrics.stage(f"strategy.{strategy.__name__}"):
+            if hasattr(strategy, "stream"):
+                # Die Strategie verschickt ihre Nachrichten selbst
+                if not await strategy.stream(send, provider):
+                    print(f"{strategy.__name__}: keine Nachricht.")
+                return
+            message = await loop.run_in_executor(executor, strategy.build_message, provider)
+    except Exception as e:
+        metrics.count("runner.crashed")
+        message = f"Das Skript '{strategy.__name__}.py' ist abgestürzt: {e}"
+    if not message:
+        print(f"{strategy.__name__}: keine Nachricht.")
+        return
+    send(message)
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    # Optional: Namen der auszuführenden Strategien, z.B. "python runner.py swings"
+    run(sys.argv[1:] or None)
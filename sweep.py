@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+import backtest
+
+# --- Parameter-Sweep über die Signalschwellen ---
+# Die parameterunabhängigen Arrays einer Strategie (Kurse, Indikatoren, R2) werden einmal
+# berechnet und in Shared Memory abgelegt. Die Worker eines Prozess-Pools lesen sie dort
+# ohne Kopie und werten jeweils einen Block von Parameterkombinationen aus.
+#
+# Die Rangliste sortiert standardmäßig nach der Gesamtrendite der täglich bewerteten
+# Kapitalkurve (backtest.equity_curve), in der sich überlappende Trades das Kapital
+# teilen. Kombinationen mit weniger als MIN_TRADES abgeschlossenen Trades werden nicht
+# gewertet, da ihre Kennzahlen auf zu wenigen Trades beruhen.
+
+MIN_TRADES = 10
+
+# Wird im Worker-Prozess von _init_worker gesetzt
+_worker = {}
+
+
+def parse_grid(specs):
+    """
+    Liest Gitterangaben wie "rsi_max=5,10,15" oder "adx_min=15:30:5" (Ende inklusive)
+    und gibt ein Dict Parameter -> Liste von Werten zurück.
+    """
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if not values:
+            raise ValueError(f"Ungültige Gitterangabe: {spec} (erwartet name=a,b,c oder name=start:stop:step)")
+        if ":" in values:
+            start, stop, step = (float(value) for value in values.split(":"))
+            numbers = np.arange(start, stop + step / 2, step).round(10).tolist()
+        else:
+            numbers = [float(value) for value in values.split(",")]
+        grid[name] = [int(number) if float(number).is_integer() else number for number in numbers]
+    return grid
+
+
+def combinations(grid):
+    """Alle Kombinationen des Gitters als Liste von Dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def share_features(features):
+    """
+    Kopiert alle Arrays von `features` in Shared-Memory-Segmente. Gibt eine picklebare
+    Beschreibung für die Worker und die Segmente zurück (zum Freigeben mit release()).
+    """
+    descriptor = {}
+    segments = []
+    for key, value in features.items():
+        if isinstance(value, np.ndarray):
+            segment = shared_memory.SharedMemory(create=True, size=max(value.nbytes, 1))
+            np.ndarray(value.shape, dtype=value.dtype, buffer=segment.buf)[...] = value
+            descriptor[key] = ("array", segment.name, value.shape, value.dtype.str)
+            segments.append(segment)
+        else:
+            descriptor[key] = ("value", value)
+    return descriptor, segments
+
+
+def attach_features(descriptor):
+    """Baut die Arrays im Worker als Sichten auf die Shared-Memory-Segmente auf."""
+    features = {}
+    segments = []
+    for key, (kind, *details) in descriptor.items():
+        if kind == "value":
+            features[key] = details[0]
+            continue
+        name, shape, dtype = details
+        # Die Worker teilen sich den Resource Tracker des Hauptprozesses, der die Segmente
+        # in release() freigibt.
+        segment = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+        array.flags.writeable = False
+        features[key] = array
+        segments.append(segment)
+    return features, segments
+
+
+def release(segments):
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+
+def _init_worker(name, descriptor):
+    features, segments = attach_features(descriptor)
+    _worker.update(name=name, features=features, segments=segments)
+
+
+def _evaluate_chunk(chunk):
+    rows = []
+    for params in chunk:
+        trades = backtest.evaluate(_worker["name"], _worker["features"], params)
+        equity = backtest.equity_curve(trades, _worker["features"])
+        rows.append({**params, **backtest.summarize(trades, equity)})
+    return rows
+
+
+def sweep(name, features, grid, workers=None):
+    """Wertet alle Kombinationen des Gitters parallel aus und gibt eine Ergebnistabelle zurück."""
+    combos = combinations(grid)
+    workers = workers or os.cpu_count() or 1
+    # Mehrere Blöcke je Worker, damit langsame Kombinationen (viele Trades) verteilt werden
+    chunk_size = max(1, len(combos) // (workers * 8))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    descriptor, segments = share_features(features)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(name, descriptor)) as executor:
+            for chunk_rows in executor.map(_evaluate_chunk, chunks):
+                rows.extend(chunk_rows)
+                print(f"\r{len(rows)}/{len(combos)} Kombinationen ausgewertet", end="", file=sys.stderr)
+        print(file=sys.stderr)
+    finally:
+        release(segments)
+    return pd.DataFrame(rows)
+
+
+def rank(results, sort="total_return", min_trades=MIN_TRADES):
+    """
+    Sortiert die Ergebnisse absteigend nach `sort` (bei Gleichstand nach Ø Rendite je
+    Trade); Kombinationen mit zu wenigen Trades fallen raus.
+    """
+    results = results[results["trades"] >= min_trades]
+    keys = [sort] if sort == "avg_return" else [sort, "avg_return"]
+    return results.sort_values(keys, ascending=False, na_position="last").reset_index(drop=True)
+
+
+# --- Hauptlogik ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter-Sweep der Signalschwellen auf lokalen Kursdaten.")
+    parser.add_argument("data", help="Kursdatei (Parquet/CSV: Date, Symbol, Open, High, Low, Close, Volume)")
+    parser.add_argument("strategy", choices=list(backtest.BACKTESTS))
+    parser.add_argument("grid", nargs="+", help="z.B. rsi_max=5:15:1 adx_min=15,20,25")
+    parser.add_argument("--pcr", help="lokale Kopie von PCR_Index.TXT für die LPCR-Strategie")
+    parser.add_argument("--workers", type=int, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--sort", default="total_return",
+                        choices=["total_return", "hit_rate", "avg_return", "max_drawdown", "trades"])
+    parser.add_argument("--min-trades", type=int, default=MIN_TRADES,
+                        help="Mindestanzahl abgeschlossener Trades (Standard: %(default)s)")
+    parser.add_argument("--out", help="CSV-Datei für die Rangliste (Standard: sweep_<strategie>.csv)")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+    unknown = [key for key in grid if key not in backtest.DEFAULT_PARAMS[args.strategy]]
+    if unknown:
+        parser.error(f"Unbekannte Parameter für '{args.strategy}': {', '.join(unknown)} "
+                     f"(möglich: {', '.join(backtest.DEFAULT_PARAMS[args.strategy])})")
+
+    started = time.monotonic()
+    panel = backtest.load_data(args.data)
+    pcr = backtest.load_pcr(args.pcr) if args.pcr else None
+    prepare = backtest.BACKTESTS[args.strategy][0]
+    features = prepare(panel, pcr=pcr, grid=grid)
+    print(f"Vorbereitung: {time.monotonic() - started:.1f} s", file=sys.stderr)
+
+    results = rank(sweep(args.strategy, features, grid, args.workers), args.sort, args.min_trades)
+    out = args.out or f"sweep_{args.strategy}.csv"
+    results.to_csv(out, index=False)
+    print(f"{len(results)} Kombinationen in {time.monotonic() - started:.1f} s, Rangliste in {out}")
+    print(results.head(10).to_string(index=False))
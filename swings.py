@@ -1,209 +1,711 @@
 # coding: utf-8
 import warnings
-import requests
-from bs4 import BeautifulSoup
-import re
 import sys
-import yfinance as yf
-import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-from ta.momentum import RSIIndicator, ROCIndicator
-from ta.trend import ADXIndicator
 import os
 import asyncio
-from telegram import Bot
+from datetime import datetime
+
+import tradingcalendar
+
+# Schwere Module (numpy, pandas, requests, telegram, marketdata) werden erst
+# in den Funktionen importiert, damit die Kalenderprüfung ohne Importkosten läuft.
 
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("SWING_CHAT_ID")
 
+# Signal-Schwellen (auch Standardwerte für backtest.py / sweep.py)
+R2_THRESHOLD = 85
+RSI_THRESHOLD = 10
+ADX_THRESHOLD = 20
+# Fortlaufend gespeicherte Indikatoren (siehe indicatorstate.py)
+INDICATORS = [("rsi", 2), ("adx", 14), ("roc", 250)]
+
+# Große Universen werden blockweise geladen und analysiert. SWING_CHUNK_SIZE legt die
+# Blockgröße fest; sonst wird sie aus dem Speicherlimit (MB) abgeleitet.
+CHUNK_SIZE = int(os.getenv("SWING_CHUNK_SIZE", "0"))
+MEMORY_LIMIT_MB = int(os.getenv("SWING_MEMORY_LIMIT_MB", "1024"))
+# Geschätzter Speicherbedarf je Ticker und Bar über alle Stufen (Historie beim Laden,
+# float32-Panel, R2-Summen, Indikatoren) und Anzahl Bars für "500d" mit Reserve
+BYTES_PER_BAR = 256
+HISTORY_BARS = 500
+# Optionale Worker-Prozesse (0 oder 1 = alles im Hauptprozess). Jeder Worker lädt einen
+# Teil der Ticker und wertet ihn vollständig aus (Indikatoren, Filter, R2 für die
+# verbliebenen Ticker); zurück gehen nur Signale, Fehler und der fortgeschriebene
+# Indikator-Zustand, den der Hauptprozess als einziger speichert.
+WORKERS = int(os.getenv("SWING_WORKERS", "0"))
+# Teilstücke je Worker und Block, damit langsame Teilstücke die Last nicht ungleich verteilen
+SHARDS_PER_WORKER = 4
+# Asynchrone Pipeline (stream): Plätze je Warteschlange zwischen den Stufen, gleichzeitig
+# geladene Batches und Zeitbudget des ganzen Laufs in Sekunden (0 = unbegrenzt)
+QUEUE_SIZE = 1
+FETCH_CONCURRENCY = int(os.getenv("SWING_FETCH_CONCURRENCY", "2"))
+TIME_BUDGET = float(os.getenv("SWING_TIME_BUDGET", "0"))
+
+
+def scrape_finviz_tickers(screener_url="mid_cap", provider=None):
+    """
+    Scrapes ticker symbols from one or more Finviz screener URLs (or names from
+    finviz.SCREENER_URLS), following all result pages.
+    """
+    from finviz import resolve_screener_urls
+    from providers import default_provider
 
-async def send_telegram_message(text):
-    """Sends a message to a Telegram chat."""
-    if not TOKEN or not CHAT_ID:
-        print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
-        return
+    provider = provider or default_provider()
     try:
-        bot = Bot(token=TOKEN)
-        await bot.send_message(chat_id=CHAT_ID, text=text)
-        print("Telegram notification sent successfully.")
+        print(f"Starte Ticker-Scraping von Finviz...", file=sys.stderr)
+        tickers = provider.screener_tickers(resolve_screener_urls(screener_url))
+        print(
+            f"Erfolgreich {len(tickers)} Ticker von Finviz gescraped.", file=sys.stderr)
+        return tickers  # Unique tickers
+
     except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+        print(
+            f"Ein unerwarteter Fehler beim Scrapen ist aufgetreten: {e}", file=sys.stderr)
+        return []
+
 
-# Suppress pandas warnings
-warnings.filterwarnings('ignore', category=pd.errors.PerformanceWarning)
+def calculate_best_r2_matrix(close_matrix, min_length=100):
+    """
+    Berechnet das beste R2 eines linearen Trends über alle Endstücke für jede Zeile
+    einer Kursmatrix (Ticker × Tage) und gibt (best_r2, best_length) als Arrays zurück.
+
+    Für jede Länge L werden kumulative Summen von y, y² und x·y über die umgekehrte
+    Reihe gebildet, sodass alle Längen aller Ticker in einem vektorisierten Durchlauf
+    ausgewertet werden. NaNs (fehlende Historie am Anfang, Lücken) werden je Zeile wie
+    bei dropna() entfernt; Zeilen mit weniger als `min_length` gültigen Werten erhalten
+    -inf und Länge 0. Das Ergebnis entspricht LinearRegression().fit(x, y).score(x, y)
+    für jede Länge.
+    """
+    import numpy as np
+
+    y = np.atleast_2d(np.asarray(close_matrix, dtype=np.float64))
+    n_rows, n_cols = y.shape
+    best_r2 = np.full(n_rows, -np.inf)
+    best_length = np.zeros(n_rows, dtype=np.int64)
+    if n_cols < min_length:
+        return best_r2, best_length
+
+    # Gültige Werte je Zeile stabil nach rechts schieben (entspricht dropna()),
+    # danach umkehren: Präfix der Länge L entspricht dem Endstück der Länge L.
+    valid = ~np.isnan(y)
+    order = np.argsort(valid, axis=1, kind='stable')
+    r = np.take_along_axis(y, order, axis=1)[:, ::-1]
+    counts = valid.sum(axis=1)
+    mask = np.arange(n_cols) < counts[:, None]
+
+    # Zentrieren verringert die Auslöschung in den Summen, R2 bleibt unverändert.
+    row_means = np.nansum(y, axis=1) / np.maximum(counts, 1)
+    r = np.where(mask, r - row_means[:, None], 0.0)
+
+    k = np.arange(n_cols, dtype=np.float64)
+    lengths = k + 1
+
+    sum_y = np.cumsum(r, axis=1)
+    sum_yy = np.cumsum(r * r, axis=1)
+    sum_xy = np.cumsum(k * r, axis=1)
+    sum_x = k * lengths / 2
+    sum_xx = k * lengths * (2 * k + 1) / 6
+
+    cov_xy = sum_xy - sum_x * sum_y / lengths
+    var_x = sum_xx - sum_x * sum_x / lengths
+    var_y = sum_yy - sum_y * sum_y / lengths
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(var_y > 0, cov_xy * cov_xy / (var_x * var_y), 1.0)
+
+    candidates = np.where(mask, r2, -np.inf)[:, min_length - 1:]
+    best_index = np.argmax(candidates, axis=1)
+    has_data = counts >= min_length
+    best_r2[has_data] = candidates[has_data, best_index[has_data]]
+    best_length[has_data] = best_index[has_data] + min_length
+    return best_r2, best_length
+
+
+def calculate_best_r2(close_values, min_length=100):
+    """
+    Berechnet das beste R2 für eine einzelne Kursreihe und gibt (best_r2, best_length)
+    zurück. Siehe calculate_best_r2_matrix.
+    """
+    import numpy as np
 
+    best_r2, best_length = calculate_best_r2_matrix(
+        np.asarray(close_values, dtype=np.float64)[None, :], min_length)
+    return float(best_r2[0]), int(best_length[0])
 
-def scrape_finviz_tickers(screener_url="mid_cap"):
+
+def swing_pipeline():
+    """
+    Signalbedingungen als Filter-Pipeline (siehe filters.py). Die Indikatoren liegen für
+    alle Ticker bereits vor; R2 wird erst für die Ticker berechnet, die alle anderen
+    Bedingungen erfüllen.
+    """
+    from filters import Pipeline, Predicate
+
+    def best_r2(data, rows):
+        close = data["close"][data["panel_rows"][rows]]
+        r2_values, _ = calculate_best_r2_matrix(close, min_length=100)
+        # Normalize R2 score to be between 0 and 100
+        data["r2"][rows] = r2_values * 100
+        return data["r2"][rows] > R2_THRESHOLD
+
+    return Pipeline("swings", [
+        Predicate("rsi2", lambda data, rows: data["rsi"][rows] < RSI_THRESHOLD, selectivity=0.1),
+        Predicate("adx14", lambda data, rows: data["adx"][rows] > ADX_THRESHOLD, selectivity=0.5),
+        Predicate("roc250", lambda data, rows: data["roc"][rows] > 0, selectivity=0.6),
+        # Need enough data for ROC(250)
+        Predicate("history", lambda data, rows: data["bar_counts"][rows] >= 250, selectivity=0.95),
+        # Kumulative Summen über alle Längen für jede Zeile
+        Predicate("r2", best_r2, cost=200, selectivity=0.2),
+    ])
+
+
+def _run_pipeline(tickers, panel, rsi_values, adx_values, roc_values, bar_counts):
+    """
+    Wertet swing_pipeline für `tickers` aus und gibt (Signale, eliminated, Anzahl R2)
+    zurück; Signale als (Ticker, R2, ADX, RSI(2), ROC(250)) in Ticker-Reihenfolge.
     """
-    Scrapes ticker symbols from a specific Finviz screener URL.
-    This version is adapted to only use one pre-defined URL.
+    import numpy as np
+
+    pipeline = swing_pipeline()
+    data = {"rsi": rsi_values, "adx": adx_values, "roc": roc_values, "bar_counts": bar_counts,
+            "close": panel.matrix("Close"),
+            "panel_rows": np.array([panel.index[ticker] for ticker in tickers], dtype=np.int64),
+            "r2": np.full(len(tickers), np.nan)}
+    survivors, eliminated, _ = pipeline.run(tickers, data)
+    signals = [(tickers[i], float(data["r2"][i]), float(adx_values[i]), float(rsi_values[i]),
+                float(roc_values[i])) for i in survivors]
+    return signals, eliminated, int(np.isfinite(data["r2"]).sum())
+
+
+def _print_signals(signals):
+    for ticker, r2, adx, rsi, roc in signals:
+        print(f"--- SIGNAL FOUND for {ticker} ---", file=sys.stderr)
+        print(f"  R2: {r2:.2f}", file=sys.stderr)
+        print(f"  ADX: {adx:.2f}", file=sys.stderr)
+        print(f"  RSI(2): {rsi:.2f}", file=sys.stderr)
+        print(f"  ROC(250): {roc:.2f}", file=sys.stderr)
+        print(f"----------------------", file=sys.stderr)
+
+
+def filter_signals(tickers, panel, rsi_values, adx_values, roc_values, bar_counts):
     """
-    # URL for all-time high scan
-    url = "https://finviz.com/screener.ashx?v=411&f=cap_midover,ipodate_more5,sh_avgvol_o300,sh_opt_option,ta_alltime_b0to10h&ft=4"
+    Prüft die Signalbedingungen (RSI(2), ADX(14), ROC(250), R2) für alle Ticker anhand
+    der Indikatoren (Arrays in der Reihenfolge von `tickers`) und der Schlusskurse in
+    `panel` und gibt die Ticker mit Signal zurück.
+    """
+    import metrics
 
-    # Finviz requires a User-Agent header
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    signals, eliminated, r2_fits = _run_pipeline(tickers, panel, rsi_values, adx_values, roc_values, bar_counts)
+    for line in swing_pipeline().describe(len(tickers), eliminated):
+        print(line, file=sys.stderr)
+    metrics.count("swings.r2_fits", r2_fits)
+    _print_signals(signals)
+    return [signal[0] for signal in signals]
 
-    try:
-        print(f"Starte Ticker-Scraping von Finviz...", file=sys.stderr)
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        tickers = []
-        # The tickers are in 'a' tags with class 'screener-link-primary'
-        for link in soup.find_all('a', class_='screener-link-primary'):
-            tickers.append(link.get_text())
-
-        # Fallback for pages with a different structure
-        if not tickers:
-            tickers_container = soup.find('td', class_='screener_tickers')
-            if tickers_container:
-                for span in tickers_container.find_all('span'):
-                    onclick_attr = span.get('onclick')
-                    if onclick_attr:
-                        match = re.search(
-                            r"quote\.ashx\?t=([^&]+)", onclick_attr)
-                        if match:
-                            tickers.append(match.group(1))
 
-        print(
-            f"Erfolgreich {len(tickers)} Ticker von Finviz gescraped.", file=sys.stderr)
-        return list(set(tickers))  # Return unique tickers
+def chunk_size_for(memory_limit_mb, bars=HISTORY_BARS):
+    """
+    Blockgröße (Ticker), bei der die Kursdaten zweier Blöcke - einer wird analysiert,
+    der nächste geladen - zusammen unter `memory_limit_mb` bleiben.
+    """
+    return max(1, int(memory_limit_mb * 2**20 // (2 * BYTES_PER_BAR * bars)))
 
-    except requests.exceptions.RequestException as e:
-        print(f"Fehler beim Abrufen der Finviz-URL: {e}", file=sys.stderr)
-        return []
-    except Exception as e:
-        print(
-            f"Ein unerwarteter Fehler beim Scrapen ist aufgetreten: {e}", file=sys.stderr)
+
+def evaluate(tickers, panel, persist=True):
+    """
+    Berechnet RSI(2), ADX(14) und ROC(250) für einen Block (panel.Panel mit einer Zeile
+    je Ticker) und wertet die Filter-Pipeline aus (R2 nur für die verbliebenen, siehe
+    swing_pipeline). Ohne Ausgabe, damit auch Worker-Prozesse sie aufrufen können.
+
+    Gibt ein Dict zurück: tickers (Anzahl), signals (siehe _run_pipeline), eliminated
+    (je Stufe), r2_fits und short_history (Ticker mit weniger als 250 Bars).
+    """
+    import indicatorstate
+    import metrics
+
+    # --- Indicator Calculation (ADX, RSI & ROC) for all tickers at once ---
+    # Der gespeicherte Zustand wird nur um die seit dem letzten Lauf neuen Bars fortgeschrieben.
+    with metrics.stage("swings.indicators", symbols=len(tickers)):
+        current = indicatorstate.latest(panel, INDICATORS, symbols=tickers, persist=persist)
+    rsi_values, bar_counts = current[("rsi", 2)]
+    adx_values, _ = current[("adx", 14)]
+    roc_values, _ = current[("roc", 250)]
+
+    # --- Filter: billige Bedingungen zuerst, R2 nur für die verbliebenen Ticker ---
+    with metrics.stage("swings.filters"):
+        signals, eliminated, r2_fits = _run_pipeline(
+            tickers, panel, rsi_values, adx_values, roc_values, bar_counts)
+    return {"tickers": len(tickers), "signals": signals, "eliminated": eliminated,
+            "r2_fits": r2_fits, "short_history": int((bar_counts < 250).sum())}
+
+
+def report(result):
+    """Gibt das Ergebnis von evaluate() aus, zählt die Metriken und gibt die Signal-Ticker zurück."""
+    import metrics
+
+    for line in swing_pipeline().describe(result["tickers"], result["eliminated"]):
+        print(line, file=sys.stderr)
+    metrics.count("swings.skipped_short_history", result["short_history"])
+    metrics.count("swings.r2_fits", result["r2_fits"])
+    _print_signals(result["signals"])
+    return [signal[0] for signal in result["signals"]]
+
+
+def analyze_chunk(tickers, panel, provider):
+    """
+    Berechnet RSI(2), ADX(14) und ROC(250) für einen Block (panel.Panel mit einer Zeile
+    je Ticker), filtert die Ticker (R2 nur für die verbliebenen, siehe swing_pipeline)
+    und gibt die Signale zurück.
+    """
+    if not len(panel.dates):
         return []
+    return report(evaluate(tickers, panel, persist=provider.persistent))
+
+
+# Zustand eines Worker-Prozesses (siehe _init_worker)
+_worker = {}
+
+
+def _init_worker(provider):
+    """Übergibt den Provider einmal je Worker-Prozess statt mit jeder Aufgabe."""
+    _worker["provider"] = provider
+
+
+def _analyze_shard(tickers, states):
+    """
+    Worker: lädt `tickers` und wertet sie aus (siehe evaluate). `states` ist der
+    Indikator-Zustand dieser Ticker aus dem Hauptprozess (indicatorstate.export, None
+    ohne dauerhaften Provider). Gibt (Ergebnis oder None ohne Daten, errors,
+    fortgeschriebene Zustände) zurück.
+    """
+    import indicatorstate
+    from panel import Panel
+
+    # Load 500 days of data (local store, only missing bars are downloaded)
+    histories, load_errors = _worker["provider"].load_histories(tickers, period="500d")
+    panel = Panel.from_histories(histories, tickers)
+    del histories
+    if not len(panel.dates):
+        return None, load_errors, {}
+    if states is None:
+        return evaluate(tickers, panel, persist=False), load_errors, {}
+    with indicatorstate.session(states) as updated:
+        result = evaluate(tickers, panel)
+    return result, load_errors, updated
+
+
+def _submit_shards(executor, chunk, shards, persist):
+    """
+    Verteilt einen Block in zusammenhängenden Teilstücken auf die Worker, jeweils mit
+    dem Indikator-Zustand seiner Ticker (nur mit `persist`).
+    """
+    import indicatorstate
+
+    size = -(-len(chunk) // shards)
+    parts = [chunk[i:i + size] for i in range(0, len(chunk), size)]
+    return [(part, executor.submit(_analyze_shard, part,
+                                   indicatorstate.export(INDICATORS, part) if persist else None))
+            for part in parts]
+
+
+def _collect_shards(pending):
+    """
+    Wartet auf die Teilstücke eines Blocks, übernimmt ihren Indikator-Zustand und fügt
+    die Ergebnisse in Auftragsreihenfolge zusammen; gibt (Ergebnis wie bei evaluate oder
+    None ohne Daten, errors) zurück. Schlägt ein Teilstück fehl, erhalten seine Ticker
+    einen Fehler.
+    """
+    import indicatorstate
+    import metrics
+
+    result, errors = None, {}
+    for part, future in pending:
+        symbols = list(dict.fromkeys(part))
+        try:
+            shard, load_errors, states = future.result()
+        except Exception as e:
+            print(f"Fehler im Worker für {len(symbols)} Ticker ({symbols[0]} bis {symbols[-1]}): {e}",
+                  file=sys.stderr)
+            errors.update({symbol: f"Fehler im Worker: {e}" for symbol in symbols})
+            continue
+        errors.update(load_errors)
+        indicatorstate.merge(states)
+        if shard is None:
+            continue
+        # Die Zähler der Pipeline entstehen im Worker-Prozess und werden hier erfasst
+        for name, dropped in shard["eliminated"].items():
+            metrics.count(f"swings.filter.{name}", dropped)
+        if result is None:
+            result = shard
+            continue
+        result = {"tickers": result["tickers"] + shard["tickers"],
+                  "signals": result["signals"] + shard["signals"],
+                  "eliminated": {name: dropped + shard["eliminated"][name]
+                                 for name, dropped in result["eliminated"].items()},
+                  "r2_fits": result["r2_fits"] + shard["r2_fits"],
+                  "short_history": result["short_history"] + shard["short_history"]}
+    return result, errors
+
+
+def load_panel(provider, tickers):
+    """Lädt 500 Tage für `tickers` und gibt (Panel, errors) zurück."""
+    from panel import Panel
+    import metrics
+
+    # Load 500 days of data (local store, only missing bars are downloaded)
+    histories, load_errors = provider.load_histories(tickers, period="500d")
+    with metrics.stage("swings.build_panel"):
+        return Panel.from_histories(histories, tickers), load_errors
+
 
+def _process_pool(provider, workers):
+    """Prozess-Pool für `workers` > 1, sonst None."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
 
-def run_analysis(tickers):
+    if workers <= 1:
+        return None
+    # "spawn" statt fork: pyarrow und andere Bibliotheken laufen bereits mit eigenen Threads
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(provider,))
+
+
+def _load_chunks(provider, chunks):
+    """
+    Lädt die Blöcke nacheinander und gibt (Ticker, Panel, errors) zurück. Der
+    nächste Block wird im Hintergrund geladen und in ein kompaktes float32-Panel
+    umgewandelt, während der aktuelle analysiert wird; es sind also höchstens zwei
+    Blöcke gleichzeitig im Speicher, die DataFrames nur während des Ladens.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    loader = ThreadPoolExecutor(max_workers=1)
+    pending = loader.submit(load_panel, provider, chunks[0]) if chunks else None
+    try:
+        for i, chunk in enumerate(chunks):
+            current, pending = pending, None
+            panel, load_errors = current.result()
+            pending = loader.submit(load_panel, provider, chunks[i + 1]) if i + 1 < len(chunks) else None
+            yield chunk, panel, load_errors
+            del panel, load_errors
+    finally:
+        loader.shutdown(cancel_futures=True)
+
+
+def _evaluate_chunks(executor, chunks, shards, persist):
+    """
+    Worker-Modus von iter_signals: Die Teilstücke jedes Blocks werden in den Worker-
+    Prozessen geladen und ausgewertet; die Teilstücke des nächsten Blocks werden
+    eingereicht, bevor die des aktuellen eingesammelt sind. Gibt (Ergebnis, errors) je
+    Block zurück (siehe _collect_shards).
+    """
+    pending = _submit_shards(executor, chunks[0], shards, persist) if chunks else None
+    try:
+        for i, chunk in enumerate(chunks):
+            current, pending = pending, None
+            # Nächsten Block einreichen, solange die Worker den aktuellen noch rechnen
+            pending = _submit_shards(executor, chunks[i + 1], shards, persist) if i + 1 < len(chunks) else None
+            yield _collect_shards(current)
+    finally:
+        for _, future in pending or []:
+            future.cancel()
+
+
+def iter_signals(tickers, provider=None, chunk_size=None, workers=None):
+    """
+    Analysiert die Ticker blockweise (laden → berechnen → Signale ausgeben → freigeben)
+    und gibt die Signale jedes Blocks aus, sobald er fertig ist. Ohne `chunk_size`
+    gilt CHUNK_SIZE bzw. die aus MEMORY_LIMIT_MB abgeleitete Blockgröße.
+
+    Mit mehr als einem Worker (`workers`, Standard WORKERS) laden und bewerten Worker-
+    Prozesse die Blöcke in Teilstücken (Indikatoren, Filter und R2, siehe
+    _analyze_shard); der Hauptprozess übergibt und übernimmt nur den Indikator-Zustand.
+    Signale und Fehler erscheinen in beiden Fällen in der Reihenfolge der Ticker.
+    """
+    from providers import default_provider
+
+    provider = provider or default_provider()
+    workers = WORKERS if workers is None else workers
+    chunk_size = chunk_size or CHUNK_SIZE or chunk_size_for(MEMORY_LIMIT_MB)
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    if len(chunks) > 1:
+        print(f"Analysiere {len(tickers)} Ticker in {len(chunks)} Blöcken zu je {chunk_size}.",
+              file=sys.stderr)
+
+    executor = _process_pool(provider, workers)
+    try:
+        if executor is not None:
+            for result, load_errors in _evaluate_chunks(
+                    executor, chunks, workers * SHARDS_PER_WORKER, provider.persistent):
+                _print_load_errors(load_errors)
+                if result is None:
+                    print("Fehler: Keine Daten für die angegebenen Ticker erhalten.", file=sys.stderr)
+                    continue
+                yield report(result)
+            return
+
+        for chunk, panel, load_errors in _load_chunks(provider, chunks):
+            _print_load_errors(load_errors)
+            if not len(panel.dates):
+                print(
+                    "Fehler: Keine Daten für die angegebenen Ticker erhalten.", file=sys.stderr)
+                continue
+            signals = analyze_chunk(chunk, panel, provider)
+            # Block freigeben, bevor der übernächste Block geladen wird
+            del panel, load_errors
+            yield signals
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def _print_load_errors(load_errors):
+    if load_errors:
+        print(f"Keine Daten für {len(load_errors)} Ticker: {', '.join(load_errors)}", file=sys.stderr)
+
+
+def run_analysis(tickers, provider=None, chunk_size=None, workers=None):
     """
     Downloads data, calculates R2, and filters for signals based on R2, ADX, and RSI.
+    Returns the list of tickers with a signal. Die Kursdaten kommen von `provider`
+    (Standard: providers.default_provider()); große Universen werden blockweise
+    verarbeitet, optional mit mehreren Prozessen (siehe iter_signals).
     """
+    import pandas as pd
+    import indicatorstate
+    import metrics
+
+    # Suppress pandas warnings
+    warnings.filterwarnings('ignore', category=pd.errors.PerformanceWarning)
+
     if not tickers:
         print("Keine Ticker zum Analysieren vorhanden.", file=sys.stderr)
-        return
+        return []
 
     print(
         f"Lade historische Daten für {len(tickers)} Ticker herunter...", file=sys.stderr)
+    signal_tickers = []
     try:
-        # Download 500 days of data for all tickers at once
-        all_data = yf.download(tickers, period="500d",
-                               threads=True, progress=False)
-        if all_data.empty:
-            print(
-                "Fehler: Keine Daten für die angegebenen Ticker erhalten.", file=sys.stderr)
-            return
+        # Indikator-Zustand aller Blöcke im Speicher, geschrieben einmal am Ende
+        with indicatorstate.session():
+            for chunk_signals in iter_signals(tickers, provider, chunk_size, workers):
+                signal_tickers.extend(chunk_signals)
     except Exception as e:
         print(
-            f"Kritischer Fehler beim Herunterladen der Daten: {e}", file=sys.stderr)
-        return
+            f"Kritischer Fehler bei der Analyse: {e}", file=sys.stderr)
+        return signal_tickers
+    metrics.count("swings.signals", len(signal_tickers))
 
-    # Handle single vs. multi-ticker download format
-    if len(tickers) == 1:
-        all_data.columns = pd.MultiIndex.from_product(
-            [all_data.columns, [tickers[0]]])
+    print(
+        f"\nAnalyse abgeschlossen. {len(signal_tickers)} Signale gefunden.", file=sys.stderr)
 
-    print("Daten-Download abgeschlossen. Starte Analyse...", file=sys.stderr)
-    signal_count = 0
-    signal_tickers = [] # Initialize a list to store tickers with signals
+    return signal_tickers
 
-    for i, ticker in enumerate(tickers):
-        print(
-            f"Analysiere {ticker} ({i+1}/{len(tickers)})...", file=sys.stderr)
-        try:
-            # --- R2 Calculation ---
-            close_prices = all_data['Close'][ticker].dropna()
-            if len(close_prices) < 100:
+
+async def stream(send, provider=None, screener_url="mid_cap", batch_size=None, workers=None):
+    """
+    Asynchrone Pipeline mit begrenzten Warteschlangen zwischen den Stufen:
+
+        Finviz-Seiten → Ticker-Batches → Laden → Analyse → send(Text)
+
+    Ticker gehen in einen Batch, sobald ihre Seite geparst ist; bis zu FETCH_CONCURRENCY
+    Batches werden gleichzeitig geladen. Die Signale jedes Batches gehen an `send`,
+    sobald sie feststehen. Gibt alle Signal-Ticker in Batch-Reihenfolge zurück.
+
+    Wo die Analyse läuft:
+    - Mit `workers` > 1 (Standard WORKERS) laden und bewerten die Worker-Prozesse jeden
+      Batch in Teilstücken (Indikatoren, Filter, R2, siehe _analyze_shard); die Analyse
+      nutzt also mehrere Kerne. Die Stufe "Analyse" übernimmt nur noch den
+      fortgeschriebenen Indikator-Zustand und gibt die Signale aus.
+    - Ohne Worker läuft die Analyse in einem einzigen Thread, nacheinander je Batch, da
+      alle Batches denselben Indikator-Zustand fortschreiben. Sie überlappt dann nur mit
+      dem Laden (NumPy gibt den GIL in den Matrixoperationen frei), nutzt aber
+      höchstens einen Kern.
+
+    Der Indikator-Zustand bleibt bis zum Ende im Speicher (indicatorstate.session). Ein
+    Abbruch (z.B. Zeitbudget) beendet alle Stufen; laufende Downloads in den Threads
+    und laufende Teilstücke in den Worker-Prozessen werden nicht unterbrochen.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from finviz import resolve_screener_urls
+    from providers import default_provider
+    import indicatorstate
+    import metrics
+
+    provider = provider or default_provider()
+    # Gleichzeitig im Speicher: geladene Batches, einer in der Warteschlange, einer in Analyse
+    batch_size = batch_size or CHUNK_SIZE or \
+        max(1, chunk_size_for(MEMORY_LIMIT_MB) * 2 // (FETCH_CONCURRENCY + 2))
+    workers = WORKERS if workers is None else workers
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    pages, batches, loaded = (asyncio.Queue(QUEUE_SIZE) for _ in range(3))
+    results = {}
+
+    async def scrape():
+        print(f"Starte Ticker-Scraping von Finviz...", file=sys.stderr)
+        page_iterator = provider.iter_screener_pages(resolve_screener_urls(screener_url))
+        while (page := await loop.run_in_executor(io_pool, next, page_iterator, None)) is not None:
+            await pages.put(page)
+        await pages.put(None)
+
+    async def batch():
+        seen, buffer, index, done = set(), [], 0, False
+        while not done:
+            page = await pages.get()
+            done = page is None
+            buffer += [ticker for ticker in page or [] if ticker not in seen]
+            seen.update(page or [])
+            # Volle Batches sofort, den Rest, sobald keine weitere Seite bereitliegt
+            while len(buffer) >= batch_size or (buffer and (done or pages.empty())):
+                await batches.put((index, buffer[:batch_size]))
+                buffer, index = buffer[batch_size:], index + 1
+        print(f"{len(seen)} Ticker von Finviz in {index} Batch(es).", file=sys.stderr)
+        for _ in range(FETCH_CONCURRENCY):
+            await batches.put(None)
+
+    async def fetch():
+        while (item := await batches.get()) is not None:
+            index, tickers = item
+            if process_pool is not None:
+                # Laden und Auswerten in den Worker-Prozessen; eingesammelt wird in analyze()
+                pending = _submit_shards(process_pool, tickers, workers * SHARDS_PER_WORKER,
+                                         provider.persistent)
+                await asyncio.wait([asyncio.wrap_future(future) for _, future in pending])
+                await loaded.put((index, tickers, pending, None))
+                continue
+            try:
+                panel, load_errors = await loop.run_in_executor(io_pool, load_panel, provider, tickers)
+            except Exception as e:
+                print(f"Fehler beim Laden von Batch {index + 1}: {e}", file=sys.stderr)
                 continue
+            await loaded.put((index, tickers, panel, load_errors))
+        await loaded.put(None)
+
+    def evaluate_shards(pending):
+        result, load_errors = _collect_shards(pending)
+        _print_load_errors(load_errors)
+        return report(result) if result is not None else []
+
+    async def analyze():
+        finished = 0
+        while finished < FETCH_CONCURRENCY:
+            item = await loaded.get()
+            if item is None:
+                finished += 1
+                continue
+            index, tickers, payload, load_errors = item
+            del item
+            try:
+                if process_pool is not None:
+                    # Im Thread der Event-Loop, wie _submit_shards in fetch(): nur dieser
+                    # Thread liest und ändert den Indikator-Zustand
+                    signals = evaluate_shards(payload)
+                else:
+                    _print_load_errors(load_errors)
+                    signals = await loop.run_in_executor(cpu_pool, analyze_chunk, tickers, payload, provider) \
+                        if len(payload.dates) else []
+            except Exception as e:
+                print(f"Fehler bei der Analyse von Batch {index + 1}: {e}", file=sys.stderr)
+                signals = []
+            del payload
+            if signals and not any(results.values()):
+                metrics.observe("swings.first_signal", time.perf_counter() - started)
+            results[index] = signals
+            if signals:
+                send(", ".join(signals))
+
+    io_pool = ThreadPoolExecutor(FETCH_CONCURRENCY + 1)
+    cpu_pool = ThreadPoolExecutor(1)
+    process_pool = _process_pool(provider, workers)
+    try:
+        # Indikator-Zustand aller Batches im Speicher, geschrieben einmal am Ende (auch bei Abbruch)
+        with indicatorstate.session():
+            async with asyncio.TaskGroup() as group:
+                for stage in (scrape(), batch(), *(fetch() for _ in range(FETCH_CONCURRENCY)), analyze()):
+                    group.create_task(stage)
+    except ExceptionGroup as e:
+        raise e.exceptions[0]
+    finally:
+        for pool in (io_pool, cpu_pool, process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    signal_tickers = [ticker for index in sorted(results) for ticker in results[index]]
+    metrics.count("swings.signals", len(signal_tickers))
+    print(f"\nAnalyse abgeschlossen. {len(signal_tickers)} Signale gefunden.", file=sys.stderr)
+    return signal_tickers
+
+
+async def main(budget=TIME_BUDGET):
+    """
+    Eigenständiger Lauf: stream() mit Versand jedes Signal-Batches, sobald er feststeht.
+    `budget` begrenzt den ganzen Lauf in Sekunden (0 = unbegrenzt); bereits eingereihte
+    Nachrichten werden danach noch zugestellt.
+    """
+    import contextlib
+    from notifier import Notifier
 
-            best_r2 = -np.inf
-            for length in range(100, len(close_prices) + 1):
-                y = close_prices[-length:].values.reshape(-1, 1)
-                x = np.arange(length).reshape(-1, 1)
-                model = LinearRegression().fit(x, y)
-                r2 = model.score(x, y)
-                if r2 > best_r2:
-                    best_r2 = r2
+    async with contextlib.AsyncExitStack() as stack:
+        notifier = None
+        if TOKEN and CHAT_ID:
+            notifier = await stack.enter_async_context(Notifier(TOKEN))
+        else:
+            print("Telegram environment variables (TELEGRAM_BOT_TOKEN, SWING_CHAT_ID) not set. Skipping notification.")
 
-            # Normalize R2 score to be between 0 and 100
-            r2_score = best_r2 * 100
+        def send(text):
+            print(text)
+            if notifier is not None:
+                notifier.send(CHAT_ID, text)
 
-            # --- Signal Condition Check (R2 > 85) ---
-            if r2_score <= 85:
-                continue
+        try:
+            async with asyncio.timeout(budget or None):
+                signal_tickers = await stream(send)
+        except TimeoutError:
+            print(f"Zeitbudget von {budget:g} s überschritten, Analyse abgebrochen.", file=sys.stderr)
+            return
+        if not signal_tickers:
+            print("Keine Swing Trade Signale gefunden. Keine Telegram-Nachricht gesendet.", file=sys.stderr)
 
-            # --- Indicator Calculation (ADX & RSI) ---
-            stock_data = all_data.loc[:, (slice(None), ticker)]
-            stock_data.columns = stock_data.columns.droplevel(1)
-            stock_data = stock_data.dropna()
 
-            if len(stock_data) < 250:  # Need enough data for ROC(250)
-                continue
+# --- Runner-Plugin (siehe runner.py) ---
+# Die Ticker stehen erst nach dem Finviz-Scraping fest und werden in run_analysis geladen.
+DATA_REQUIREMENTS = {}
 
-            rsi_series = RSIIndicator(
-                close=stock_data['Close'], window=2).rsi()
-            adx_series = ADXIndicator(
-                high=stock_data['High'], low=stock_data['Low'], close=stock_data['Close'], window=14).adx()
-            roc_series = ROCIndicator(
-                close=stock_data['Close'], window=250).roc()
 
-            if rsi_series.empty or adx_series.empty or roc_series.empty:
-                continue
+def is_due(today):
+    """Der Swing-Scan läuft an jedem Handelstag."""
+    return tradingcalendar.is_session(today)
 
-            latest_rsi = rsi_series.iloc[-1]
-            latest_adx = adx_series.iloc[-1]
-            latest_roc_250 = roc_series.iloc[-1]
 
-            if np.isnan(latest_rsi) or np.isnan(latest_adx) or np.isnan(latest_roc_250):
-                continue
-
-            # --- Final Signal Condition Check ---
-            if latest_rsi < 10 and latest_adx > 20 and latest_roc_250 > 0:
-                signal_count += 1
-                signal_tickers.append(ticker) # Add ticker to the list
-                print(f"--- SIGNAL FOUND for {ticker} ---", file=sys.stderr)
-                print(f"  R2: {r2_score:.2f}", file=sys.stderr)
-                print(f"  ADX: {latest_adx:.2f}", file=sys.stderr)
-                print(f"  RSI(2): {latest_rsi:.2f}", file=sys.stderr)
-                print(f"  ROC(250): {latest_roc_250:.2f}", file=sys.stderr)
-                print(f"----------------------", file=sys.stderr)
-
-        except KeyError:
-            # This can happen if a ticker download fails among many
-            # print(f"Warnung: Unvollständige Daten für Ticker {ticker}, wird übersprungen.", file=sys.stderr)
-            continue
-        except Exception as e:
-            print(
-                f"Fehler bei der Analyse von Ticker {ticker}: {e}", file=sys.stderr)
-            continue
+def build_message(provider=None):
+    """
+    Scrapes the Finviz tickers, runs the analysis and returns one consolidated
+    message with all signal tickers, or None if there are no signals.
+    """
+    from providers import default_provider
 
-    print(
-        f"\nAnalyse abgeschlossen. {signal_count} Signale gefunden.", file=sys.stderr)
+    provider = provider or default_provider()
+    # 1. Scrape tickers from Finviz
+    tickers_to_analyze = scrape_finviz_tickers(provider=provider)
+    if not tickers_to_analyze:
+        print("Keine Ticker von Finviz erhalten. Analyse wird nicht gestartet.", file=sys.stderr)
+        return None
 
-    # Send one consolidated Telegram message at the end
-    if signal_tickers:
-        final_telegram_message = ", ".join(signal_tickers)
-        asyncio.run(send_telegram_message(final_telegram_message))
-    else:
+    # 2. Run analysis on the scraped tickers
+    signal_tickers = run_analysis(tickers_to_analyze, provider)
+    if not signal_tickers:
         print("Keine Swing Trade Signale gefunden. Keine Telegram-Nachricht gesendet.", file=sys.stderr)
+        return None
 
+    return ", ".join(signal_tickers)
 
 
 if __name__ == "__main__":
-    # 1. Scrape tickers from Finviz
-    tickers_to_analyze = scrape_finviz_tickers()
-
-    # 2. Run analysis on the scraped tickers
-    if tickers_to_analyze:
-        run_analysis(tickers_to_analyze)
+    today = datetime.now()
+    if not is_due(today):
+        print(f"Heute ({today.strftime('%A, %d.%m.%Y')}) ist kein Handelstag. Skript 'swings.py' wird nicht ausgeführt.")
     else:
-        print("Keine Ticker von Finviz erhalten. Analyse wird nicht gestartet.", file=sys.stderr)
+        # Signale werden versendet, sobald ein Batch analysiert ist
+        asyncio.run(main())
@@ -0,0 +1,132 @@
+import os
+import sys
+import tempfile
+
+# Kursdaten-Speicher, Indikator-Zustand, Positionen und Metriken der Tests liegen in einem
+# temporären Verzeichnis; die Pfade werden beim Import der Module festgelegt, daher vor
+# allen Repo-Importen. Ohne Telegram-Token wird nichts verschickt.
+os.environ["MARKET_DATA_DIR"] = tempfile.mkdtemp(prefix="market_data_")
+os.environ["METRICS_FILE"] = ""
+for name in ("TELEGRAM_BOT_TOKEN", "MARKET_DATA_REPLAY", "MARKET_DATA_REPLAY_AS_OF", "PROMETHEUS_TEXTFILE"):
+    os.environ.pop(name, None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+# Stichtag der Replay-Daten (Freitag, letzter Handelstag der Woche)
+REPLAY_END = "2026-09-25"
+REPLAY_UNIVERSE = 30
+SWING_UNIVERSE = 200
+
+
+@pytest.fixture(scope="session")
+def replay_dir(tmp_path_factory):
+    """
+    Verzeichnis für providers.ReplayProvider mit synthetischen Kursen aller Strategien
+    (je Symbol als Parquet, wie sie der Kursdaten-Speicher schreibt), PCR-Index und einem
+    kleinen Screener-Universum.
+    """
+    from urllib.parse import quote
+
+    import benchmark
+    import bm
+    import tom
+
+    path = tmp_path_factory.mktemp("replay")
+    universe = benchmark.synthetic_symbols(REPLAY_UNIVERSE)
+    for symbol in dict.fromkeys(["SPY", "QQQ", "^VIX"] + bm.BM_SYMBOLS + tom.ETFS + universe):
+        history = benchmark.synthetic_history(symbol, end=REPLAY_END)
+        history.to_parquet(path / f"{quote(symbol, safe='')}.parquet")
+    (path / "PCR_Index.TXT").write_text(benchmark.synthetic_pcr(end=REPLAY_END), encoding="utf-8")
+    (path / "tickers.txt").write_text("\n".join(universe), encoding="utf-8")
+    return path
+
+
+@pytest.fixture(scope="session")
+def swing_dir(tmp_path_factory):
+    """
+    Replay-Verzeichnis mit SWING_UNIVERSE synthetischen Tickern (genug für einige
+    Swing-Signale) und tickers.txt für den Replay-Screener.
+    """
+    import benchmark
+
+    path = tmp_path_factory.mktemp("swings")
+    universe = benchmark.synthetic_symbols(SWING_UNIVERSE)
+    for symbol in universe:
+        benchmark.synthetic_history(symbol, end=REPLAY_END).to_parquet(path / f"{symbol}.parquet")
+    (path / "tickers.txt").write_text("\n".join(universe), encoding="utf-8")
+    return path
+
+
+class StubServer:
+    """
+    Lokaler HTTP-Server für die Tests (Telegram, Finviz, Fehlerinjektion). `respond(request)`
+    bekommt ein Dict mit method, path, query, headers und body und gibt (Status, Body) oder
+    (Status, Header, Body) zurück; Body als str, bytes oder JSON-fähiges Objekt. Alle Anfragen
+    stehen in `requests`. Jede Anfrage läuft in einem eigenen Thread, `respond` darf also
+    blockieren (z.B. für Timeouts).
+    """
+
+    def __init__(self, respond):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+        self.requests = []
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                import json
+                from urllib.parse import urlsplit, parse_qs
+
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                request = {"method": self.command, "path": url.path, "query": parse_qs(url.query),
+                           "headers": dict(self.headers), "body": self.rfile.read(length)}
+                with server._lock:
+                    server.requests.append(request)
+                status, *rest = respond(request)
+                headers, body = rest if len(rest) == 2 else ({}, rest[0])
+                if not isinstance(body, (str, bytes)):
+                    body = json.dumps(body)
+                    headers = {"Content-Type": "application/json", **headers}
+                body = body.encode("utf-8") if isinstance(body, str) else body
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Startet StubServer(respond) und beendet alle gestarteten Server nach dem Test."""
+    servers = []
+
+    def start(respond):
+        servers.append(StubServer(respond))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+
+
+def _features(closes, start="2026-09-01"):
+    closes = {symbol: np.asarray(values, dtype=np.float64) for symbol, values in closes.items()}
+    return {"symbols": list(closes), "dates": pd.bdate_range(start, periods=len(next(iter(closes.values())))).values,
+            "close": np.vstack(list(closes.values()))}
+
+
+def _trades(*rows):
+    trades = pd.DataFrame(rows, columns=["symbol", "entry_date", "entry_price", "exit_date", "exit_price", "reason"])
+    trades["entry_date"] = pd.to_datetime(trades["entry_date"])
+    trades["exit_date"] = pd.to_datetime(trades["exit_date"])
+    trades["return"] = trades["exit_price"] / trades["entry_price"] - 1
+    return trades
+
+
+def test_overlapping_trades_share_capital():
+    features = _features({"A": [100, 110, 121, 121], "B": [50, 50, 45, 45]})
+    trades = _trades(("A", "2026-09-01", 100, "2026-09-03", 121, "time"),
+                     ("B", "2026-09-02", 50, "2026-09-03", 45, "time"))
+
+    daily = backtest.portfolio_returns(trades, features)
+    # Tag 2: nur A (+10%), Tag 3: A +10% und B -10% je zur Hälfte
+    assert daily == pytest.approx([0, 0.10, 0.0, 0])
+    equity = backtest.equity_curve(trades, features)
+    stats = backtest.summarize(trades, equity)
+    assert stats["total_return"] == pytest.approx(10.0)
+    assert stats["trades"] == 2 and stats["hit_rate"] == pytest.approx(50.0)
+
+
+def test_open_entry_gaps_and_drawdown():
+    features = _features({"A": [100, np.nan, 90, 99]})
+    # Kauf zur Eröffnung am 01.09. zu 95, fehlender Bar am 02.09., offen bis zum letzten Schluss
+    trades = _trades(("A", "2026-09-01", 95, "2026-09-04", 99, "open"))
+
+    daily = backtest.portfolio_returns(trades, features)
+    assert daily == pytest.approx([100 / 95 - 1, 0, -0.10, 0.10])
+    stats = backtest.summarize(trades, backtest.equity_curve(trades, features))
+    assert stats["total_return"] == pytest.approx((99 / 95 - 1) * 100)
+    assert stats["max_drawdown"] == pytest.approx(-10.0)
+    assert stats["trades"] == 0 and stats["open"] == 1
+
+
+def test_bm_enters_on_last_session_of_holiday_week():
+    # Karfreitag 03.04.2026: letzter Handelstag der Woche ist Donnerstag, 02.04.
+    dates = pd.bdate_range("2026-03-30", "2026-04-10")
+    last = backtest._last_session_of_week(dates)
+    assert [day.strftime("%d.%m.") for day in dates[last]] == ["02.04.", "10.04."]
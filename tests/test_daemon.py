@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import daemon
+import runner
+from providers import ReplayProvider
+
+
+@pytest.fixture
+def delivered(monkeypatch):
+    """Sammelt (Strategie, Nachricht) statt sie über runner.deliver auszugeben."""
+    messages = []
+    monkeypatch.setattr(runner, "deliver", lambda strategy, message, notifier: messages.append(
+        (strategy.__name__, message)))
+    return messages
+
+
+class IntradayVix(ReplayProvider):
+    """Replay, dessen VIX-Bar des laufenden Tages stündlich steigt (25 + Stunde der Uhr)."""
+
+    def __init__(self, path, clock):
+        super().__init__(path)
+        self.clock = clock
+
+    def fetch(self, symbols, start):
+        histories, errors = super().fetch(symbols, start)
+        if "^VIX" in histories:
+            vix = histories["^VIX"].copy()
+            vix.loc[pd.Timestamp(self.clock.now().date()), "Close"] = 25 + self.clock.now().hour
+            histories["^VIX"] = vix
+        return histories, errors
+
+
+def test_quote_feed_and_warm_provider_stop_at_the_clock(replay_dir):
+    clock = daemon.ReplayClock(datetime(2026, 9, 22, 12))
+    provider = ReplayProvider(str(replay_dir))
+    warm = daemon.WarmProvider(provider, clock)
+
+    histories, errors = warm.load_histories(["SPY"], period="1mo")
+    assert not errors and histories["SPY"].index[-1] == pd.Timestamp("2026-09-22")
+    assert not warm.persistent
+
+    # Am nächsten Tag liefert der Feed einen neuen Bar, der die Historie ergänzt
+    clock.time = datetime(2026, 9, 23, 12)
+    bars, _ = daemon.QuoteFeed(provider, clock).poll(["SPY"])
+    assert bars["SPY"].index[-1] == pd.Timestamp("2026-09-23")
+    assert warm.update(bars) == ["SPY"]
+    assert warm.update(bars) == []
+    assert warm.histories["SPY"].index[-1] == pd.Timestamp("2026-09-23")
+
+
+def test_daemon_matches_the_cron_run_on_replay(replay_dir, delivered):
+    day = datetime(2026, 9, 21)
+    names = ["tt", "npm", "pcr"]
+    runner.run(names, today=day, provider=ReplayProvider(str(replay_dir), as_of=day))
+    cron = list(delivered)
+    delivered.clear()
+
+    asyncio.run(daemon.run_daemon(names, ReplayProvider(str(replay_dir)), daemon.ReplayClock(day),
+                                  interval=7200, until=day.replace(hour=23)))
+
+    assert delivered == cron
+    assert [name for name, _ in cron] == names
+
+
+def test_daemon_sends_once_per_day_unless_the_signal_changes(replay_dir, delivered, capsys):
+    clock = daemon.ReplayClock(datetime(2026, 9, 22))
+
+    asyncio.run(daemon.run_daemon(["npm"], IntradayVix(str(replay_dir), clock), clock,
+                                  interval=3600, until=datetime(2026, 9, 23, 12)))
+
+    signals = [(message.split("\n", 1)[0], message) for name, message in delivered]
+    # 22.09.: kein Signal bis VIX > 30 (ab 6 Uhr), dann Signal; 23.09.: erste Auswertung erneut
+    assert [signal for signal, _ in signals] == [
+        "❌ Kein 'LNPM' Signal:", "✅ 'LNPM' Signal: BUY QQQ ON CLOSE, PT 6%",
+        "❌ Kein 'LNPM' Signal:", "✅ 'LNPM' Signal: BUY QQQ ON CLOSE, PT 6%"]
+    assert "unverändert" in capsys.readouterr().err
+
+
+def test_daemon_skips_streaming_and_data_free_strategies(replay_dir, delivered):
+    day = datetime(2026, 9, 21)
+
+    asyncio.run(daemon.run_daemon(["swings", "positions", "pcr"], ReplayProvider(str(replay_dir)),
+                                  daemon.ReplayClock(day), interval=7200, until=day.replace(hour=23)))
+
+    assert [name for name, _ in delivered] == ["pcr"]
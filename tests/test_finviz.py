@@ -0,0 +1,75 @@
+import os
+import re
+
+import pytest
+
+import finviz
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "finviz")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def finviz_stub(pages):
+    """Screener: Seite je Startoffset (&r=) aus `pages` (Offset -> Fixture-Name), sonst 404."""
+    def respond(request):
+        offset = int(request["query"].get("r", ["1"])[0])
+        if offset not in pages:
+            return 404, "Not Found"
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, _fixture(pages[offset])
+
+    return respond
+
+
+@pytest.fixture
+def scraper():
+    return finviz.FinvizScraper(request_interval=0, cache_ttl=0, timeout=5)
+
+
+def test_parse_fixture_pages():
+    first = _fixture("screener_r1.html")
+    assert finviz.parse_total_count(first) == 45
+    tickers = finviz.parse_tickers(first)
+    assert len(tickers) == 20 and tickers[:3] == ["AAPL", "ABBV", "ACN"] and "BRK-B" in tickers
+    # Die Links im Seitenkopf (SPY, QQQ) gehören nicht zum Ergebnis
+    assert "SPY" not in tickers and "QQQ" not in tickers
+
+
+def test_onclick_fallback_only_inside_ticker_cell():
+    page = _fixture("screener_tickers_view.html")
+    assert finviz.parse_total_count(page) == 3
+    assert finviz.parse_tickers(page) == ["NVDA", "MSFT", "BRK-B"]
+
+
+def test_scrape_follows_all_pages(stub_server, scraper):
+    server = stub_server(finviz_stub({1: "screener_r1.html", 21: "screener_r21.html", 41: "screener_r41.html"}))
+    url = f"{server.url}/screener.ashx?v=411&f=cap_midover&ft=4"
+
+    tickers = scraper.scrape([url])
+
+    expected = [ticker for name in ("screener_r1.html", "screener_r21.html", "screener_r41.html")
+                for ticker in finviz.parse_tickers(_fixture(name))]
+    assert tickers == expected and len(tickers) == 45
+    offsets = sorted(int(request["query"].get("r", ["1"])[0]) for request in server.requests)
+    assert offsets == [1, 21, 41]
+    assert all(request["headers"]["User-Agent"] == finviz.HEADERS["User-Agent"] for request in server.requests)
+
+
+def test_missing_page_keeps_the_others(stub_server, scraper, capsys):
+    server = stub_server(finviz_stub({1: "screener_r1.html", 41: "screener_r41.html"}))
+
+    tickers = scraper.scrape([f"{server.url}/screener.ashx?v=411"])
+
+    assert len(tickers) == 25
+    assert re.search(r"Finviz-Seite ab Treffer 21", capsys.readouterr().err)
+
+
+def test_single_page_with_fallback_and_deduplication(stub_server, scraper):
+    server = stub_server(finviz_stub({1: "screener_tickers_view.html"}))
+    url = f"{server.url}/screener.ashx?v=411"
+
+    assert scraper.scrape([url, url + "&o=-change"]) == ["NVDA", "MSFT", "BRK-B"]
+    assert len(server.requests) == 2
@@ -0,0 +1,47 @@
+import pytest
+
+import httpcache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(httpcache, "CACHE_DIR", str(tmp_path))
+
+
+def range_stub(files):
+    """Datei-Server mit Range-Anfragen; `files["body"]` kann zwischen Anfragen ersetzt werden."""
+    def respond(request):
+        body = files["body"]
+        header = request["headers"].get("Range")
+        if not header:
+            return 200, {"Content-Type": "text/plain; charset=utf-8"}, body
+        start = int(header.split("=", 1)[1].rstrip("-"))
+        if start >= len(body):
+            # Ohne Content-Range-Länge, wie manche Server antworten
+            return 416, b""
+        return 206, {"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"}, body[start:]
+
+    return respond
+
+
+def test_append_only_file_loads_only_the_tail(stub_server):
+    files = {"body": b"a\n" * 100}
+    server = stub_server(range_stub(files))
+    url = server.url + "/PCR_Index.TXT"
+
+    assert httpcache.get_text(url, append_only=True) == "a\n" * 100
+    files["body"] += b"b\n"
+    assert httpcache.get_text(url, append_only=True) == "a\n" * 100 + "b\n"
+    assert server.requests[-1]["headers"]["Range"] == f"bytes={200 - httpcache.RANGE_OVERLAP}-"
+
+
+def test_range_not_satisfiable_forces_a_full_download(stub_server):
+    files = {"body": b"a\n" * 100}
+    server = stub_server(range_stub(files))
+    url = server.url + "/PCR_Index.TXT"
+    httpcache.get_text(url, append_only=True)
+
+    # Die Datei wurde kürzer neu geschrieben; die 416 ohne Länge darf nicht den alten Stand liefern
+    files["body"] = b"neu\n"
+    assert httpcache.get_text(url, append_only=True) == "neu\n"
+    assert "Range" not in server.requests[-1]["headers"]
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import RSIIndicator, ROCIndicator
+from ta.trend import ADXIndicator, SMAIndicator
+
+import benchmark
+import indicators
+
+SYMBOLS = ["SPY", "QQQ", "T00001", "T00002"]
+# Kürzere Historien (führende NaNs), wie im Panel eines Universums
+BARS = [500, 500, 320, 60]
+
+
+@pytest.fixture(scope="module")
+def histories():
+    return [benchmark.synthetic_history(symbol, bars=bars, end="2026-09-25")
+            for symbol, bars in zip(SYMBOLS, BARS)]
+
+
+def _matrix(histories, field):
+    matrix = np.full((len(histories), max(BARS)), np.nan)
+    for row, history in enumerate(histories):
+        matrix[row, -len(history):] = history[field].to_numpy()
+    return matrix
+
+
+def _reference(histories, compute):
+    """Ergebnis von `ta` je Symbol, rechtsbündig wie die Matrix."""
+    matrix = np.full((len(histories), max(BARS)), np.nan)
+    for row, history in enumerate(histories):
+        matrix[row, -len(history):] = compute(history).to_numpy()
+    return matrix
+
+
+@pytest.mark.parametrize("window", [2, 14])
+def test_rsi_matches_ta(histories, window):
+    result = indicators.rsi(_matrix(histories, "Close"), window)
+    expected = _reference(histories, lambda h: RSIIndicator(h["Close"], window).rsi())
+    np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize("window", [20, 250])
+def test_roc_matches_ta(histories, window):
+    result = indicators.roc(_matrix(histories, "Close"), window)
+    expected = _reference(histories, lambda h: ROCIndicator(h["Close"], window).roc())
+    np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize("window", [2, 60, 100])
+def test_sma_matches_ta(histories, window):
+    result = indicators.sma(_matrix(histories, "Close"), window)
+    expected = _reference(histories, lambda h: SMAIndicator(h["Close"], window).sma_indicator())
+    np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+def test_adx_matches_ta_after_warm_up(histories):
+    window = 14
+    result = indicators.adx(*(_matrix(histories, field) for field in ("High", "Low", "Close")), window)
+    expected = _reference(histories, lambda h: ADXIndicator(h["High"], h["Low"], h["Close"], window).adx())
+
+    # Dokumentierte Abweichung: in der Aufwärmphase NaN statt der 0 von 'ta'
+    for row, bars in enumerate(BARS):
+        warm_up = slice(max(BARS) - bars, max(BARS) - bars + 2 * window - 1)
+        assert np.isnan(result[row, warm_up]).all()
+        assert (expected[row, warm_up] == 0).all()
+        expected[row, warm_up] = np.nan
+    np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+def test_one_dimensional_input_and_align_right(histories):
+    close = histories[0]["Close"].to_numpy()
+    np.testing.assert_allclose(indicators.rsi(close, 2), RSIIndicator(pd.Series(close), 2).rsi(),
+                               rtol=1e-10, equal_nan=True)
+
+    gappy = np.array([[np.nan, 1.0, np.nan, 2.0, 3.0], [4.0, 5.0, 6.0, 7.0, 8.0]])
+    (aligned,), counts = indicators.align_right(gappy)
+    np.testing.assert_array_equal(aligned, [[np.nan, np.nan, 1.0, 2.0, 3.0], [4.0, 5.0, 6.0, 7.0, 8.0]])
+    assert counts.tolist() == [3, 5]
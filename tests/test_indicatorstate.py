@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import benchmark
+import indicatorstate
+
+SPECS = [("rsi", 2), ("adx", 14), ("roc", 250)]
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(indicatorstate, "STATE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Zählt die geschriebenen Zustandsdateien je Indikator."""
+    counts = {}
+    write_state = indicatorstate._write_state
+
+    def counting(spec, arrays):
+        counts[spec] = counts.get(spec, 0) + 1
+        write_state(spec, arrays)
+
+    monkeypatch.setattr(indicatorstate, "_write_state", counting)
+    return counts
+
+
+def _batches(histories, size):
+    symbols = list(histories)
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+
+def test_session_writes_each_state_file_once(state_dir, writes):
+    histories = {symbol: benchmark.synthetic_history(symbol) for symbol in benchmark.synthetic_symbols(12)}
+    expected = indicatorstate.latest(histories, SPECS, persist=False)
+
+    with indicatorstate.session():
+        results = {}
+        for batch in _batches(histories, 4):
+            current = indicatorstate.latest({symbol: histories[symbol] for symbol in batch}, SPECS)
+            for spec in SPECS:
+                results.setdefault(spec, []).append(current[spec][0])
+        assert writes == {}
+
+    assert writes == {spec: 1 for spec in SPECS}
+    for spec in SPECS:
+        np.testing.assert_array_equal(np.concatenate(results[spec]), expected[spec][0])
+        with np.load(indicatorstate._state_path(spec)) as saved:
+            assert sorted(saved["symbols"]) == sorted(histories)
+
+
+def test_without_session_each_batch_writes(state_dir, writes):
+    histories = {symbol: benchmark.synthetic_history(symbol) for symbol in benchmark.synthetic_symbols(8)}
+
+    for batch in _batches(histories, 4):
+        indicatorstate.latest({symbol: histories[symbol] for symbol in batch}, SPECS)
+
+    assert writes == {spec: 2 for spec in SPECS}
+    # Der nächste Lauf setzt auf dem gespeicherten Zustand auf (keine neuen Bars)
+    with indicatorstate.session():
+        current = indicatorstate.latest(histories, [("rsi", 2)])
+    assert writes[("rsi", 2)] == 3
+    np.testing.assert_array_equal(current[("rsi", 2)][0],
+                                  indicatorstate.latest(histories, [("rsi", 2)], persist=False)[("rsi", 2)][0])
@@ -0,0 +1,139 @@
+import os
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pandas as pd
+
+import benchmark
+import marketdata
+
+
+class RecordingFetch:
+    """fetch(symbols, start) aus synthetischen Historien bis `end`; merkt sich alle Aufrufe."""
+
+    def __init__(self, end):
+        self.end = pd.Timestamp(end)
+        self.calls = []
+
+    def __call__(self, symbols, start):
+        self.calls.append((sorted(symbols), pd.Timestamp(start)))
+        histories = {}
+        for symbol in symbols:
+            data = benchmark.synthetic_history(symbol, end="2026-09-25")
+            histories[symbol] = data[(data.index >= start) & (data.index <= self.end)]
+        return histories, {}
+
+
+def test_stale_symbol_does_not_widen_the_window_of_the_others(tmp_path):
+    store = str(tmp_path)
+    first = datetime(2026, 9, 1, 22)
+    marketdata.load_histories(["SPY", "QQQ"], "6mo", fetch=RecordingFetch("2026-09-01"), store_dir=store, now=first)
+    # IWM wird erst zwei Wochen früher zuletzt aktualisiert
+    marketdata.load_histories(["IWM"], "6mo", fetch=RecordingFetch("2026-08-18"), store_dir=store,
+                              now=first)
+
+    fetch = RecordingFetch("2026-09-25")
+    histories, errors = marketdata.load_histories(["SPY", "QQQ", "IWM"], "6mo", fetch=fetch, store_dir=store,
+                                                  now=datetime(2026, 9, 25, 22))
+
+    overlap = timedelta(days=marketdata.OVERLAP_DAYS)
+    assert fetch.calls == [(["IWM"], pd.Timestamp("2026-08-18") - overlap),
+                           (["QQQ", "SPY"], pd.Timestamp("2026-09-01") - overlap)]
+    assert not errors
+    for symbol, data in histories.items():
+        expected = benchmark.synthetic_history(symbol, end="2026-09-25")
+        pd.testing.assert_frame_equal(data, expected[expected.index >= data.index[0]], check_freq=False)
+        assert data.index[-1] == pd.Timestamp("2026-09-25")
+
+
+class AdjustedFetch(RecordingFetch):
+    """Wie RecordingFetch, aber mit halbierten Kursen für `adjusted` (rückwirkender Split)."""
+
+    def __init__(self, end, adjusted):
+        super().__init__(end)
+        self.adjusted = adjusted
+
+    def __call__(self, symbols, start):
+        histories, errors = super().__call__(symbols, start)
+        for symbol in self.adjusted & set(histories):
+            data = histories[symbol].copy()
+            data[["Open", "High", "Low", "Close"]] /= 2
+            histories[symbol] = data
+        return histories, errors
+
+
+def test_adjustment_refresh_keeps_the_stored_range(tmp_path):
+    store = str(tmp_path)
+    marketdata.load_histories(["SPY"], "500d", fetch=RecordingFetch("2026-09-01"), store_dir=store,
+                              now=datetime(2026, 9, 1, 22))
+    stored_start = pd.Timestamp(marketdata._read_index(store)["SPY"]["start"])
+
+    # Ein kurzer Zeitraum (wie tt mit "10b") darf den Speicher nicht auf wenige Bars verkürzen
+    fetch = AdjustedFetch("2026-09-25", {"SPY"})
+    marketdata.load_histories(["SPY"], "10b", fetch=fetch, store_dir=store, now=datetime(2026, 9, 25, 22))
+
+    assert fetch.calls[-1] == (["SPY"], stored_start)
+    assert marketdata._read_index(store)["SPY"]["start"] == stored_start.strftime("%Y-%m-%d")
+    assert marketdata._read_symbol("SPY", store).index[0] <= stored_start + timedelta(days=4)
+
+
+def test_number_of_update_requests_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(marketdata, "MAX_FETCH_GROUPS", 2)
+    store = str(tmp_path)
+    for symbol, end in [("SPY", "2026-09-01"), ("QQQ", "2026-09-01"), ("IWM", "2026-08-18"),
+                        ("DIA", "2026-08-04")]:
+        marketdata.load_histories([symbol], "6mo", fetch=RecordingFetch(end), store_dir=store,
+                                  now=datetime(2026, 9, 1, 22))
+
+    fetch = RecordingFetch("2026-09-25")
+    histories, _ = marketdata.load_histories(["SPY", "QQQ", "IWM", "DIA"], "6mo", fetch=fetch,
+                                             store_dir=store, now=datetime(2026, 9, 25, 22))
+
+    overlap = timedelta(days=marketdata.OVERLAP_DAYS)
+    # Die neueste Gruppe behält ihr Fenster, die älteren werden ab dem ältesten Datum geladen
+    assert fetch.calls == [(["DIA", "IWM"], pd.Timestamp("2026-08-04") - overlap),
+                           (["QQQ", "SPY"], pd.Timestamp("2026-09-01") - overlap)]
+    assert all(data.index[-1] == pd.Timestamp("2026-09-25") for data in histories.values())
+
+
+def _load_into(store, symbols):
+    _, errors = marketdata.load_histories(symbols, "6mo", fetch=RecordingFetch("2026-09-25"), store_dir=store,
+                                          now=datetime(2026, 9, 25, 22))
+    return errors
+
+
+def test_concurrent_writers_keep_all_index_entries(tmp_path):
+    store = str(tmp_path)
+    batches = [[f"S{i:03d}" for i in range(start, start + 4)] for start in range(0, 96, 4)]
+
+    # Gleichzeitige Batches (swings.stream) und Worker-Prozesse (SWING_WORKERS)
+    with ThreadPoolExecutor(8) as pool:
+        thread_errors = list(pool.map(_load_into, [store] * 16, batches[:16]))
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        process_errors = list(pool.map(_load_into, [store] * 8, batches[16:]))
+
+    assert not any(thread_errors) and not any(process_errors)
+    index = marketdata._read_index(store)
+    assert sorted(index) == sorted(symbol for batch in batches for symbol in batch)
+    assert not [name for name in os.listdir(store) if name.endswith(".tmp")]
+
+
+def test_breaker_counts_one_failure_per_exhausted_fetch(monkeypatch):
+    import resilience
+
+    downloads = []
+    monkeypatch.setattr(marketdata, "_download", lambda symbols, start: (
+        downloads.append(symbols), ({}, {symbol: "Read timed out." for symbol in symbols}))[1])
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.0)
+    circuit = resilience.CircuitBreaker("yfinance", failures=2, cooldown=60)
+    monkeypatch.setitem(resilience._breakers, "yfinance", circuit)
+
+    # Alle Versuche des ersten Abrufs scheitern: ein Fehler, der Breaker bleibt geschlossen
+    marketdata.fetch_histories(["AAA", "BBB"], datetime(2026, 9, 1))
+    assert len(downloads) == resilience.RETRY_ATTEMPTS and circuit.allow()
+    # Der zweite gescheiterte Abruf öffnet ihn, der dritte lädt nichts mehr
+    marketdata.fetch_histories(["AAA", "BBB"], datetime(2026, 9, 1))
+    _, errors = marketdata.fetch_histories(["AAA", "BBB"], datetime(2026, 9, 1))
+    assert len(downloads) == 2 * resilience.RETRY_ATTEMPTS
+    assert errors == {symbol: "yfinance nicht verfügbar (Circuit Breaker offen)." for symbol in ["AAA", "BBB"]}
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+import pytest
+
+import notifier
+from notifier import Notifier, split_message
+
+TOKEN = "123:stub"
+BOT = {"id": 123, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}
+
+
+def _params(request):
+    """Parameter einer Bot-API-Anfrage (JSON oder Formular)."""
+    body = request["body"].decode("utf-8")
+    if request["headers"].get("Content-Type", "").startswith("application/json"):
+        return json.loads(body)
+    return {key: values[0] for key, values in parse_qs(body).items()}
+
+
+def telegram_stub(rate_limited=0):
+    """Bot API mit getMe und sendMessage; die ersten `rate_limited` sendMessage-Aufrufe enden mit 429."""
+    state = {"limited": rate_limited}
+
+    def respond(request):
+        method = request["path"].rsplit("/", 1)[-1]
+        if method == "getMe":
+            return 200, {"ok": True, "result": BOT}
+        if method == "sendMessage":
+            if state["limited"]:
+                state["limited"] -= 1
+                return 429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                             "parameters": {"retry_after": 1}}
+            params = _params(request)
+            return 200, {"ok": True, "result": {"message_id": 1, "date": 0, "text": params["text"],
+                                                "chat": {"id": int(params["chat_id"]), "type": "private"}}}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    return respond
+
+
+def _messages(server):
+    return [_params(request) for request in server.requests if request["path"].endswith("/sendMessage")]
+
+
+def _run(server, send, **options):
+    async def main():
+        options.setdefault("coalesce_window", 0.1)
+        async with Notifier(TOKEN, base_url=f"{server.url}/bot", per_chat_interval=0,
+                            global_interval=0, **options) as session:
+            send(session)
+        return session
+
+    return asyncio.run(main())
+
+
+def test_coalesces_messages_to_the_same_chat(stub_server):
+    server = stub_server(telegram_stub())
+
+    session = _run(server, lambda n: [n.send("42", f"Nachricht {i}") for i in range(3)])
+
+    assert [message["text"] for message in _messages(server)] == ["Nachricht 0\n\nNachricht 1\n\nNachricht 2"]
+    assert session.sent == 1 and session.failed == 0
+    assert server.requests[0]["path"] == f"/bot{TOKEN}/getMe"
+
+
+def test_splits_long_messages(stub_server):
+    server = stub_server(telegram_stub())
+    tickers = ", ".join(f"T{i:05d}" for i in range(1000))
+
+    _run(server, lambda n: n.send("42", "Swing-Signale:\n" + tickers))
+
+    texts = [message["text"] for message in _messages(server)]
+    assert all(len(text) <= notifier.MAX_MESSAGE_LENGTH for text in texts)
+    # Zuerst am Zeilenumbruch, dann an ", ": kein Ticker wird zerschnitten
+    assert texts[0] == "Swing-Signale:"
+    assert len(texts) == 3 and ", ".join(texts[1:]) == tickers
+
+
+def test_markdown_is_split_on_line_boundaries_only():
+    lines = [f"**T{i:05d}**: Close: 123.45, PT 3%: 127.15" for i in range(200)]
+    text = "\n".join(lines)
+
+    chunks = split_message(text, limit=1000, parse_mode="Markdown")
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk.split("\n")] == lines
+    # Ohne parse_mode darf auch innerhalb einer Zeile getrennt werden
+    assert split_message("**a b**", limit=4) == ["**a", "b**"]
+    assert split_message("**a b**", limit=4, parse_mode="Markdown") == ["**a ", "b**"]
+
+
+def test_retries_after_rate_limit(stub_server):
+    server = stub_server(telegram_stub(rate_limited=1))
+
+    session = _run(server, lambda n: n.send("42", "Signal"))
+
+    assert len(_messages(server)) == 2
+    assert session.sent == 1 and session.failed == 0
+
+
+def test_fans_out_to_all_chats(stub_server):
+    server = stub_server(telegram_stub())
+
+    session = _run(server, lambda n: n.send("1, 2,3", "Signal", "Markdown"))
+
+    messages = _messages(server)
+    assert sorted(message["chat_id"] for message in messages) == ["1", "2", "3"]
+    assert {message["parse_mode"] for message in messages} == {"Markdown"}
+    assert session.sent == 3
+
+
+@pytest.mark.parametrize("text", ["", "kurz", "x" * notifier.MAX_MESSAGE_LENGTH])
+def test_short_messages_are_not_split(text):
+    assert split_message(text) == [text]
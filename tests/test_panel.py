@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+import benchmark
+from panel import Panel, FIELDS
+
+
+def _histories():
+    histories = {symbol: benchmark.synthetic_history(symbol, bars=60, end="2026-09-25")
+                 for symbol in ("AAA", "BBB", "CCC")}
+    # Kürzere Historie und eine Lücke
+    histories["BBB"] = histories["BBB"].iloc[20:]
+    histories["CCC"] = histories["CCC"].drop(histories["CCC"].index[30])
+    return histories
+
+
+def test_from_histories_aligns_rows_on_the_union_of_dates():
+    histories = _histories()
+
+    panel = Panel.from_histories(histories, ["AAA", "BBB", "CCC", "MISSING"])
+
+    assert panel.values.dtype == np.float32 and panel.values.shape == (len(FIELDS), 4, 60)
+    assert panel.symbols == ["AAA", "BBB", "CCC", "MISSING"]
+    for symbol, data in histories.items():
+        positions = np.searchsorted(panel.dates, data.index.values)
+        for field in FIELDS:
+            np.testing.assert_array_equal(panel.matrix(field)[panel.index[symbol], positions],
+                                          data[field].to_numpy(dtype=np.float32))
+    assert np.isnan(panel.row("BBB")[:20]).all() and np.isnan(panel.row("CCC")[30])
+    assert np.isnan(panel.row("MISSING")).all()
+    assert list(panel.counts()) == [60, 40, 59, 0]
+    np.testing.assert_array_equal(panel.last(), [histories[s]["Close"].to_numpy(np.float32)[-1]
+                                                 for s in ("AAA", "BBB", "CCC")] + [np.nan])
+
+
+def test_rows_and_matrices_are_views():
+    panel = Panel.from_histories(_histories())
+
+    assert np.shares_memory(panel.matrix("Close"), panel.values)
+    assert np.shares_memory(panel.row("AAA"), panel.values)
+    dates, high, low, close = panel.bars("BBB")
+    assert len(dates) == 40 and np.shares_memory(close, panel.values)
+    # Mit Lücke nur die vollständigen Bars (wie dropna())
+    dates, _, _, close = panel.bars("CCC")
+    assert len(dates) == 59 and not np.isnan(close).any()
+
+
+def test_concat_equals_a_single_panel():
+    histories = _histories()
+    single = Panel.from_histories(histories)
+
+    parts = Panel.concat([Panel.from_histories({"AAA": histories["AAA"]}),
+                          Panel.from_histories({symbol: histories[symbol] for symbol in ("BBB", "CCC")})])
+
+    assert parts.symbols == single.symbols
+    np.testing.assert_array_equal(parts.dates, single.dates)
+    np.testing.assert_array_equal(parts.values, single.values)
+
+
+def test_frame_round_trip():
+    histories = _histories()
+    panel = Panel.from_histories(histories)
+
+    frame = panel.to_frame()
+    again = Panel.from_frame(frame)
+
+    assert again.symbols == panel.symbols
+    np.testing.assert_array_equal(again.values, panel.values)
+    history = panel.history("CCC")
+    expected = histories["CCC"][FIELDS].astype(np.float32).astype(np.float64)
+    expected.index = expected.index.astype("datetime64[ns]")
+    pd.testing.assert_frame_equal(history, expected, check_freq=False)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import positions
+from panel import Panel
+from providers import CachingProvider, ReplayProvider
+
+
+def _panel(closes, highs=None, opens=None, start="2026-09-01"):
+    dates = pd.bdate_range(start, periods=len(closes))
+    closes = np.asarray(closes, dtype=np.float64)
+    highs = closes if highs is None else np.asarray(highs, dtype=np.float64)
+    opens = closes if opens is None else np.asarray(opens, dtype=np.float64)
+    history = pd.DataFrame({"Open": opens, "High": highs, "Low": np.minimum(opens, closes),
+                            "Close": closes, "Volume": 1.0}, index=dates)
+    return Panel.from_histories({"SPY": history}, ["SPY"])
+
+
+def _position(entry_date, target, time_stop=None, entry_price=None):
+    return {"symbol": "SPY", "entry_date": entry_date, "entry_price": entry_price,
+            "target": target, "time_stop": time_stop}
+
+
+def test_profit_target_exits_at_target_or_gap_open():
+    panel = _panel([100, 100.5, 103, 104], highs=[100, 100.8, 103.5, 104], opens=[100, 100.2, 102.5, 104])
+    entry, exit_index, exit_price, reason = positions.check_exits(
+        [_position("2026-09-01", 0.01), _position("2026-09-01", 0.02)], panel)
+
+    assert entry.tolist() == [100, 100]
+    assert exit_index.tolist() == [2, 2]
+    # PT 1%: Eröffnung 102.5 liegt über dem Ziel 101, PT 2%: Ausstieg zum Ziel 102
+    assert exit_price == pytest.approx([102.5, 102.5])
+    assert reason.tolist() == ["PT", "PT"]
+
+    _, _, exit_price, _ = positions.check_exits([_position("2026-09-01", 0.03)], panel)
+    assert exit_price == pytest.approx([103])
+
+
+def test_time_stop_and_open_positions():
+    panel = _panel([100, 99, 98, 97, 96])
+    entry, exit_index, exit_price, reason = positions.check_exits(
+        [_position("2026-09-01", 0.06, time_stop=3), _position("2026-09-02", 0.06, time_stop=9),
+         _position("2026-09-05", 0.01)], panel)
+
+    assert exit_index.tolist() == [3, -1, -1]
+    assert exit_price[0] == pytest.approx(97)
+    assert reason.tolist() == ["Time Stop", "", ""]
+    # Einstiegstag ohne Bar (Wochenende): noch kein Einstiegskurs
+    assert entry[1] == pytest.approx(99) and np.isnan(entry[2])
+
+
+def test_build_message_records_and_closes(replay_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(positions, "POSITIONS_DB", str(tmp_path / "positions.sqlite"))
+    positions.record("LTT", ["SPY"], pd.Timestamp("2026-08-03"), 0.01)
+    positions.record("LTT", ["SPY"], pd.Timestamp("2026-08-03"), 0.01)
+    positions.record("LBM", ["CWB", "HYD", "BAB"], pd.Timestamp("2026-08-07"), 0.03)
+    assert len(positions.open_positions()) == 4
+
+    provider = CachingProvider(ReplayProvider(str(replay_dir), as_of="2026-09-25"),
+                               store_dir=str(tmp_path / "store"))
+    calls = []
+    load_histories = provider.load_histories
+    monkeypatch.setattr(provider, "load_histories",
+                        lambda symbols, period: calls.append(symbols) or load_histories(symbols, period))
+    message = positions.build_message(provider)
+
+    assert calls == [["SPY", "CWB", "HYD", "BAB"]]
+    assert message.startswith("🔔 Exit-Signale:\n- LTT SPY: PT 1% erreicht am ")
+    remaining = positions.open_positions()
+    assert len(remaining) == 4 - (len(message.splitlines()) - 1)
+    assert all(position["entry_price"] is not None for position in remaining)
+
+
+def test_read_only_runs_create_no_database(replay_dir, tmp_path, monkeypatch):
+    path = tmp_path / "data" / "positions.sqlite"
+    monkeypatch.setattr(positions, "POSITIONS_DB", str(path))
+
+    assert positions.open_positions() == []
+    assert positions.build_message(ReplayProvider(str(replay_dir), as_of="2026-09-25")) is None
+    assert not path.parent.exists()
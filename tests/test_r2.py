@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+import swings
+
+
+def reference_best_r2(values, min_length):
+    """Beste R2 über alle Endstücke mit einer Regression je Länge (np.polyfit), wie vor user-001."""
+    y = np.asarray(values, dtype=np.float64)
+    y = y[~np.isnan(y)]
+    best_r2, best_length = -np.inf, 0
+    for length in range(min_length, len(y) + 1):
+        tail = y[-length:]
+        x = np.arange(length, dtype=np.float64)
+        slope, intercept = np.polyfit(x, tail, 1)
+        residual = ((tail - (slope * x + intercept)) ** 2).sum()
+        total = ((tail - tail.mean()) ** 2).sum()
+        r2 = 1.0 if total == 0 else 1 - residual / total
+        if r2 > best_r2:
+            best_r2, best_length = r2, length
+    return best_r2, best_length
+
+
+def _series(seed, n):
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0.001, 0.002)
+    return 50 * np.exp(np.cumsum(rng.normal(drift, 0.015, n)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_single_series_matches_per_length_regressions(seed):
+    values = _series(seed, 180)
+
+    best_r2, best_length = swings.calculate_best_r2(values, min_length=100)
+
+    expected_r2, expected_length = reference_best_r2(values, 100)
+    assert best_r2 == pytest.approx(expected_r2, abs=1e-10)
+    assert best_length == expected_length
+
+
+def test_constant_and_linear_series():
+    assert swings.calculate_best_r2(np.full(120, 42.0), min_length=100) == (1.0, 100)
+    best_r2, best_length = swings.calculate_best_r2(np.arange(120, dtype=float) * 0.5 + 3, min_length=100)
+    assert best_r2 == pytest.approx(1.0, abs=1e-12) and best_length == 100
+
+
+@pytest.mark.parametrize("n, min_length, expected_length", [(99, 100, 0), (100, 100, 100), (101, 100, None), (5, 2, None)])
+def test_min_length_edges(n, min_length, expected_length):
+    values = _series(7, n)
+
+    best_r2, best_length = swings.calculate_best_r2(values, min_length=min_length)
+
+    if expected_length == 0:
+        assert best_r2 == -np.inf and best_length == 0
+        return
+    expected_r2, reference_length = reference_best_r2(values, min_length)
+    assert best_r2 == pytest.approx(expected_r2, abs=1e-10)
+    assert best_length == (expected_length or reference_length)
+
+
+def test_matrix_rows_match_per_row_regressions():
+    n = 260
+    rows = [_series(seed, n) for seed in range(6)]
+    # Kurze Historie (NaN am Anfang), Lücken, zu wenig Werte, konstante Reihe, leere Zeile
+    rows[1][:120] = np.nan
+    rows[2][[150, 151, 200]] = np.nan
+    rows[3][:170] = np.nan
+    rows[4][:] = 17.0
+    rows[4][:60] = np.nan
+    rows[5][:] = np.nan
+    matrix = np.vstack(rows)
+
+    best_r2, best_length = swings.calculate_best_r2_matrix(matrix, min_length=100)
+
+    for i, row in enumerate(rows):
+        expected_r2, expected_length = reference_best_r2(row, 100)
+        assert best_length[i] == expected_length, i
+        if expected_length:
+            assert best_r2[i] == pytest.approx(expected_r2, abs=1e-10), i
+        else:
+            assert best_r2[i] == -np.inf
+    assert list(best_length[[3, 4, 5]]) == [0, 100, 0]
+
+
+def test_matrix_float32_input_and_too_few_columns():
+    matrix = np.vstack([_series(seed, 150) for seed in range(3)]).astype(np.float32)
+
+    best_r2, best_length = swings.calculate_best_r2_matrix(matrix, min_length=100)
+
+    for i in range(3):
+        expected_r2, expected_length = reference_best_r2(matrix[i].astype(np.float64), 100)
+        assert best_r2[i] == pytest.approx(expected_r2, abs=1e-9) and best_length[i] == expected_length
+
+    best_r2, best_length = swings.calculate_best_r2_matrix(matrix[:, :50], min_length=100)
+    assert np.all(best_r2 == -np.inf) and np.all(best_length == 0)
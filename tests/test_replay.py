@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import runner
+from conftest import REPLAY_END
+
+
+def test_runner_on_replay_provider(replay_dir, monkeypatch, capsys):
+    # Wie "MARKET_DATA_REPLAY=... python runner.py": der Provider kommt aus default_provider()
+    monkeypatch.setenv("MARKET_DATA_REPLAY", str(replay_dir))
+    monkeypatch.setenv("MARKET_DATA_REPLAY_AS_OF", REPLAY_END)
+
+    today = datetime.fromisoformat(REPLAY_END)
+    names = ["tt", "npm", "pcr", "bm", "tom", "swings"]
+    due = [strategy.__name__ for strategy in runner.load_strategies(names) if strategy.is_due(today)]
+    assert {"npm", "pcr", "bm", "swings"} <= set(due)
+    runner.run(names, today=today)
+
+    out = capsys.readouterr().out
+    assert "abgestürzt" not in out
+    assert "FEHLER" not in out
+    for name in due:
+        # Ohne Chat-ID meldet deliver() jede Nachricht, sonst run_strategy() "keine Nachricht"
+        assert f"Keine Chat-ID für '{name}'" in out or f"{name}: keine Nachricht." in out
+
+
+def test_replay_provider_reads_parquet_files(replay_dir):
+    from providers import ReplayProvider
+
+    provider = ReplayProvider(str(replay_dir), as_of=REPLAY_END)
+    histories, errors = provider.load_histories(["SPY", "^VIX"], period="1y")
+
+    assert not errors
+    assert histories["SPY"].index[-1].strftime("%Y-%m-%d") == REPLAY_END
+    assert histories["^VIX"]["Dividends"].eq(0).all()
@@ -0,0 +1,164 @@
+import time
+import threading
+
+import pytest
+import requests
+
+import httpcache
+import metrics
+import resilience
+
+
+class Faults:
+    """
+    Fehlerinjektion für den Stub-Server: `plan` ist eine Liste von Antworten, die der Reihe
+    nach verwendet werden (danach die letzte): Statuscode oder ("slow", Sekunden, Status).
+    """
+
+    def __init__(self, *plan):
+        self.plan = list(plan)
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        with self._lock:
+            step = self.plan.pop(0) if len(self.plan) > 1 else self.plan[0]
+        if isinstance(step, tuple):
+            _, seconds, step = step
+            time.sleep(seconds)
+        headers = {"Retry-After": "0"} if step == 429 else {}
+        return step, headers, f"Antwort {step}"
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 3)
+
+
+def _host(server):
+    return server.url.split("//", 1)[1]
+
+
+def _counter(name):
+    return metrics.snapshot()[1].get(name, 0)
+
+
+@pytest.mark.parametrize("status", [500, 503, 429])
+def test_retries_transient_status(stub_server, status):
+    server = stub_server(Faults(status, status, 200))
+
+    response = resilience.get(requests, server.url + "/data", timeout=5)
+
+    assert response.status_code == 200 and response.text == "Antwort 200"
+    assert len(server.requests) == 3
+
+
+def test_returns_last_response_after_all_attempts(stub_server):
+    server = stub_server(Faults(502))
+
+    response = resilience.get(requests, server.url + "/data", timeout=5)
+
+    assert response.status_code == 502
+    assert len(server.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub_server):
+    server = stub_server(Faults(404))
+
+    assert resilience.get(requests, server.url + "/data", timeout=5).status_code == 404
+    assert len(server.requests) == 1
+
+
+def test_attempt_timeout_covers_the_whole_response(stub_server):
+    # Ohne Timeout auf Ebene von requests (wie bei tröpfchenweise gesendeten Antworten)
+    # begrenzt nur der Timeout je Versuch von call() die Wartezeit.
+    server = stub_server(Faults(("slow", 1.0, 200)))
+    timeouts = _counter("resilience.timeouts")
+
+    started = time.monotonic()
+    with pytest.raises(resilience.SourceUnavailable):
+        resilience.call(_host(server), lambda: requests.get(server.url + "/data"), timeout=0.2,
+                        attempts=2, hedge=False)
+
+    assert time.monotonic() - started < 0.9
+    assert _counter("resilience.timeouts") - timeouts == 2
+
+
+def test_slow_attempt_is_hedged(stub_server, monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_DEFAULT_DELAY", 0.1)
+    server = stub_server(Faults(("slow", 1.0, 200), 200))
+    hedged = _counter("resilience.hedged")
+
+    started = time.monotonic()
+    response = resilience.get(requests, server.url + "/data", timeout=5)
+
+    assert response.status_code == 200
+    assert time.monotonic() - started < 0.8
+    assert len(server.requests) == 2
+    assert _counter("resilience.hedged") - hedged == 1
+
+
+def test_hedge_delay_follows_p95_latency():
+    tracker = resilience.LatencyTracker()
+    assert tracker.hedge_delay() == resilience.HEDGE_DEFAULT_DELAY
+    for i in range(100):
+        tracker.add(i / 100)
+    assert tracker.hedge_delay() == pytest.approx(0.95)
+
+
+def test_breaker_opens_and_recovers_half_open(stub_server, monkeypatch):
+    faults = Faults(503)
+    server = stub_server(faults)
+    host = _host(server)
+    circuit = resilience.CircuitBreaker(host, failures=2, cooldown=0.3)
+    monkeypatch.setitem(resilience._breakers, host, circuit)
+    url = server.url + "/data"
+
+    # Ein Fehler je Aufruf, nicht je Versuch: nach dem ersten Aufruf (drei Versuche)
+    # bleibt der Breaker geschlossen, der zweite öffnet ihn
+    assert resilience.get(requests, url, timeout=5).status_code == 503
+    assert len(server.requests) == 3 and circuit.allow()
+    assert resilience.get(requests, url, timeout=5).status_code == 503
+    assert len(server.requests) == 6
+    with pytest.raises(resilience.SourceUnavailable, match="Circuit Breaker offen"):
+        resilience.get(requests, url, timeout=5)
+    assert len(server.requests) == 6
+
+    # Nach der Sperrzeit genau ein Probeversuch; scheitert er, öffnet der Breaker sofort wieder
+    time.sleep(0.35)
+    with pytest.raises(resilience.SourceUnavailable, match="Circuit Breaker offen"):
+        resilience.get(requests, url, timeout=5)
+    assert len(server.requests) == 7
+    assert not circuit.allow()
+
+    # Ein erfolgreicher Probeversuch schließt den Breaker
+    faults.plan = [200]
+    time.sleep(0.35)
+    assert resilience.get(requests, url, timeout=5).status_code == 200
+    assert len(server.requests) == 8
+    assert circuit.allow() and circuit.allow()
+
+
+def test_httpcache_falls_back_to_stored_response(stub_server, monkeypatch):
+    faults = Faults(200)
+    server = stub_server(faults)
+    host = _host(server)
+    circuit = resilience.CircuitBreaker(host, failures=1, cooldown=60)
+    monkeypatch.setitem(resilience._breakers, host, circuit)
+    url = server.url + "/PCR_Index.TXT"
+
+    assert httpcache.get_text(url, ttl=0, timeout=5) == "Antwort 200"
+
+    # 5xx in allen Versuchen: gespeicherte Antwort
+    faults.plan = [503]
+    assert httpcache.get_text(url, ttl=0, timeout=5) == "Antwort 200"
+    assert len(server.requests) == 4
+
+    # Offener Breaker: gespeicherte Antwort ohne Anfrage
+    assert not circuit.allow()
+    assert httpcache.get_text(url, ttl=0, timeout=5) == "Antwort 200"
+    assert len(server.requests) == 4
+
+    # Ohne gespeicherte Antwort wird der Fehler weitergereicht
+    with pytest.raises(resilience.SourceUnavailable):
+        httpcache.get_text(server.url + "/neu.txt", ttl=0, timeout=5)
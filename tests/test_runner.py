@@ -0,0 +1,30 @@
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import runner
+
+
+def _strategy(name, build_message):
+    return SimpleNamespace(__name__=name, CHAT_ID=None, build_message=build_message)
+
+
+def test_budget_does_not_wait_for_a_running_strategy(capsys):
+    release = threading.Event()
+
+    def slow(provider):
+        release.wait(5)
+        return "zu spät"
+
+    started = time.monotonic()
+    asyncio.run(runner.run_strategies([_strategy("fast", lambda provider: "Signal"), _strategy("slow", slow),
+                                       _strategy("never", lambda provider: "nie")], provider=None, budget=0.3))
+    elapsed = time.monotonic() - started
+    release.set()
+
+    out, err = capsys.readouterr()
+    assert elapsed < 2
+    assert "Signal" in out and "zu spät" not in out and "nie" not in out
+    assert "Zeitbudget von 0.3 s überschritten" in err
+
@@ -0,0 +1,12 @@
+import pandas as pd
+
+import sweep
+
+
+def test_rank_drops_thin_combinations_and_breaks_ties():
+    results = pd.DataFrame({"rsi_max": [5, 10, 15, 20], "trades": [3, 40, 40, 25],
+                            "avg_return": [9.0, 1.0, 2.0, 0.5], "total_return": [80.0, 30.0, 30.0, 35.0]})
+
+    ranked = sweep.rank(results)
+    assert ranked["rsi_max"].tolist() == [20, 15, 10]
+    assert sweep.rank(results, "avg_return", min_trades=0)["rsi_max"].tolist()[0] == 5
@@ -0,0 +1,229 @@
+import pytest
+
+import swings
+from providers import ReplayProvider
+
+
+@pytest.fixture(scope="module")
+def universe(swing_dir):
+    return (swing_dir / "tickers.txt").read_text(encoding="utf-8").split()
+
+
+@pytest.fixture(scope="module")
+def provider(swing_dir):
+    return ReplayProvider(str(swing_dir))
+
+
+@pytest.fixture(scope="module")
+def expected(provider, universe):
+    """Signale eines Laufs in einem einzigen Block."""
+    signals = swings.run_analysis(universe, provider, chunk_size=len(universe))
+    assert signals
+    return signals
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64])
+def test_chunked_run_matches_single_chunk(provider, universe, expected, chunk_size):
+    assert swings.run_analysis(universe, provider, chunk_size=chunk_size) == expected
+
+
+def test_iter_signals_yields_each_chunk_in_order(provider, universe, expected):
+    chunks = list(swings.iter_signals(universe, provider, chunk_size=50))
+
+    assert len(chunks) == 4
+    assert [ticker for chunk in chunks for ticker in chunk] == expected
+    for i, chunk in enumerate(chunks):
+        assert all(ticker in universe[i * 50:(i + 1) * 50] for ticker in chunk)
+
+
+def test_load_chunks_overlaps_at_most_one_chunk(provider, universe, monkeypatch):
+    chunks = [universe[i:i + 40] for i in range(0, 120, 40)]
+    loaded = []
+    load_panel = swings.load_panel
+    monkeypatch.setattr(swings, "load_panel", lambda provider, tickers, *args: (
+        loaded.append(tickers[0]), load_panel(provider, tickers, *args))[1])
+
+    for i, (chunk, panel, errors) in enumerate(swings._load_chunks(provider, chunks)):
+        # Der nächste Block wird erst angefordert, wenn der aktuelle übergeben wird
+        assert len(loaded) <= i + 2
+        assert chunk == chunks[i] and panel.symbols == chunk and not errors
+    assert loaded == [chunk[0] for chunk in chunks]
+
+
+def _lines(err, prefix):
+    return [line for line in err.splitlines() if line.startswith(prefix)]
+
+
+def test_workers_match_the_serial_path(provider, universe, capsys):
+    tickers = universe[:100] + ["FEHLT1"] + universe[100:] + ["FEHLT2"]
+
+    serial = swings.run_analysis(tickers, provider, chunk_size=80, workers=0)
+    serial_err = capsys.readouterr().err
+    parallel = swings.run_analysis(tickers, provider, chunk_size=80, workers=2)
+    parallel_err = capsys.readouterr().err
+
+    assert parallel == serial and serial
+    # Fehler, Stufen der Pipeline und Signal-Details in derselben Reihenfolge
+    for prefix in ("Keine Daten für", "swings:", "--- SIGNAL FOUND", "  R2:"):
+        assert _lines(parallel_err, prefix) == _lines(serial_err, prefix), prefix
+    assert any("FEHLT1" in line for line in _lines(parallel_err, "Keine Daten für"))
+
+
+def test_workers_advance_the_same_indicator_state(swing_dir, universe, tmp_path, monkeypatch):
+    import numpy as np
+    import indicatorstate
+    from providers import CachingProvider
+
+    tickers = universe[:60]
+    results = {}
+    for workers in (0, 2):
+        monkeypatch.setattr(indicatorstate, "STATE_DIR", str(tmp_path / f"state{workers}"))
+        signals = []
+        # Erster Lauf legt den Zustand an, der zweite setzt darauf auf
+        for as_of in ("2026-09-18", "2026-09-25"):
+            provider = CachingProvider(ReplayProvider(str(swing_dir), as_of=as_of),
+                                       store_dir=str(tmp_path / f"store{workers}"))
+            signals.append(swings.run_analysis(tickers, provider, chunk_size=30, workers=workers))
+        states = {}
+        for spec in swings.INDICATORS:
+            with np.load(indicatorstate._state_path(spec)) as saved:
+                order = np.argsort(saved["symbols"])
+                states[spec] = {key: saved[key][order] for key in saved.files}
+        results[workers] = signals, states
+
+    (serial_signals, serial_states), (parallel_signals, parallel_states) = results[0], results[2]
+    assert parallel_signals == serial_signals and any(serial_signals)
+    for spec, arrays in serial_states.items():
+        assert sorted(parallel_states[spec]["symbols"]) == sorted(tickers)
+        for key, array in arrays.items():
+            np.testing.assert_array_equal(parallel_states[spec][key], array, err_msg=f"{spec} {key}")
+
+
+def test_failing_shard_reports_its_tickers(provider, universe, monkeypatch, capsys):
+    from concurrent.futures import Future
+
+    class BrokenPool:
+        """Prozess-Pool, dessen zweites Teilstück je Block fehlschlägt."""
+
+        def __init__(self):
+            self.calls = 0
+
+        def submit(self, function, *args):
+            self.calls += 1
+            future = Future()
+            if self.calls % 2 == 0:
+                future.set_exception(RuntimeError("Worker beendet"))
+            else:
+                swings._init_worker(provider)
+                future.set_result(function(*args))
+            return future
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(swings, "_process_pool", lambda provider, workers: BrokenPool())
+
+    tickers = universe[:40]
+    swings.run_analysis(tickers, provider, chunk_size=40, workers=1)
+
+    err = capsys.readouterr().err
+    # Vier Teilstücke zu je 10 Tickern, das zweite und vierte schlagen fehl
+    assert "Fehler im Worker für 10 Ticker (T00010 bis T00019)" in err
+    assert _lines(err, "Keine Daten für") == ["Keine Daten für 20 Ticker: " + ", ".join(tickers[10:20] + tickers[30:])]
+
+
+def _filter_counters():
+    import metrics
+
+    return {name: value for name, value in metrics.snapshot()[1].items() if name.startswith("swings.filter.")}
+
+
+def test_pipeline_stages_and_signals_match_a_plain_check(provider, universe, expected, capsys):
+    import numpy as np
+    import indicatorstate
+    from panel import Panel
+
+    histories, _ = provider.load_histories(universe, period="500d")
+    panel = Panel.from_histories(histories, universe)
+    current = indicatorstate.latest(panel, swings.INDICATORS, symbols=universe, persist=False)
+    rsi, counts = current[("rsi", 2)]
+    adx, roc = current[("adx", 14)][0], current[("roc", 250)][0]
+
+    # Alle Bedingungen für jeden Ticker, R2 einzeln je Zeile
+    plain = [ticker for i, ticker in enumerate(universe)
+             if rsi[i] < swings.RSI_THRESHOLD and adx[i] > swings.ADX_THRESHOLD and roc[i] > 0
+             and counts[i] >= 250 and swings.calculate_best_r2(panel.row(ticker))[0] * 100 > swings.R2_THRESHOLD]
+    assert plain == expected
+
+    # Günstige und trennscharfe Stufen zuerst, R2 zuletzt und nur für die verbliebenen Ticker
+    alive = np.ones(len(universe), dtype=bool)
+    stages = {}
+    for name, passed in [("rsi2", rsi < swings.RSI_THRESHOLD), ("adx14", adx > swings.ADX_THRESHOLD),
+                         ("roc250", roc > 0), ("history", counts >= 250)]:
+        stages[name] = int((alive & ~passed).sum())
+        alive &= passed
+    stages["r2"] = int(alive.sum()) - len(plain)
+    assert [predicate.name for predicate in swings.swing_pipeline().order()] == list(stages)
+
+    before = _filter_counters()
+    assert swings.filter_signals(universe, panel, rsi, adx, roc, counts) == plain
+    serial = {name: value - before.get(name, 0) for name, value in _filter_counters().items()}
+    assert serial == {f"swings.filter.{name}": dropped for name, dropped in stages.items()}
+    assert swings.swing_pipeline().describe(len(universe), stages)[-1] in capsys.readouterr().err
+    # R2 nur für die Ticker, die alle übrigen Stufen überstanden haben
+    assert stages["rsi2"] > len(universe) // 2 and int(alive.sum()) < len(universe) // 10
+
+    # Worker-Prozesse: Pipeline je Teilstück, die Zähler kommen im Hauptprozess an
+    before = _filter_counters()
+    assert swings.run_analysis(universe, provider, chunk_size=len(universe), workers=2) == plain
+    sharded = {name: value - before.get(name, 0) for name, value in _filter_counters().items()}
+    assert sharded == serial
+
+
+def _stream(provider, send, **kwargs):
+    import asyncio
+
+    return asyncio.run(swings.stream(send, provider, **kwargs))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_stream_sends_each_batch_and_returns_batch_order(swing_dir, expected, workers):
+    # Seiten zu 25 Tickern, Batches zu 23: Batches entstehen auch über Seitengrenzen hinweg
+    provider = ReplayProvider(str(swing_dir), page_size=25)
+    sent = []
+
+    assert _stream(provider, sent.append, batch_size=23, workers=workers) == expected
+
+    # Eine Nachricht je Batch mit Signalen: zusammenhängende Stücke der Signal-Liste
+    # (Batch-Grenzen hängen davon ab, wann die Seiten bereitliegen)
+    sent = sorted((message.split(", ") for message in sent), key=lambda message: expected.index(message[0]))
+    assert [ticker for message in sent for ticker in message] == expected
+    assert all(len(message) <= 23 for message in sent)
+
+
+def test_cancelled_stream_stops_sending(swing_dir, monkeypatch):
+    import asyncio
+    import time
+
+    provider = ReplayProvider(str(swing_dir), page_size=25)
+    load_panel = swings.load_panel
+
+    def slow_load_panel(provider, tickers):
+        time.sleep(0.3)
+        return load_panel(provider, tickers)
+
+    monkeypatch.setattr(swings, "load_panel", slow_load_panel)
+    sent = []
+
+    async def run():
+        await asyncio.wait_for(swings.stream(sent.append, provider, batch_size=10, workers=0), 1.0)
+
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+    # Der Abbruch wartet nicht auf die übrigen Batches (20 zu je 0,3 s)
+    assert time.perf_counter() - started < 3.0
+    count = len(sent)
+    # Laufende Downloads werden nicht unterbrochen, ihre Signale aber nicht mehr versendet
+    time.sleep(1.0)
+    assert len(sent) == count
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+import tom
+
+
+class FixedDatetime(datetime):
+    day_of_run = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.day_of_run
+
+
+@pytest.mark.parametrize("day, reason", [
+    (datetime(2026, 10, 24), "kein Handelstag"),   # Samstag
+    (datetime(2026, 10, 22), "nicht zwischen dem 24. und 28."),
+    (datetime(2026, 9, 24), "September"),
+])
+def test_standalone_run_is_gated_like_the_runner(monkeypatch, capsys, day, reason):
+    FixedDatetime.day_of_run = day
+    monkeypatch.setattr(tom, "datetime", FixedDatetime)
+    monkeypatch.setattr(tom, "build_message", lambda: pytest.fail("build_message trotz is_due() == False"))
+
+    tom.check_tom_strategy()
+
+    assert reason in capsys.readouterr().out
+
+
+def test_sma_errors_only_for_rsi_survivors():
+    import numpy as np
+
+    symbols = ["A", "B", "C", "D"]
+    data = {"load_errors": {}, "load_failed": np.zeros(4, dtype=bool), "bar_counts": np.full(4, 65),
+            "last_close": np.array([10.0, 10.0, 10.0, 10.0]),
+            "rsi": np.array([20.0, 60.0, 30.0, 10.0]), "sma": np.array([np.nan, np.nan, 8.0, 9.0])}
+    pipeline = tom.tom_pipeline()
+
+    survivors, eliminated, errors = pipeline.run(symbols, data)
+
+    # B (RSI 60) wird ohne Fehlermeldung aussortiert, A (RSI 20) meldet die fehlende SMA
+    assert errors == ["SMA-Berechnung für A fehlgeschlagen (NaN oder <=0)."]
+    assert [symbols[i] for i in survivors] == ["C", "D"]
+    assert list(eliminated) == ["data", "history", "rsi_valid", "rsi2", "sma_valid"]
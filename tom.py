@@ -1,110 +1,140 @@
 import os
-import yfinance as yf
-from ta.momentum import RSIIndicator
-from ta.trend import SMAIndicator
+import sys
 import asyncio
-from telegram import Bot
-import pandas as pd
 from datetime import datetime
 
+import tradingcalendar
+
+# Schwere Module (pandas, numpy, telegram, marketdata) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
+
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Signal-Schwelle (auch Standardwert für backtest.py / sweep.py)
+RSI_THRESHOLD = 40
+
 
 async def send_telegram_message(text):
     """Sends a message to a Telegram chat."""
     if not TOKEN or not CHAT_ID:
         print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
         return
-    try:
-        bot = Bot(token=TOKEN)
-        await bot.send_message(chat_id=CHAT_ID, text=text)
-        print("Telegram notification sent successfully.")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+    from notifier import send_messages
+    await send_messages([(CHAT_ID, text)], token=TOKEN)
+
+
+ETFS = ["EWC", "EWZ", "IHI", "IVE", "IWS", "IYF",
+        "SLYV", "XLB", "XLY", "ENZL", "EWT", "IYR", "GLD"]
+
+# SMA(60) und die Prüfung auf 61 Bars; Reserve für einen verspäteten Bar
+HISTORY_PERIOD = "65b"
+
+# --- Runner-Plugin (siehe runner.py) ---
+DATA_REQUIREMENTS = {ticker: HISTORY_PERIOD for ticker in ETFS}
+
+
+def is_due(today):
+    """Handelstage zwischen dem 24. und 28. eines Monats, außer im September."""
+    return tradingcalendar.is_session(today) and 24 <= today.day <= 28 and today.month != 9
 
 
 def check_tom_strategy():
     """
     Prüft die "Turn of Month" Strategie für folgende 13 ETFs: EWC,EWZ,IHI,IVE,IWS,IYF,SLYV,XLB,XLY,ENZL,EWT,IYR,GLD
     Bedingungen:
-    1. Zeitraum ist zwischen 24. und 28. eines Monats.
+    1. Handelstag zwischen dem 24. und 28. eines Monats (siehe is_due).
     2. Der Monat ist NICHT September.
     3. RSI(2) < 40.
     4. Die gefilterten ETFs werden nach dem Verhältnis 'Schlusskurs / SMA(60)' absteigend sortiert.
     5. Kauf Signal für die Top 3 ETFs in der Liste."""
-    errors = []
-    message = ""
-
-    today = datetime.today()
-
-    # 1. Zeitraum ist zwischen 24. und 28. eines Monats.
-    if not 24 <= today.day <= 28:
-        message = f"❌ Kein Signal: Heute ist der {today.day}., nicht zwischen dem 24. und 28. des Monats."
+    today = datetime.now()
+
+    # 1. und 2.: dieselbe Prüfung wie im Runner, einschließlich des Handelskalenders
+    if not is_due(today):
+        if not 24 <= today.day <= 28:
+            message = f"❌ Kein Signal: Heute ist der {today.day}., nicht zwischen dem 24. und 28. des Monats."
+        elif today.month == 9:
+            message = "❌Kein Signal: Die Strategie wird im September nicht angewendet."
+        else:
+            message = f"❌ Kein Signal: Heute ({today.strftime('%A, %d.%m.%Y')}) ist kein Handelstag."
         # No need to send a message if it's not the right time
-        # asyncio.run(send_telegram_message(message))
         print(message)
         return
 
-    # 2. Der Monat ist NICHT September.
-    if today.month == 9:
-        message = "❌Kein Signal: Die Strategie wird im September nicht angewendet."
-        # No need to send a message if it's not the right time
-        # asyncio.run(send_telegram_message(message))
-        print(message)
-        return
+    final_message = build_message()
+    print(final_message)
+    asyncio.run(send_telegram_message(final_message))
+
 
-    etfs = ["EWC", "EWZ", "IHI", "IVE", "IWS", "IYF",
-            "SLYV", "XLB", "XLY", "ENZL", "EWT", "IYR", "GLD"]
-    qualified_etfs = []
-
-    for ticker in etfs:
-        try:
-            # Fetch enough data for 60-day SMA and 2-day RSI
-            data = yf.download(ticker, period="4mo", progress=False)
-            if data.empty or len(data) < 61:
-                errors.append(
-                    f"Nicht genügend historische Daten für {ticker} gefunden.")
-                continue
-
-            # Ensure data is a 1D Series
-            close_prices = data["Close"].squeeze()
-
-            # 3. RSI(2) < 40.
-            rsi_indicator = RSIIndicator(close=close_prices, window=2)
-            rsi_value = rsi_indicator.rsi().iloc[-1]
-
-            if pd.isna(rsi_value):
-                errors.append(
-                    f"RSI-Berechnung für {ticker} fehlgeschlagen (NaN).")
-                continue
-
-            if rsi_value < 40:
-                # 4. Verhältnis 'Schlusskurs / SMA(60)'
-                sma_indicator = SMAIndicator(close=close_prices, window=60)
-                sma_value = sma_indicator.sma_indicator().iloc[-1]
-                last_close = close_prices.iloc[-1]
-
-                if pd.isna(sma_value) or sma_value <= 0:
-                    errors.append(
-                        f"SMA-Berechnung für {ticker} fehlgeschlagen (NaN oder <=0).")
-                    continue
-
-                ratio = last_close / sma_value
-                qualified_etfs.append(
-                    {"ticker": ticker, "ratio": ratio, "rsi": rsi_value})
-
-        except Exception as e:
-            errors.append(f"FEHLER bei der Verarbeitung von {ticker}: {e}")
+def tom_pipeline():
+    """
+    Bedingungen 3. bis 5. als Filter-Pipeline (siehe filters.py): Datenprüfungen mit
+    Fehlermeldung, RSI(2) < 40, die Prüfung der SMA für die verbliebenen ETFs und die
+    Rangfolge nach 'Schlusskurs / SMA(60)'.
+    """
+    import numpy as np
+    from filters import Pipeline, Predicate, Rank
+
+    # 4. absteigend sortiert nach 'Schlusskurs / SMA(60)', 5. Top 3
+    ratio = Rank(lambda data, rows: data["last_close"][rows] / data["sma"][rows], top=3)
+    return Pipeline("tom", [
+        Predicate("data", lambda data, rows: ~data["load_failed"][rows],
+                  error=lambda data, i, ticker:
+                      f"FEHLER beim Laden der Daten für {ticker}: {data['load_errors'][ticker]}"),
+        Predicate("history", lambda data, rows: data["bar_counts"][rows] >= 61,
+                  error=lambda data, i, ticker: f"Nicht genügend historische Daten für {ticker} gefunden."),
+        Predicate("rsi_valid", lambda data, rows: ~np.isnan(data["rsi"][rows]),
+                  error=lambda data, i, ticker: f"RSI-Berechnung für {ticker} fehlgeschlagen (NaN)."),
+        # 3. RSI(2) < 40.
+        Predicate("rsi2", lambda data, rows: data["rsi"][rows] < RSI_THRESHOLD, selectivity=0.4),
+        # Die SMA wird nur für die Rangfolge gebraucht, Fehler daher nur für RSI-Treffer
+        Predicate("sma_valid", lambda data, rows: data["sma"][rows] > 0, late=True,
+                  error=lambda data, i, ticker: f"SMA-Berechnung für {ticker} fehlgeschlagen (NaN oder <=0)."),
+    ], rank=ratio)
+
+
+def build_message(provider=None):
+    """
+    Prüft die Bedingungen 3. bis 5. der "Turn of Month" Strategie und gibt die Nachricht zurück.
+    Die Kursdaten kommen von `provider` (Standard: providers.default_provider()).
+    """
+    import numpy as np
+    import indicatorstate
+    import metrics
+    from panel import Panel
+    from providers import default_provider
+
+    provider = provider or default_provider()
+
+    message = ""
+
+    # Fetch enough data for 60-day SMA and 2-day RSI for all ETFs in one request
+    histories, load_errors = provider.load_histories(ETFS, period=HISTORY_PERIOD)
+    panel = Panel.from_histories(histories, ETFS)
+    del histories
+
+    # RSI(2) und SMA(60) für alle ETFs auf einmal, fortgeschrieben ab dem letzten Lauf
+    current = indicatorstate.latest(panel, [("rsi", 2), ("sma", 60)], symbols=ETFS,
+                                    persist=provider.persistent)
+    data = {"load_errors": load_errors, "load_failed": np.isin(ETFS, list(load_errors)),
+            "bar_counts": panel.counts(), "last_close": panel.last(),
+            "rsi": current[("rsi", 2)][0], "sma": current[("sma", 60)][0]}
+
+    pipeline = tom_pipeline()
+    top_3, eliminated, errors = pipeline.run(ETFS, data)
+    for line in pipeline.describe(len(ETFS), eliminated):
+        print(line, file=sys.stderr)
+    metrics.count("tom.skipped_short_history", eliminated["history"])
+    qualified_etfs = [{"ticker": ETFS[i], "ratio": data["last_close"][i] / data["sma"][i],
+                       "rsi": data["rsi"][i]} for i in top_3]
 
     if not qualified_etfs:
-        message = "❌Kein ETF erfüllt die RSI < 40 Bedingung."
+        message = f"❌Kein ETF erfüllt die RSI < {RSI_THRESHOLD} Bedingung."
     else:
-        # 4. absteigend sortiert.
-        qualified_etfs.sort(key=lambda x: x["ratio"], reverse=True)
-
-        # 5. Kauf Signal für die Top 3 ETFs
-        top_3_etfs = qualified_etfs[:3]
+        # 5. Kauf Signal für die Top 3 ETFs (bereits sortiert)
+        top_3_etfs = qualified_etfs
+        metrics.count("tom.signals", len(top_3_etfs))
 
         if top_3_etfs:
             message_lines = ["✅ Turn of the Month Signale:"]
@@ -131,8 +161,7 @@ def check_tom_strategy():
         # This state should ideally not be reached
         final_message = "Unbekannter Zustand in 'tom.py': Weder Erfolgs- noch Fehlermeldung generiert."
 
-    print(final_message)
-    asyncio.run(send_telegram_message(final_message))
+    return final_message
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+from array import array
+from datetime import date, timedelta
+
+# --- Handelskalender der US-Börsen (NYSE/Nasdaq) ---
+# Die Handelstage von FIRST_YEAR bis LAST_YEAR werden beim ersten Aufruf einmal aus den
+# Feiertagsregeln der NYSE berechnet und als Bytefeld (1 = Handelstag, je Kalendertag)
+# plus sortierter Liste der Handelstage und kumulativer Anzahl je Kalendertag abgelegt.
+# Damit sind "ist Handelstag", "vorheriger/nächster Handelstag" und "N Handelstage
+# zurück" Indexzugriffe ohne Schleifen. Kalendertage und Handelstage werden als
+# datetime.date zurückgegeben; Argumente dürfen date, datetime oder pd.Timestamp sein.
+#
+# Verkürzte Handelstage (z.B. vor Thanksgiving) gelten als normale Handelstage.
+
+FIRST_YEAR = 2000
+LAST_YEAR = 2050
+
+# Einmalige Schließungen (11. September, Staatstrauer, Hurrikan Sandy)
+SPECIAL_CLOSURES = [
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5), date(2025, 1, 9),
+]
+
+
+def _easter(year):
+    """Ostersonntag (gregorianisch, Algorithmus nach Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-ter Wochentag (0 = Montag) eines Monats; n = -1 für den letzten."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Feiertag am Samstag gilt am Freitag davor, am Sonntag am Montag danach."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def holidays(year):
+    """Börsenfeiertage der NYSE in einem Jahr."""
+    days = [
+        _nth_weekday(year, 1, 0, 3),        # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),        # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Karfreitag
+        _nth_weekday(year, 5, 0, -1),       # Memorial Day
+        _observed(date(year, 7, 4)),        # Independence Day
+        _nth_weekday(year, 9, 0, 1),        # Labor Day
+        _nth_weekday(year, 11, 3, 4),       # Thanksgiving
+        _observed(date(year, 12, 25)),      # Weihnachten
+    ]
+    # Neujahr am Samstag wird nicht am Freitag davor (im Vorjahr) nachgeholt
+    if date(year, 1, 1).weekday() != 5:
+        days.append(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        days.append(_observed(date(year, 6, 19)))  # Juneteenth
+    return sorted(days)
+
+
+class _Calendar:
+    def __init__(self):
+        self.first = date(FIRST_YEAR, 1, 1).toordinal()
+        size = date(LAST_YEAR, 12, 31).toordinal() - self.first + 1
+        closed = set(SPECIAL_CLOSURES)
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            closed.update(holidays(year))
+
+        # open[i]: Tag i ist Handelstag; rank[i]: Anzahl Handelstage bis einschließlich Tag i
+        self.open = bytearray(size)
+        self.rank = array("i", bytes(4 * size))
+        self.sessions = array("i")
+        for i in range(size):
+            day = date.fromordinal(self.first + i)
+            if day.weekday() < 5 and day not in closed:
+                self.open[i] = 1
+                self.sessions.append(self.first + i)
+            self.rank[i] = len(self.sessions)
+
+    def index(self, day):
+        i = day.toordinal() - self.first
+        if not 0 <= i < len(self.open):
+            raise ValueError(f"{day:%d.%m.%Y} liegt außerhalb des Handelskalenders "
+                             f"({FIRST_YEAR}-{LAST_YEAR}).")
+        return i
+
+    def session(self, position):
+        if not 0 <= position < len(self.sessions):
+            raise ValueError(f"Handelstag außerhalb des Handelskalenders ({FIRST_YEAR}-{LAST_YEAR}).")
+        return date.fromordinal(self.sessions[position])
+
+
+_calendar = None
+
+
+def _get():
+    global _calendar
+    if _calendar is None:
+        _calendar = _Calendar()
+    return _calendar
+
+
+def is_session(day):
+    """Ob `day` ein Handelstag ist."""
+    calendar = _get()
+    return bool(calendar.open[calendar.index(day)])
+
+
+def session_on_or_before(day):
+    """`day`, falls Handelstag, sonst der letzte Handelstag davor."""
+    calendar = _get()
+    return calendar.session(calendar.rank[calendar.index(day)] - 1)
+
+
+def previous_session(day):
+    """Letzter Handelstag vor `day`."""
+    calendar = _get()
+    i = calendar.index(day)
+    return calendar.session(calendar.rank[i] - 1 - calendar.open[i])
+
+
+def next_session(day):
+    """Erster Handelstag nach `day`."""
+    calendar = _get()
+    return calendar.session(calendar.rank[calendar.index(day)])
+
+
+def sessions_back(day, n):
+    """Der Handelstag `n` Handelstage vor session_on_or_before(day) (n = 0: dieser selbst)."""
+    calendar = _get()
+    return calendar.session(calendar.rank[calendar.index(day)] - 1 - n)
+
+
+def sessions_between(start, end):
+    """Anzahl der Handelstage von `start` bis einschließlich `end`."""
+    calendar = _get()
+    i, j = calendar.index(start), calendar.index(end)
+    return max(0, calendar.rank[j] - calendar.rank[i] + calendar.open[i])
+
+
+def is_last_session_of_week(day):
+    """Ob `day` der letzte Handelstag seiner Kalenderwoche ist (meist Freitag)."""
+    if not is_session(day):
+        return False
+    return next_session(day).isocalendar()[:2] != day.isocalendar()[:2]
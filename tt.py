@@ -1,13 +1,19 @@
-import requests
 import os
-import yfinance as yf
-from ta.momentum import RSIIndicator
 import asyncio
-from telegram import Bot
+
+import tradingcalendar
+
+# Schwere Module (pandas, numpy, telegram, marketdata) werden erst in den Funktionen
+# importiert, damit die Kalenderprüfung ohne Importkosten läuft.
 
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Signal-Schwelle (auch Standardwert für backtest.py / sweep.py)
+RSI_THRESHOLD = 35
+# Profit Target der Position (siehe positions.py)
+PROFIT_TARGET = 0.01
+
 
 """url = f"https://api.telegram.org/bot{TOKEN}/getUpdates"
 
@@ -19,27 +25,40 @@ async def send_telegram_message(text):
     if not TOKEN or not CHAT_ID:
         print("Telegram environment variables (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID) not set. Skipping notification.")
         return
-    try:
-        bot = Bot(token=TOKEN)
-        await bot.send_message(chat_id=CHAT_ID, text=text)
-        print("Telegram notification sent successfully.")
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
+    from notifier import send_messages
+    await send_messages([(CHAT_ID, text)], token=TOKEN)
 
 
-def check_tt_strategy():
+# Handelstage für RSI(2) samt Einschwingen und den Freitagsschluss
+HISTORY_PERIOD = "10b"
+
+# --- Runner-Plugin (siehe runner.py) ---
+DATA_REQUIREMENTS = {"SPY": HISTORY_PERIOD}
+
+
+def is_due(today):
+    """Turnaround Tuesday wird am Montag nach Handelsschluss geprüft (nicht an Feiertagen)."""
+    return today.weekday() == 0 and tradingcalendar.is_session(today)
+
+
+def build_message(provider=None):
     """
-    Prüft die "Turnaround Tuesday" Strategie für SPY und sendet Benachrichtigung.
+    Prüft die "Turnaround Tuesday" Strategie für SPY und gibt die Nachricht zurück.
     Bedingungen:
     1. Montags Schlusskurs < Freitags Schlusskurs
     2. RSI(2) < 35
+    Die Kursdaten kommen von `provider` (Standard: providers.default_provider()).
     """
+    from providers import default_provider
+    import indicators
+
+    provider = provider or default_provider()
+
     errors = []
     message = ""
 
     try:
-        spy = yf.Ticker("SPY")
-        hist = spy.history(period="10d")
+        hist = provider.load_history("SPY", period=HISTORY_PERIOD)
 
         if hist.empty or len(hist) < 3:
             errors.append(
@@ -53,8 +72,7 @@ def check_tt_strategy():
                 friday_close = hist['Close'].iloc[-2]
                 friday_date = hist.index[-2]
 
-                rsi_indicator = RSIIndicator(close=hist["Close"], window=2)
-                rsi_value = rsi_indicator.rsi().iloc[-1]
+                rsi_value = indicators.rsi(hist["Close"].to_numpy(), 2)[-1]
 
                 print(
                     f"Montag Schlusskurs ({last_day.date()}): {monday_close:.2f}")
@@ -63,13 +81,16 @@ def check_tt_strategy():
                 print(f"RSI(2): {rsi_value:.2f}")
 
                 condition1 = monday_close < friday_close
-                condition2 = rsi_value < 35
+                condition2 = rsi_value < RSI_THRESHOLD
 
                 if condition1 and condition2:
+                    if provider.persistent:
+                        import positions
+                        positions.record("LTT", ["SPY"], last_day, PROFIT_TARGET)
                     message = (
-                        "✅ 'LTT' Signal: BUY SPY ON CLOSE, PT 1%\n"
+                        f"✅ 'LTT' Signal: BUY SPY ON CLOSE, PT {PROFIT_TARGET:.0%}\n"
                         f"- Montags Schlusskurs ({monday_close:.2f}) < Freitags Schlusskurs ({friday_close:.2f})\n"
-                        f"- RSI(2) ({rsi_value:.2f}) < 35"
+                        f"- RSI(2) ({rsi_value:.2f}) < {RSI_THRESHOLD}"
                     )
                 else:
                     reasons = []
@@ -78,7 +99,7 @@ def check_tt_strategy():
                             f"Montagsschluss ({monday_close:.2f}) nicht niedriger als Freitagsschluss ({friday_close:.2f})")
                     if not condition2:
                         reasons.append(
-                            f"RSI(2) ({rsi_value:.2f}) nicht unter 35")
+                            f"RSI(2) ({rsi_value:.2f}) nicht unter {RSI_THRESHOLD}")
                     message = "❌ Kein 'LTT' Signal:\n- " + \
                         "\n- ".join(reasons)
 
@@ -96,6 +117,12 @@ def check_tt_strategy():
     else:
         final_message = "Unbekannter Zustand in 'tt.py': Weder Erfolgs- noch Fehlermeldung generiert."
 
+    return final_message
+
+
+def check_tt_strategy():
+    """Prüft die "Turnaround Tuesday" Strategie für SPY und sendet Benachrichtigung."""
+    final_message = build_message()
     print(final_message)
     asyncio.run(send_telegram_message(final_message))
 